@@ -1,5 +1,13 @@
-from copilot_client.ui.main_window import run_app
+import sys
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "headless":
+        from copilot_client.headless import main
+
+        sys.exit(main(sys.argv[2:]))
+
+    # Imported only for the GUI, so headless runs need neither customtkinter nor a display.
+    from copilot_client.ui.main_window import run_app
+
     run_app()
@@ -0,0 +1,351 @@
+from __future__ import annotations
+
+import argparse
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+import json
+import math
+from pathlib import Path
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Callable
+
+import msal
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from copilot_client import codec  # noqa: E402
+from copilot_client.apis import ChatApi, RetrievalApi, SearchApi  # noqa: E402
+from copilot_client.auth import AuthManager  # noqa: E402
+from copilot_client.config import AppSettings  # noqa: E402
+from copilot_client.http import HttpClient  # noqa: E402
+from copilot_client.services import CopilotService  # noqa: E402
+from copilot_client.ui.formatting import extract_formatted_text  # noqa: E402
+
+
+SCENARIOS = ("search", "retrieval", "chat", "chat_stream")
+TENANT_ID = "benchmark"
+CLIENT_ID = "benchmark-client"
+SCOPES = ("https://graph.microsoft.com/.default",)
+
+
+def encode_segment(value: dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+class OfflinePublicClientApplication:
+    # Signing in needs Microsoft Entra ID. This stands in for msal.PublicClientApplication with
+    # accounts and tokens kept in a real msal token cache, so AuthManager runs its own code
+    # path and pays MSAL's cache lookups.
+    def __init__(self, token_cache: msal.SerializableTokenCache, identities: int):
+        self._cache = token_cache
+        for index in range(identities):
+            self._issue_token(f"user-{index}")
+
+    def get_accounts(self) -> list[dict[str, Any]]:
+        return list(self._cache.find(self._cache.CredentialType.ACCOUNT))
+
+    def acquire_token_silent(
+        self,
+        scopes: list[str],
+        account: dict[str, Any],
+        force_refresh: bool = False,
+    ) -> dict[str, Any] | None:
+        home_account_id = account["home_account_id"]
+        if not force_refresh:
+            for entry in self._cache.find(
+                self._cache.CredentialType.ACCESS_TOKEN,
+                query={"home_account_id": home_account_id},
+            ):
+                expires_in = int(entry["expires_on"]) - int(time.time())
+                if expires_in > 300:
+                    return {"access_token": entry["secret"], "expires_in": expires_in, "token_type": "Bearer"}
+        return self._issue_token(home_account_id.split(".", 1)[0])
+
+    def remove_account(self, account: dict[str, Any]) -> None:
+        pass
+
+    def _issue_token(self, user_id: str) -> dict[str, Any]:
+        response = {
+            "access_token": f"access-token-{user_id}-{time.monotonic_ns()}",
+            "expires_in": 3600,
+            "refresh_token": f"refresh-token-{user_id}",
+            "token_type": "Bearer",
+            "client_info": encode_segment({"uid": user_id, "utid": TENANT_ID}),
+            "id_token": ".".join(
+                [
+                    encode_segment({"alg": "none"}),
+                    encode_segment(
+                        {
+                            "oid": user_id,
+                            "tid": TENANT_ID,
+                            "preferred_username": f"{user_id}@contoso.com",
+                            "iss": f"https://login.microsoftonline.com/{TENANT_ID}/v2.0",
+                            "aud": CLIENT_ID,
+                            "sub": user_id,
+                        }
+                    ),
+                    "",
+                ]
+            ),
+        }
+        self._cache.add(
+            {
+                "client_id": CLIENT_ID,
+                "scope": list(SCOPES),
+                "token_endpoint": f"https://login.microsoftonline.com/{TENANT_ID}/oauth2/v2.0/token",
+                "response": dict(response),
+                "params": {},
+                "data": {},
+            }
+        )
+        return response
+
+
+@dataclass(frozen=True)
+class LevelResult:
+    scenario: str
+    concurrency: int
+    requests: int
+    errors: int
+    throughput_per_second: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    first_event_p50_ms: float | None
+    cpu_ms_per_request: float
+    peak_rss_mb: float | None
+
+
+def percentile(samples: list[float], value: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(value / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def peak_rss_mb() -> float | None:
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS and kilobytes elsewhere.
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    if psutil is not None:
+        memory = psutil.Process().memory_info()
+        return round(getattr(memory, "peak_wset", memory.rss) / (1024 * 1024), 1)
+    return None
+
+
+def start_mock_server(args: argparse.Namespace) -> tuple[subprocess.Popen, str]:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "copilot_client.mock_server",
+            "--port",
+            str(port),
+            "--latency-distribution",
+            args.latency_distribution,
+            "--latency-ms",
+            str(args.latency_ms),
+            "--sse-events",
+            str(args.sse_events),
+            "--seed",
+            "1",
+        ],
+        cwd=REPO_ROOT,
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return process, f"http://127.0.0.1:{port}/beta"
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("Mock server did not start")
+
+
+def build_service(base_url: str, max_concurrency: int, transport: str, identities: int = 1) -> CopilotService:
+    settings = AppSettings(
+        tenant_id=TENANT_ID,
+        client_id=CLIENT_ID,
+        authority=f"https://login.microsoftonline.com/{TENANT_ID}",
+        scopes=SCOPES,
+        base_url=base_url,
+        chat_path="/copilot/conversations",
+        search_path="/copilot/search",
+        retrieval_path="/copilot/retrieval",
+        batch_path="/$batch",
+        timeout_seconds=60,
+        retry_attempts=0,
+        token_cache_path="",
+        auth_flow="interactive",
+        redirect_uri="http://localhost",
+        rate_limit_per_second=0.0,
+        initial_concurrency=max_concurrency,
+        max_concurrency=max_concurrency,
+        http_transport=transport,
+        identity_selection="first" if identities == 1 else "round_robin",
+    )
+    token_cache = msal.SerializableTokenCache()
+    auth_manager = AuthManager(
+        settings,
+        app=OfflinePublicClientApplication(token_cache, identities),
+        token_cache=token_cache,
+    )
+    http_client = HttpClient(settings, throttle_listener=auth_manager.record_throttle)
+    return CopilotService(
+        auth_manager=auth_manager,
+        chat_api=ChatApi(settings, http_client, account_for_token=auth_manager.get_home_account_id),
+        search_api=SearchApi(settings, http_client),
+        retrieval_api=RetrievalApi(settings, http_client),
+        request_timeout_seconds=settings.timeout_seconds,
+        http_client=http_client,
+    )
+
+
+def build_operation(service: CopilotService, scenario: str) -> Callable[[int], float | None]:
+    def run(index: int) -> float | None:
+        first_event_at: list[float] = []
+        started = time.perf_counter()
+        if scenario == "search":
+            response = service.run_search({"query": f"quarterly revenue {index}"})
+        elif scenario == "retrieval":
+            response = service.run_retrieval({"queryString": f"leave policy {index}", "dataSource": "sharePoint"})
+        elif scenario == "chat":
+            response = service.send_chat({"prompt": f"Summarize item {index}"})
+        else:
+            response = service.send_chat(
+                {"prompt": f"Summarize item {index}", "useStream": True},
+                on_stream_event=lambda _: first_event_at.append(time.perf_counter()) if not first_event_at else None,
+            )
+        # The UI renders every response as formatted text and as indented JSON, so both are part of the request.
+        extract_formatted_text(response)
+        codec.dumps_pretty(response)
+        return (first_event_at[0] - started) * 1000 if first_event_at else None
+
+    return run
+
+
+def run_level(service: CopilotService, scenario: str, concurrency: int, requests_count: int) -> LevelResult:
+    operation = build_operation(service, scenario)
+    latencies: list[float] = []
+    first_events: list[float] = []
+    errors: list[Exception] = []
+
+    def timed(index: int) -> None:
+        started = time.perf_counter()
+        try:
+            first_event = operation(index)
+        except Exception as exc:
+            errors.append(exc)
+            return
+        latencies.append((time.perf_counter() - started) * 1000)
+        if first_event is not None:
+            first_events.append(first_event)
+
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed, range(requests_count)))
+    elapsed = time.perf_counter() - started
+    cpu_seconds = time.process_time() - cpu_started
+
+    return LevelResult(
+        scenario=scenario,
+        concurrency=concurrency,
+        requests=requests_count,
+        errors=len(errors),
+        throughput_per_second=round(len(latencies) / elapsed, 1),
+        p50_ms=round(percentile(latencies, 50), 1),
+        p95_ms=round(percentile(latencies, 95), 1),
+        p99_ms=round(percentile(latencies, 99), 1),
+        first_event_p50_ms=round(percentile(first_events, 50), 1) if first_events else None,
+        cpu_ms_per_request=round(cpu_seconds * 1000 / max(1, requests_count), 2),
+        peak_rss_mb=peak_rss_mb(),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Drive CopilotService end-to-end against the local mock Graph server at increasing concurrency."
+    )
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and concurrency level.")
+    parser.add_argument("--latency-distribution", default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--sse-events", type=int, default=10)
+    parser.add_argument("--transport", choices=("http1", "http2"), default="http1")
+    parser.add_argument("--identities", type=int, default=1, help="Signed-in identities (round-robin above 1).")
+    parser.add_argument("--output", default="benchmark-results.json", help="Machine-readable results file.")
+    args = parser.parse_args()
+
+    process, base_url = start_mock_server(args)
+    results: list[LevelResult] = []
+    service: CopilotService | None = None
+    try:
+        service = build_service(base_url, max(args.concurrency), args.transport, args.identities)
+        # One untimed request per scenario so connection setup is not charged to the first level.
+        for scenario in args.scenarios:
+            build_operation(service, scenario)(-1)
+
+        print(
+            f"{'scenario':12} {'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+            f" {'1st evt':>8} {'cpu ms':>7} {'rss MB':>7} {'errors':>6}"
+        )
+        for scenario in args.scenarios:
+            for concurrency in args.concurrency:
+                result = run_level(service, scenario, concurrency, args.requests)
+                results.append(result)
+                first_event = "-" if result.first_event_p50_ms is None else f"{result.first_event_p50_ms:.1f}"
+                rss = "-" if result.peak_rss_mb is None else f"{result.peak_rss_mb:.1f}"
+                print(
+                    f"{scenario:12} {concurrency:5} {result.throughput_per_second:8.1f} {result.p50_ms:8.1f}"
+                    f" {result.p95_ms:8.1f} {result.p99_ms:8.1f} {first_event:>8} {result.cpu_ms_per_request:7.2f}"
+                    f" {rss:>7} {result.errors:6}"
+                )
+    finally:
+        if service is not None:
+            service.close()
+        process.terminate()
+        process.wait()
+
+    report: dict[str, Any] = {
+        "createdAt": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "codec": codec.BACKEND,
+        "transport": args.transport,
+        "identityCount": args.identities,
+        "mockLatency": {"distribution": args.latency_distribution, "medianMs": args.latency_ms},
+        "results": [asdict(result) for result in results],
+        "tokenCache": asdict(service.token_cache_stats()) if service is not None else None,
+        "identities": [asdict(stats) for stats in service.identity_stats()] if service is not None else [],
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from pathlib import Path
+import sys
+import threading
+import time
+
+import h2.config
+import h2.connection
+import h2.events
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from copilot_client.config import AppSettings  # noqa: E402
+from copilot_client.http import HttpClient  # noqa: E402
+from copilot_client.transport import Http2Session  # noqa: E402
+
+
+RESPONSE_BODY = json.dumps(
+    {"searchHits": [{"webUrl": f"https://contoso.sharepoint.com/doc{index}.docx"} for index in range(20)]}
+).encode("utf-8")
+
+
+class Http1StandIn(ThreadingHTTPServer):
+    daemon_threads = True
+    # Every client thread connects at once; the default backlog of 5 resets some of those connects.
+    request_queue_size = 128
+
+    def __init__(self, latency: float, handshake: float):
+        self.latency = latency
+        self.handshake = handshake
+        self.connections = 0
+        self.connections_lock = threading.Lock()
+        super().__init__(("127.0.0.1", 0), Http1Handler)
+
+
+class Http1Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.connections_lock:
+            self.server.connections += 1
+        time.sleep(self.server.handshake)
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", "0")))
+        time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE_BODY)))
+        self.end_headers()
+        self.wfile.write(RESPONSE_BODY)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+class Http2StandIn:
+    def __init__(self, latency: float, handshake: float):
+        self.latency = latency
+        self.handshake = handshake
+        self.connections = 0
+        self.port = 0
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        server = self._loop.run_until_complete(asyncio.start_server(self._handle, "127.0.0.1", 0))
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        await asyncio.sleep(self.handshake)
+        connection = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+        connection.initiate_connection()
+        writer.write(connection.data_to_send())
+
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            for event in connection.receive_data(data):
+                if isinstance(event, h2.events.DataReceived):
+                    connection.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                elif isinstance(event, h2.events.StreamEnded):
+                    asyncio.ensure_future(self._respond(connection, writer, event.stream_id))
+            writer.write(connection.data_to_send())
+        writer.close()
+
+    async def _respond(
+        self,
+        connection: h2.connection.H2Connection,
+        writer: asyncio.StreamWriter,
+        stream_id: int,
+    ) -> None:
+        await asyncio.sleep(self.latency)
+        connection.send_headers(
+            stream_id,
+            [
+                (":status", "200"),
+                ("content-type", "application/json"),
+                ("content-length", str(len(RESPONSE_BODY))),
+            ],
+        )
+        connection.send_data(stream_id, RESPONSE_BODY, end_stream=True)
+        writer.write(connection.data_to_send())
+
+
+def build_settings(base_url: str, concurrency: int) -> AppSettings:
+    return AppSettings(
+        tenant_id="benchmark",
+        client_id="benchmark",
+        authority="https://login.microsoftonline.com/benchmark",
+        scopes=("https://graph.microsoft.com/.default",),
+        base_url=base_url,
+        chat_path="/copilot/conversations",
+        search_path="/copilot/search",
+        retrieval_path="/copilot/retrieval",
+        batch_path="/$batch",
+        timeout_seconds=30,
+        retry_attempts=0,
+        token_cache_path="",
+        auth_flow="interactive",
+        redirect_uri="http://localhost",
+        rate_limit_per_second=0.0,
+        initial_concurrency=concurrency,
+        max_concurrency=concurrency,
+    )
+
+
+def run_load(client: HttpClient, requests_count: int, concurrency: int) -> float:
+    payload = {"query": "quarterly revenue"}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(client.post_json, "token", "/copilot/search", payload)
+            for _ in range(requests_count)
+        ]
+        for future in futures:
+            future.result()
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare the requests (HTTP/1.1) and httpx (HTTP/2) transports against local stand-in servers."
+    )
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Server think time per request.")
+    parser.add_argument(
+        "--handshake-ms",
+        type=float,
+        default=30.0,
+        help="Extra delay per new connection, standing in for TCP+TLS setup to a remote host.",
+    )
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    handshake = args.handshake_ms / 1000
+
+    http1_server = Http1StandIn(latency, handshake)
+    threading.Thread(target=http1_server.serve_forever, daemon=True).start()
+    http1_client = HttpClient(build_settings(f"http://127.0.0.1:{http1_server.server_port}", args.concurrency))
+    http1_seconds = run_load(http1_client, args.requests, args.concurrency)
+    http1_client.close()
+    http1_server.shutdown()
+
+    http2_server = Http2StandIn(latency, handshake)
+    http2_server.start()
+    http2_client = HttpClient(
+        build_settings(f"http://127.0.0.1:{http2_server.port}", args.concurrency),
+        session=Http2Session(max_connections=args.concurrency, prior_knowledge=True),
+    )
+    http2_seconds = run_load(http2_client, args.requests, args.concurrency)
+    http2_client.close()
+
+    print(
+        f"{args.requests} POSTs, {args.concurrency} threads, "
+        f"{args.latency_ms:g} ms server latency, {args.handshake_ms:g} ms per new connection"
+    )
+    print(f"{'transport':22} {'connections':>12} {'total s':>9} {'req/s':>9}")
+    for name, connections, seconds in (
+        ("requests (HTTP/1.1)", http1_server.connections, http1_seconds),
+        ("httpx (HTTP/2)", http2_server.connections, http2_seconds),
+    ):
+        print(f"{name:22} {connections:12} {seconds:9.2f} {args.requests / seconds:9.0f}")
+
+
+if __name__ == "__main__":
+    main()
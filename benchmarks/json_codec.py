@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import sys
+import time
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from copilot_client import codec  # noqa: E402
+
+
+def search_page(hit_count: int = 100) -> dict[str, Any]:
+    return {
+        "@odata.context": "https://graph.microsoft.com/beta/$metadata#microsoft.graph.copilot.searchResponse",
+        "totalCount": 1000,
+        "searchHits": [
+            {
+                "webUrl": f"https://contoso.sharepoint.com/sites/Finance/Shared Documents/Report {index}.docx",
+                "preview": "Quarterly revenue grew across all regions with notable gains in EMEA. " * 8,
+                "resourceType": "driveItem",
+                "resourceMetadata": {
+                    "title": f"Report {index}",
+                    "author": "Adele Vance",
+                    "lastModifiedDateTime": "2026-09-30T12:34:56Z",
+                },
+            }
+            for index in range(hit_count)
+        ],
+        "@odata.nextLink": "https://graph.microsoft.com/beta/copilot/search?$skiptoken=abc123",
+    }
+
+
+def retrieval_page(hit_count: int = 25) -> dict[str, Any]:
+    return {
+        "retrievalHits": [
+            {
+                "webUrl": f"https://contoso.sharepoint.com/sites/HR/Policies/Policy{index}.pdf",
+                "resourceType": "listItem",
+                "sensitivityLabel": {"sensitivityLabelId": "f71f1f74", "displayName": "General"},
+                "extracts": [
+                    {
+                        "text": "Employees may carry over up to five days of unused leave into the next year. " * 20,
+                        "relevanceScore": 0.87,
+                    }
+                    for _ in range(3)
+                ],
+            }
+            for index in range(hit_count)
+        ]
+    }
+
+
+def chat_stream_event(message_count: int = 2) -> dict[str, Any]:
+    return {
+        "id": "0d110e7e-2b7e-4270-a899-fd2af6fde333",
+        "createdDateTime": "2026-10-01T08:00:00Z",
+        "state": "active",
+        "turnCount": 1,
+        "messages": [
+            {
+                "@odata.type": "#microsoft.graph.copilotConversationResponseMessage",
+                "id": f"message-{index}",
+                "text": "Here is a summary of the latest project status across your team. " * 30,
+                "attributions": [
+                    {"attributionType": "citation", "providerDisplayName": "Document", "seeMoreWebUrl": "https://x"}
+                    for _ in range(5)
+                ],
+            }
+            for index in range(message_count)
+        ],
+    }
+
+
+def measure(function: Callable[[], Any], iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - started) / iterations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare stdlib json with the active copilot_client codec.")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"active codec backend: {codec.BACKEND}")
+    if codec.BACKEND == "json":
+        print("orjson is not installed; both columns use the standard library.")
+
+    payloads = {
+        "search page (100 hits)": search_page(),
+        "retrieval page (25 hits)": retrieval_page(),
+        "chat stream event": chat_stream_event(),
+    }
+
+    print(f"{'payload':28} {'operation':14} {'stdlib µs':>12} {'codec µs':>12} {'speedup':>9}")
+    for name, payload in payloads.items():
+        encoded = json.dumps(payload).encode("utf-8")
+        cases = {
+            "loads": (lambda: json.loads(encoded), lambda: codec.loads(encoded)),
+            "dumps": (lambda: json.dumps(payload).encode("utf-8"), lambda: codec.dumps(payload)),
+            "dumps indent=2": (lambda: json.dumps(payload, indent=2), lambda: codec.dumps_pretty(payload)),
+        }
+        for operation, (stdlib_call, codec_call) in cases.items():
+            stdlib_seconds = measure(stdlib_call, args.iterations)
+            codec_seconds = measure(codec_call, args.iterations)
+            print(
+                f"{name:28} {operation:14} {stdlib_seconds * 1e6:12.1f} {codec_seconds * 1e6:12.1f}"
+                f" {stdlib_seconds / codec_seconds:8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
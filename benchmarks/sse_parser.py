@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import argparse
+import io
+import json
+from pathlib import Path
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from copilot_client.http import HttpClient  # noqa: E402
+from copilot_client.sse import SseDecoder  # noqa: E402
+
+
+def build_stream(event_count: int, text_size: int) -> bytes:
+    parts = []
+    text = ""
+    for index in range(event_count):
+        text += "lorem ipsum "[: max(1, text_size // event_count)]
+        event = {
+            "id": "conversation-id",
+            "state": "active",
+            "messages": [{"id": str(index), "text": text}],
+        }
+        parts.append(f"id: {index}\ndata: {json.dumps(event)}\n\n".encode("utf-8"))
+    return b"".join(parts)
+
+
+def build_response(body: bytes, chunk_size: int) -> requests.Response:
+    response = requests.models.Response()
+    response.status_code = 200
+    response.encoding = "utf-8"
+    response.raw = io.BufferedReader(io.BytesIO(body), buffer_size=chunk_size)
+    return response
+
+
+def legacy_parse(body: bytes, chunk_size: int) -> int:
+    response = build_response(body, chunk_size)
+    count = 0
+    data_lines: list[str] = []
+    for raw_line in response.iter_lines(chunk_size=chunk_size, decode_unicode=True):
+        line = (raw_line or "").strip()
+        if not line:
+            if data_lines:
+                event_payload = "\n".join(data_lines).strip()
+                data_lines.clear()
+                if event_payload:
+                    HttpClient._parse_sse_event(event_payload)
+                    count += 1
+            continue
+        if line.startswith("data:"):
+            data_lines.append(line[5:].strip())
+    return count
+
+
+def decoder_parse(body: bytes, chunk_size: int) -> int:
+    response = build_response(body, chunk_size)
+    count = 0
+    decoder = SseDecoder()
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        for event in decoder.feed(chunk):
+            HttpClient._parse_sse_event(event.data)
+            count += 1
+    for event in decoder.flush():
+        HttpClient._parse_sse_event(event.data)
+        count += 1
+    return count
+
+
+def measure(parse, body: bytes, chunk_size: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parse(body, chunk_size)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the line-based and byte-level SSE parsers.")
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--text-size", type=int, default=20000)
+    parser.add_argument("--chunk-size", type=int, default=512)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    body = build_stream(args.events, args.text_size)
+    assert legacy_parse(body, args.chunk_size) == decoder_parse(body, args.chunk_size) == args.events
+
+    legacy_seconds = measure(legacy_parse, body, args.chunk_size, args.repeat)
+    decoder_seconds = measure(decoder_parse, body, args.chunk_size, args.repeat)
+
+    print(f"stream: {len(body) / 1024:.1f} KiB, {args.events} events, {args.chunk_size} B chunks")
+    print(f"iter_lines parser : {legacy_seconds * 1000:8.2f} ms")
+    print(f"SseDecoder        : {decoder_seconds * 1000:8.2f} ms")
+    print(f"speedup           : {legacy_seconds / decoder_seconds:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import multiprocessing
+import os
+from pathlib import Path
+import sys
+import tempfile
+import time
+from typing import Any
+
+from msal_extensions import CrossPlatLock, FilePersistence, PersistedTokenCache
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from copilot_client.token_persistence import BatchedPersistedTokenCache  # noqa: E402
+
+
+def encode_segment(value: dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def token_event(worker: int, index: int) -> dict[str, Any]:
+    return {
+        "client_id": "benchmark-client",
+        "scope": ["https://graph.microsoft.com/.default"],
+        "token_endpoint": "https://login.microsoftonline.com/benchmark/oauth2/v2.0/token",
+        "response": {
+            "access_token": f"access-token-{worker}-{index}",
+            "expires_in": 3600,
+            "refresh_token": f"refresh-token-{worker}",
+            "token_type": "Bearer",
+            "client_info": encode_segment({"uid": f"user-{worker}", "utid": "benchmark"}),
+        },
+        "params": {},
+        "data": {},
+    }
+
+
+def run_worker(mode: str, cache_path: str, tokens: int, lookups: int, worker: int, results: Any) -> None:
+    lock_wait = [0.0, 0]
+    original_enter = CrossPlatLock.__enter__
+
+    def timed_enter(lock: CrossPlatLock) -> Any:
+        started = time.perf_counter()
+        entered = original_enter(lock)
+        lock_wait[0] += time.perf_counter() - started
+        lock_wait[1] += 1
+        return entered
+
+    CrossPlatLock.__enter__ = timed_enter
+
+    persistence = FilePersistence(cache_path)
+    if mode == "batched":
+        cache = BatchedPersistedTokenCache(persistence, flush_delay_seconds=0.05)
+    else:
+        cache = PersistedTokenCache(persistence)
+
+    started = time.perf_counter()
+    for index in range(tokens):
+        cache.add(token_event(worker, index))
+        for _ in range(lookups):
+            cache.search(cache.CredentialType.ACCESS_TOKEN)
+    if mode == "batched":
+        cache.flush()
+    results.put((time.perf_counter() - started, lock_wait[0], lock_wait[1]))
+
+
+def run_mode(mode: str, processes: int, tokens: int, lookups: int) -> tuple[float, float, int]:
+    with tempfile.TemporaryDirectory() as directory:
+        cache_path = os.path.join(directory, "token_cache.bin")
+        results: Any = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=run_worker, args=(mode, cache_path, tokens, lookups, worker, results))
+            for worker in range(processes)
+        ]
+        for process in workers:
+            process.start()
+        measurements = [results.get(timeout=300) for _ in workers]
+        for process in workers:
+            process.join()
+
+    wall_seconds = max(measurement[0] for measurement in measurements)
+    lock_wait_seconds = sum(measurement[1] for measurement in measurements)
+    lock_acquisitions = sum(measurement[2] for measurement in measurements)
+    return wall_seconds, lock_wait_seconds, lock_acquisitions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare cross-process lock contention of the locked and batched token cache persistence."
+    )
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--tokens", type=int, default=50, help="Token writes per process.")
+    parser.add_argument("--lookups", type=int, default=10, help="Cache lookups after each token write.")
+    args = parser.parse_args()
+
+    print(f"{args.tokens} token writes and {args.tokens * args.lookups} lookups per process")
+    print(f"{'processes':>9} {'mode':8} {'wall s':>8} {'lock waits':>11} {'lock wait s':>12}")
+    for processes in args.processes:
+        for mode in ("locked", "batched"):
+            wall_seconds, lock_wait_seconds, lock_acquisitions = run_mode(mode, processes, args.tokens, args.lookups)
+            print(f"{processes:9} {mode:8} {wall_seconds:8.2f} {lock_acquisitions:11} {lock_wait_seconds:12.3f}")
+
+
+if __name__ == "__main__":
+    main()
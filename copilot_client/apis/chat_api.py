@@ -1,59 +1,230 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 import os
+import threading
 from typing import Any, Callable
 
 from copilot_client.config import AppSettings
-from copilot_client.http import HttpClient
+from copilot_client.conversation_pool import ConversationPool, ConversationPoolStats
+from copilot_client.deadline import Deadline
+from copilot_client.http import ApiHttpError, HttpClient, StreamInterruptedError
 
 
 class ChatApi:
-    def __init__(self, settings: AppSettings, http_client: HttpClient):
+    def __init__(
+        self,
+        settings: AppSettings,
+        http_client: HttpClient,
+        account_for_token: Callable[[str], str | None] | None = None,
+    ):
         self._settings = settings
         self._http_client = http_client
-        self._conversation_id: str | None = None
+        self._account_for_token = account_for_token
+        self._conversations = ConversationPool(
+            max_idle=settings.conversation_pool_size,
+            idle_timeout_seconds=settings.conversation_idle_seconds,
+        )
+        self._refill_executor: ThreadPoolExecutor | None = None
+        self._refill_lock = threading.Lock()
 
     def send(
         self,
         token: str,
         payload: dict[str, Any],
         on_stream_event: Callable[[dict[str, Any]], None] | None = None,
+        deadline: Deadline | None = None,
+        continue_conversation: bool = False,
     ) -> dict[str, Any]:
         use_stream = bool(payload.get("useStream", False))
-        if not self._conversation_id:
-            created = self._http_client.post_json(token, self._settings.chat_path, {})
-            self._conversation_id = str(created.get("id", "")).strip() or None
-            if not self._conversation_id:
-                raise RuntimeError("Chat API did not return a conversation id")
-
         normalized_payload = self._normalize_payload(payload)
+
+        conversation_id, reused = self.checkout_conversation(token, deadline, continuing=continue_conversation)
+        try:
+            try:
+                result = self._send_to_conversation(
+                    token, conversation_id, normalized_payload, use_stream, on_stream_event, deadline
+                )
+            except ApiHttpError as exc:
+                # A pooled conversation may have expired server-side; retry once on a fresh one.
+                if not reused or exc.status_code != 404:
+                    raise
+                self.return_conversation(conversation_id, reusable=False)
+                conversation_id, _ = self.checkout_conversation(
+                    token, deadline, continuing=continue_conversation, reuse=False
+                )
+                result = self._send_to_conversation(
+                    token, conversation_id, normalized_payload, use_stream, on_stream_event, deadline
+                )
+        except BaseException:
+            self.return_conversation(conversation_id, reusable=False)
+            raise
+        # A conversation now holds this chat's turns, so it goes back only for the caller continuing it.
+        self.return_conversation(conversation_id, reusable=continue_conversation)
+        return result
+
+    def _send_to_conversation(
+        self,
+        token: str,
+        conversation_id: str,
+        normalized_payload: dict[str, Any],
+        use_stream: bool,
+        on_stream_event: Callable[[dict[str, Any]], None] | None,
+        deadline: Deadline | None,
+    ) -> dict[str, Any]:
         if use_stream:
-            stream_path = f"{self._settings.chat_path}/{self._conversation_id}/chatOverStream"
-            stream_events = self._http_client.post_sse_json(
-                token,
-                stream_path,
-                normalized_payload,
-                on_event=on_stream_event,
-            )
+            stream_path = f"{self._settings.chat_path}/{conversation_id}/chatOverStream"
+            try:
+                stream_events = self._http_client.post_sse_json(
+                    token,
+                    stream_path,
+                    normalized_payload,
+                    on_event=on_stream_event,
+                    deadline=deadline,
+                )
+            except StreamInterruptedError as exc:
+                stream_events = self._recover_interrupted_stream(
+                    token, conversation_id, exc, on_stream_event, deadline
+                )
             final_conversation = stream_events[-1] if stream_events else {}
             return {
                 "streamEvents": stream_events,
                 "finalConversation": final_conversation,
             }
 
-        chat_path = f"{self._settings.chat_path}/{self._conversation_id}/chat"
-        return self._http_client.post_json(token, chat_path, normalized_payload)
+        chat_path = f"{self._settings.chat_path}/{conversation_id}/chat"
+        return self._http_client.post_json(token, chat_path, normalized_payload, deadline=deadline)
+
+    def checkout_conversation(
+        self,
+        token: str,
+        deadline: Deadline | None = None,
+        continuing: bool = False,
+        reuse: bool = True,
+    ) -> tuple[str, bool]:
+        owner = self._conversation_owner(token)
+        checked_out = self._conversations.checkout(
+            owner,
+            lambda: self._create_conversation(token, deadline),
+            continuing=continuing,
+            reuse=reuse,
+        )
+        self._schedule_refill(token, owner)
+        return checked_out
+
+    def checkout_conversations(self, token: str, count: int, deadline: Deadline | None = None) -> list[str]:
+        # Conversations the pool cannot supply are created concurrently, bounded like $batch dispatch.
+        workers = max(1, min(count, self._settings.batch_max_parallel))
+        conversation_ids: list[str] = []
+        error: Exception | None = None
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="copilot-conversation") as executor:
+            futures = [executor.submit(self.checkout_conversation, token, deadline) for _ in range(count)]
+            for future in futures:
+                try:
+                    conversation_ids.append(future.result()[0])
+                except Exception as exc:
+                    error = error or exc
+        if error is not None:
+            for conversation_id in conversation_ids:
+                self.return_conversation(conversation_id, reusable=False)
+            raise error
+        return conversation_ids
+
+    def return_conversation(self, conversation_id: str, reusable: bool = True) -> None:
+        if reusable:
+            self._conversations.checkin(conversation_id)
+        else:
+            self._conversations.discard(conversation_id)
+
+    def precreate_conversations(self, token: str, count: int | None = None, deadline: Deadline | None = None) -> int:
+        owner = self._conversation_owner(token)
+        missing = self._conversations.max_idle - self._conversations.idle_count(owner)
+        count = missing if count is None else min(count, missing)
+        for _ in range(max(0, count)):
+            self._conversations.add(owner, self._create_conversation(token, deadline))
+        return max(0, count)
+
+    def _schedule_refill(self, token: str, owner: str) -> None:
+        # A fresh conversation taken from the pool is replaced off the request path, so a warmed pool
+        # stays warm across sequential chats instead of draining after the first one.
+        ticket = self._conversations.start_refill(owner)
+        if ticket is None:
+            return
+        with self._refill_lock:
+            if self._refill_executor is None:
+                self._refill_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="copilot-refill")
+            executor = self._refill_executor
+        executor.submit(self._refill, token, owner, ticket)
 
-    def build_batch_request(self, token: str, request_id: str, payload: dict[str, Any]) -> dict[str, Any]:
-        if not self._conversation_id:
-            created = self._http_client.post_json(token, self._settings.chat_path, {})
-            self._conversation_id = str(created.get("id", "")).strip() or None
-            if not self._conversation_id:
-                raise RuntimeError("Chat API did not return a conversation id")
+    def _refill(self, token: str, owner: str, ticket: int) -> None:
+        conversation_id: str | None = None
+        try:
+            conversation_id = self._create_conversation(token)
+        except Exception:
+            # Best effort: the next chat creates its conversation on demand instead.
+            pass
+        finally:
+            self._conversations.finish_refill(owner, ticket, conversation_id)
 
+    def close(self) -> None:
+        # Waits for replacements already being created, so they do not outlive the HTTP session.
+        with self._refill_lock:
+            executor, self._refill_executor = self._refill_executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def reset_conversations(self) -> None:
+        self._conversations.clear()
+
+    def conversation_pool_stats(self) -> ConversationPoolStats:
+        return self._conversations.stats()
+
+    def _conversation_owner(self, token: str) -> str:
+        # Conversations are private to the account that created them. Without an account lookup the
+        # token itself is the key, which never hands one identity's conversation to another.
+        if self._account_for_token is not None:
+            account_id = self._account_for_token(token)
+            if account_id:
+                return account_id
+        return token
+
+    def _create_conversation(self, token: str, deadline: Deadline | None = None) -> str:
+        created = self._http_client.post_json(token, self._settings.chat_path, {}, deadline=deadline)
+        conversation_id = str(created.get("id", "")).strip()
+        if not conversation_id:
+            raise RuntimeError("Chat API did not return a conversation id")
+        return conversation_id
+
+    def _recover_interrupted_stream(
+        self,
+        token: str,
+        conversation_id: str,
+        interrupted: StreamInterruptedError,
+        on_stream_event: Callable[[dict[str, Any]], None] | None,
+        deadline: Deadline | None = None,
+    ) -> list[dict[str, Any]]:
+        conversation_path = f"{self._settings.chat_path}/{conversation_id}"
+        try:
+            conversation_state = self._http_client.get_json(token, conversation_path, deadline=deadline)
+        except ApiHttpError as exc:
+            raise interrupted from exc
+
+        if not conversation_state:
+            raise interrupted
+
+        if on_stream_event is not None:
+            on_stream_event(conversation_state)
+        return [*interrupted.events, conversation_state]
+
+    def build_batch_request(
+        self,
+        conversation_id: str,
+        request_id: str,
+        payload: dict[str, Any],
+    ) -> dict[str, Any]:
         normalized_payload = self._normalize_payload(payload)
-        chat_path = f"{self._settings.chat_path}/{self._conversation_id}/chat"
+        chat_path = f"{self._settings.chat_path}/{conversation_id}/chat"
         return {
             "id": request_id,
             "method": "POST",
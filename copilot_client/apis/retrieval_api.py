@@ -3,7 +3,9 @@ from __future__ import annotations
 from typing import Any
 
 from copilot_client.config import AppSettings
+from copilot_client.deadline import Deadline
 from copilot_client.http import HttpClient
+from copilot_client.json_stream import StreamedJsonArray
 
 
 class RetrievalApi:
@@ -15,8 +17,27 @@ class RetrievalApi:
     def retrieval_path(self) -> str:
         return self._settings.retrieval_path
 
-    def retrieve(self, token: str, payload: dict[str, Any]) -> dict[str, Any]:
-        return self._http_client.post_json(token, self._settings.retrieval_path, payload)
+    def retrieve(
+        self,
+        token: str,
+        payload: dict[str, Any],
+        deadline: Deadline | None = None,
+    ) -> dict[str, Any]:
+        return self._http_client.post_json(token, self._settings.retrieval_path, payload, deadline=deadline)
+
+    def retrieve_streamed(
+        self,
+        token: str,
+        payload: dict[str, Any],
+        deadline: Deadline | None = None,
+    ) -> StreamedJsonArray:
+        return self._http_client.post_json_streamed(
+            token,
+            self._settings.retrieval_path,
+            payload,
+            array_key="retrievalHits",
+            deadline=deadline,
+        )
 
     @staticmethod
     def build_batch_request(request_id: str, payload: dict[str, Any], retrieval_path: str) -> dict[str, Any]:
@@ -1,43 +1,127 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+import time
 from typing import Any
 from urllib.parse import urlparse
 
+import requests
+
+from copilot_client.batching import (
+    chunk_requests,
+    failed_chunk_responses,
+    order_responses,
+    resubmittable,
+    retryable_items,
+)
 from copilot_client.config import AppSettings
+from copilot_client.deadline import Deadline, DeadlineExceededError
 from copilot_client.http import ApiHttpError, HttpClient
+from copilot_client.json_stream import StreamedJsonArray
+from copilot_client.retry import RetryPolicy
 
 
 class SearchApi:
     def __init__(self, settings: AppSettings, http_client: HttpClient):
         self._settings = settings
         self._http_client = http_client
+        self._retry_policy = RetryPolicy.from_settings(settings)
 
     @property
     def search_path(self) -> str:
         return self._settings.search_path
 
-    def search(self, token: str, payload: dict[str, Any]) -> dict[str, Any]:
-        return self._http_client.post_json(token, self._settings.search_path, payload)
+    def search(
+        self,
+        token: str,
+        payload: dict[str, Any],
+        deadline: Deadline | None = None,
+    ) -> dict[str, Any]:
+        return self._http_client.post_json(token, self._settings.search_path, payload, deadline=deadline)
+
+    def search_streamed(
+        self,
+        token: str,
+        payload: dict[str, Any],
+        deadline: Deadline | None = None,
+    ) -> StreamedJsonArray:
+        return self._http_client.post_json_streamed(
+            token,
+            self._settings.search_path,
+            payload,
+            array_key="searchHits",
+            deadline=deadline,
+        )
 
-    def search_next_page(self, token: str, next_link: str) -> dict[str, Any]:
+    def search_next_page(
+        self,
+        token: str,
+        next_link: str,
+        deadline: Deadline | None = None,
+    ) -> dict[str, Any]:
         next_url = next_link.strip()
         if not next_url:
             raise ValueError("Search next link is required")
 
         if next_url.startswith("/"):
-            return self._http_client.post_json(token, next_url, {})
+            return self._http_client.post_json(token, next_url, {}, deadline=deadline)
 
         parsed = urlparse(next_url)
         if parsed.scheme not in ("http", "https"):
             raise ValueError("Invalid search next link")
 
         try:
-            return self._http_client.post_absolute_json(token, next_url, {})
+            return self._http_client.post_absolute_json(token, next_url, {}, deadline=deadline)
         except ApiHttpError as exc:
             if exc.status_code in (400, 404, 405):
-                return self._http_client.get_absolute_json(token, next_url)
+                return self._http_client.get_absolute_json(token, next_url, deadline=deadline)
             raise
 
+    def _retry_failed_items(
+        self,
+        token: str,
+        requests_payload: list[dict[str, Any]],
+        result: dict[str, Any],
+        deadline: Deadline | None,
+    ) -> dict[str, Any]:
+        requests_by_id = {str(request["id"]): request for request in requests_payload}
+        responses = {str(response.get("id")): response for response in result.get("responses", [])}
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            retry_ids, delay = retryable_items(
+                responses.values(),
+                self._retry_policy,
+                attempt,
+                time.monotonic() - started,
+            )
+            retry_ids = [request_id for request_id in retry_ids if request_id in requests_by_id]
+            if not retry_ids or (deadline is not None and not deadline.can_wait(delay)):
+                break
+
+            time.sleep(delay)
+            retry_payload = {"requests": resubmittable([requests_by_id[request_id] for request_id in retry_ids])}
+            try:
+                retried = self._http_client.post_json(
+                    token, self._settings.batch_path, retry_payload, deadline=deadline
+                )
+            except (ApiHttpError, DeadlineExceededError, requests.exceptions.RequestException):
+                # The first pass already succeeded; items still failing keep their last response.
+                break
+            for response in retried.get("responses", []):
+                responses[str(response.get("id"))] = response
+
+        return {**result, "responses": list(responses.values())}
+
+    @staticmethod
+    def _chunk_failure_status(exc: Exception) -> int:
+        if isinstance(exc, ApiHttpError) and exc.status_code:
+            return exc.status_code
+        if isinstance(exc, DeadlineExceededError):
+            return 504
+        return 502
+
     @staticmethod
     def build_batch_request(request_id: str, payload: dict[str, Any], search_path: str) -> dict[str, Any]:
         return {
@@ -48,6 +132,44 @@ class SearchApi:
             "body": payload,
         }
 
-    def run_graph_batch(self, token: str, requests_payload: list[dict[str, Any]]) -> dict[str, Any]:
+    def run_graph_batch(
+        self,
+        token: str,
+        requests_payload: list[dict[str, Any]],
+        deadline: Deadline | None = None,
+    ) -> dict[str, Any]:
         payload = {"requests": requests_payload}
-        return self._http_client.post_json(token, self._settings.batch_path, payload)
+        result = self._http_client.post_json(token, self._settings.batch_path, payload, deadline=deadline)
+        return self._retry_failed_items(token, requests_payload, result, deadline)
+
+    def run_graph_batches(
+        self,
+        token: str,
+        requests_payload: list[dict[str, Any]],
+        deadline: Deadline | None = None,
+    ) -> dict[str, Any]:
+        chunks = chunk_requests(requests_payload)
+        failures: list[Exception] = []
+
+        def run_chunk(chunk: list[dict[str, Any]]) -> list[dict[str, Any]]:
+            try:
+                return self.run_graph_batch(token, chunk, deadline=deadline).get("responses", [])
+            except (ApiHttpError, DeadlineExceededError, requests.exceptions.RequestException) as exc:
+                failures.append(exc)
+                return failed_chunk_responses(chunk, self._chunk_failure_status(exc), str(exc))
+
+        if len(chunks) <= 1:
+            results = [run_chunk(chunk) for chunk in chunks]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(self._settings.batch_max_parallel, len(chunks)),
+                thread_name_prefix="copilot-batch",
+            ) as executor:
+                results = list(executor.map(run_chunk, chunks))
+
+        # Partial results are worth returning; a run where nothing got through is a plain failure.
+        if failures and len(failures) == len(chunks):
+            raise failures[0]
+
+        responses = [response for result in results for response in result]
+        return {"responses": order_responses(requests_payload, responses)}
@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Callable
+
+import httpx
+import requests
+
+from copilot_client import codec
+from copilot_client.circuit_breaker import CircuitBreakerRegistry, CircuitBreakerState
+from copilot_client.compression import (
+    EndpointTransferStats,
+    TransferStats,
+    accept_encoding_header,
+    compress_body,
+)
+from copilot_client.config import AppSettings
+from copilot_client.deadline import Deadline
+from copilot_client.http import ApiHttpError, CircuitOpenError, HttpClient, StreamInterruptedError, StreamResume
+from copilot_client.rate_limit import EndpointLimitStats, EndpointRateLimiter
+from copilot_client.retry import RetryPolicy, server_requested_delay
+from copilot_client.sse import SseDecoder, SseEvent
+from copilot_client.transport import translate_httpx_error
+
+
+class AsyncHttpClient:
+    # The asyncio counterpart of HttpClient. Pass both clients the same rate limiter and circuit
+    # breakers to share one set of limits and breaker state between threaded and asyncio callers.
+    def __init__(
+        self,
+        settings: AppSettings,
+        max_connections: int = 100,
+        transport: httpx.AsyncBaseTransport | None = None,
+        retry_policy: RetryPolicy | None = None,
+        rate_limiter: EndpointRateLimiter | None = None,
+        circuit_breakers: CircuitBreakerRegistry | None = None,
+        throttle_listener: Callable[[str, float | None], None] | None = None,
+    ):
+        self._settings = settings
+        self._retry_policy = retry_policy or RetryPolicy.from_settings(settings)
+        self._rate_limiter = rate_limiter or EndpointRateLimiter.from_settings(settings)
+        self._circuit_breakers = circuit_breakers or CircuitBreakerRegistry.from_settings(settings)
+        self._transfer_stats = TransferStats()
+        self._throttle_listener = throttle_listener
+        self._client = httpx.AsyncClient(
+            headers={
+                "Accept": "application/json",
+                "Accept-Encoding": accept_encoding_header(settings.accept_encoding),
+                "Content-Type": "application/json",
+            },
+            timeout=settings.timeout_seconds,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            transport=transport,
+        )
+
+    async def __aenter__(self) -> "AsyncHttpClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def rate_limit_stats(self) -> list[EndpointLimitStats]:
+        return self._rate_limiter.stats()
+
+    def transfer_stats(self) -> list[EndpointTransferStats]:
+        return self._transfer_stats.snapshot()
+
+    def circuit_states(self) -> list[CircuitBreakerState]:
+        return self._circuit_breakers.states()
+
+    async def post_json(
+        self,
+        token: str,
+        path: str,
+        payload: dict[str, Any],
+        deadline: Deadline | None = None,
+    ) -> dict[str, Any]:
+        url = f"{self._settings.base_url}{path}"
+        return await self.post_absolute_json(token, url, payload, deadline=deadline)
+
+    async def post_absolute_json(
+        self,
+        token: str,
+        url: str,
+        payload: dict[str, Any],
+        deadline: Deadline | None = None,
+    ) -> dict[str, Any]:
+        headers = {"Authorization": f"Bearer {token}"}
+        body = self._encode_body(url, payload, headers)
+        response = await self._send_with_retry("POST", url, deadline, headers=headers, content=body)
+        self._record_response(url, response, len(response.content))
+        if not response.content:
+            return {}
+        return codec.loads(response.content)
+
+    async def get_json(
+        self,
+        token: str,
+        path: str,
+        params: dict[str, Any] | None = None,
+        deadline: Deadline | None = None,
+    ) -> dict[str, Any]:
+        url = f"{self._settings.base_url}{path}"
+        return await self.get_absolute_json(token, url, params, deadline=deadline)
+
+    async def get_absolute_json(
+        self,
+        token: str,
+        url: str,
+        params: dict[str, Any] | None = None,
+        deadline: Deadline | None = None,
+    ) -> dict[str, Any]:
+        headers = {"Authorization": f"Bearer {token}"}
+        response = await self._send_with_retry("GET", url, deadline, headers=headers, params=params)
+        self._record_response(url, response, len(response.content))
+        if not response.content:
+            return {}
+        return codec.loads(response.content)
+
+    async def post_sse_json(
+        self,
+        token: str,
+        path: str,
+        payload: dict[str, Any],
+        deadline: Deadline | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        url = f"{self._settings.base_url}{path}"
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "text/event-stream",
+            "Content-Type": "application/json",
+        }
+
+        body = self._encode_body(url, payload, headers)
+        resume = StreamResume()
+        events: list[dict[str, Any]] = []
+        server_retry_delay: float | None = None
+        try:
+            while True:
+                try:
+                    response = await self._send_with_retry(
+                        "POST",
+                        url,
+                        deadline,
+                        stream=True,
+                        headers=headers,
+                        content=body,
+                    )
+                except (ApiHttpError, requests.exceptions.RequestException) as exc:
+                    if not resume.reconnects:
+                        raise
+                    raise StreamInterruptedError(f"Stream interrupted and reconnect failed: {exc}") from exc
+
+                decoder = SseDecoder()
+                received_bytes = 0
+                try:
+                    async for chunk in _iter_chunks(response):
+                        received_bytes += len(chunk)
+                        for sse_event in resume.fresh(decoder.feed(chunk)):
+                            event = self._to_event_payload(sse_event)
+                            if event is not None:
+                                events.append(event)
+                                yield event
+                    for sse_event in resume.fresh(decoder.flush()):
+                        event = self._to_event_payload(sse_event)
+                        if event is not None:
+                            events.append(event)
+                            yield event
+                    return
+                except (requests.exceptions.ChunkedEncodingError, requests.exceptions.ConnectionError) as exc:
+                    if decoder.retry is not None:
+                        server_retry_delay = decoder.retry / 1000
+                    if resume.last_event_id is None or resume.reconnects >= self._settings.stream_reconnect_attempts:
+                        raise StreamInterruptedError(f"Stream interrupted: {exc}") from exc
+                finally:
+                    self._record_response(url, response, received_bytes)
+                    await response.aclose()
+
+                resume.reconnect()
+                headers["Last-Event-ID"] = resume.last_event_id
+                reconnect_delay = server_retry_delay
+                if reconnect_delay is None:
+                    reconnect_delay = self._retry_policy.backoff_delay(resume.reconnects)
+                if deadline is not None and not deadline.can_wait(reconnect_delay):
+                    raise StreamInterruptedError(
+                        "Stream interrupted and the request deadline leaves no time to reconnect"
+                    )
+                await asyncio.sleep(reconnect_delay)
+        except StreamInterruptedError as exc:
+            exc.events = events
+            raise
+
+    def _encode_body(self, url: str, payload: dict[str, Any], headers: dict[str, str]) -> bytes:
+        body = codec.dumps(payload)
+        wire_body = body
+        encoding = self._settings.request_compression
+        if encoding != "none" and len(body) >= self._settings.request_compression_min_bytes:
+            wire_body = compress_body(body, encoding)
+            headers["Content-Encoding"] = encoding
+        self._transfer_stats.record_request(
+            self._rate_limiter.resolve_endpoint(url),
+            len(body),
+            len(wire_body),
+        )
+        return wire_body
+
+    def _record_response(self, url: str, response: httpx.Response, body_bytes: int) -> None:
+        self._transfer_stats.record_response(
+            self._rate_limiter.resolve_endpoint(url),
+            body_bytes,
+            response.num_bytes_downloaded,
+        )
+
+    async def _send_with_retry(
+        self,
+        method: str,
+        url: str,
+        deadline: Deadline | None = None,
+        stream: bool = False,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        endpoint = self._rate_limiter.resolve_endpoint(url)
+        breaker = self._circuit_breakers.get(endpoint)
+        if deadline is not None:
+            deadline.timeout(self._settings.timeout_seconds)
+        if not breaker.allow_request():
+            raise CircuitOpenError(endpoint)
+
+        # As in HttpClient, the breaker sees one outcome per logical call.
+        failed: bool | None = None
+        started = time.monotonic()
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                async with self._rate_limiter.async_slot(
+                    url, deadline.remaining() if deadline is not None else None
+                ) as slot:
+                    # Each attempt's timeout comes out of the deadline, after waiting for the slot.
+                    timeout: float = self._settings.timeout_seconds
+                    if deadline is not None:
+                        timeout = deadline.timeout(timeout)
+                    request = self._client.build_request(method, url, timeout=timeout, **kwargs)
+                    try:
+                        response = await self._client.send(request, stream=stream)
+                    except httpx.HTTPError as exc:
+                        failed = True
+                        raise translate_httpx_error(exc) from exc
+                    slot.status_code = response.status_code
+                    if stream and response.is_success:
+                        # A streamed body is still in flight, so its permit is released when it closes.
+                        slot.hold()
+                        _release_on_aclose(response, slot.release)
+                    elif stream:
+                        await response.aread()
+                        await response.aclose()
+
+                failed = response.status_code >= 500
+                if response.status_code == 429 and self._throttle_listener is not None:
+                    authorization = str((kwargs.get("headers") or {}).get("Authorization", ""))
+                    self._throttle_listener(
+                        authorization.removeprefix("Bearer "),
+                        server_requested_delay(response.headers),
+                    )
+
+                if response.is_success:
+                    return response
+
+                delay = self._retry_policy.next_delay(
+                    attempt,
+                    response.status_code,
+                    response.headers,
+                    time.monotonic() - started,
+                )
+                if delay is None or (deadline is not None and not deadline.can_wait(delay)):
+                    raise self._build_error(response)
+
+                await asyncio.sleep(delay)
+        finally:
+            if failed is None:
+                breaker.release()
+            elif failed:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+    @staticmethod
+    def _to_event_payload(sse_event: SseEvent) -> dict[str, Any] | None:
+        event_payload = sse_event.data.strip()
+        if not event_payload:
+            return None
+        return HttpClient._parse_sse_event(event_payload)
+
+    @staticmethod
+    def _build_error(response: httpx.Response) -> ApiHttpError:
+        message = response.text[:500]
+        return ApiHttpError(
+            status_code=response.status_code,
+            message=f"HTTP {response.status_code}: {message}",
+        )
+
+
+async def _iter_chunks(response: httpx.Response) -> AsyncIterator[bytes]:
+    try:
+        async for chunk in response.aiter_bytes():
+            yield chunk
+    except httpx.HTTPError as exc:
+        raise translate_httpx_error(exc, streaming=True) from exc
+
+
+def _release_on_aclose(response: httpx.Response, release: Callable[[], None]) -> None:
+    aclose = response.aclose
+
+    async def aclose_and_release() -> None:
+        try:
+            await aclose()
+        finally:
+            release()
+
+    response.aclose = aclose_and_release
@@ -1,6 +1,11 @@
 from __future__ import annotations
 
+import base64
+import json
 import os
+import sys
+import threading
+import time
 from typing import Any
 
 import msal
@@ -10,8 +15,15 @@ from msal_extensions import (
     PersistedTokenCache,
 )
 
+from copilot_client.coalescing import SingleFlight
 from copilot_client.config import AppSettings
+from copilot_client.identity_pool import IdentityPool, IdentityStats
 from copilot_client.models import AuthState
+from copilot_client.token_cache import AccessTokenCache, TokenCacheStats
+from copilot_client.token_persistence import BatchedPersistedTokenCache
+
+
+REFRESH_RETRY_SECONDS = 30.0
 
 
 class AuthenticationError(RuntimeError):
@@ -19,14 +31,33 @@ class AuthenticationError(RuntimeError):
 
 
 class AuthManager:
-    def __init__(self, settings: AppSettings):
+    def __init__(
+        self,
+        settings: AppSettings,
+        app: msal.PublicClientApplication | None = None,
+        token_cache: msal.SerializableTokenCache | None = None,
+    ):
         self._settings = settings
-        self._cache = PersistedTokenCache(self._build_persistence(settings.token_cache_path))
-        self._app = msal.PublicClientApplication(
+        self._cache = token_cache if token_cache is not None else self._build_token_cache(settings)
+        self._app = app or msal.PublicClientApplication(
             client_id=settings.client_id,
             authority=settings.authority,
             token_cache=self._cache,
         )
+        self._token_cache = AccessTokenCache()
+        self._active_account: dict[str, Any] | None = None
+        self._silent_flight = SingleFlight()
+        self._refresh_timers: dict[str, threading.Timer] = {}
+        self._refresh_timer_lock = threading.Lock()
+        self._identity_pool = IdentityPool(settings.identity_selection)
+        self._pool_accounts: list[dict[str, Any]] | None = None
+
+    @staticmethod
+    def _build_token_cache(settings: AppSettings) -> msal.SerializableTokenCache:
+        persistence = AuthManager._build_persistence(settings.token_cache_path)
+        if settings.token_cache_persistence == "batched":
+            return BatchedPersistedTokenCache(persistence)
+        return PersistedTokenCache(persistence)
 
     @staticmethod
     def _build_persistence(path: str):
@@ -38,22 +69,53 @@ class AuthManager:
         except Exception:
             return FilePersistence(path)
 
+    def token_cache_stats(self) -> TokenCacheStats:
+        return self._token_cache.stats()
+
+    def identity_stats(self) -> list[IdentityStats]:
+        return self._identity_pool.stats()
+
+    def record_throttle(self, access_token: str, retry_after_seconds: float | None = None) -> None:
+        account_id = self._token_cache.account_for_token(access_token)
+        if account_id:
+            self._identity_pool.record_throttle(account_id, retry_after_seconds)
+
     def acquire_access_token(self) -> str:
-        account = self._get_first_account()
+        return self.acquire_access_token_silent() or self._acquire_token_interactively()
+
+    def acquire_access_token_silent(self) -> str | None:
+        account = self._select_account()
+        cached_token = self._token_cache.get(
+            tuple(self._settings.scopes),
+            (account or {}).get("home_account_id"),
+        )
+        if cached_token:
+            return cached_token
+
+        if account is None or self._settings.identity_selection == "first":
+            account = self._get_first_account()
         if account:
-            silent_result = self._app.acquire_token_silent(
-                scopes=list(self._settings.scopes),
-                account=account,
-            )
+            silent_result = self._acquire_token_silent(account)
             if silent_result and "access_token" in silent_result:
                 return str(silent_result["access_token"])
+        return None
 
+    def add_identity(self) -> AuthState:
+        active_account = self._active_account
+        self._acquire_token_interactively()
+        # The added identity joins the pool; it does not replace the one already in use.
+        if active_account is not None:
+            self._active_account = active_account
+        self._pool_accounts = None
+        return self.get_auth_state()
+
+    def _acquire_token_interactively(self) -> str:
         if self._settings.auth_flow == "device_code":
             return self._acquire_token_device_code()
 
         interactive_result = self._acquire_token_interactive_compatible()
         if "access_token" in interactive_result:
-            return str(interactive_result["access_token"])
+            return self._remember_token(interactive_result)
 
         message = self._get_error_message(interactive_result)
         if self._settings.auth_flow == "interactive_then_device" or "AADSTS9002327" in message:
@@ -75,10 +137,11 @@ class AuthManager:
             message = self._get_error_message(flow)
             raise AuthenticationError(f"Device code initialization failed: {message}")
 
-        print(flow.get("message", "Complete device-code sign in in your browser."))
+        # stderr, so the prompt never lands in a headless run's JSONL output on stdout.
+        print(flow.get("message", "Complete device-code sign in in your browser."), file=sys.stderr, flush=True)
         device_result = self._app.acquire_token_by_device_flow(flow)
         if "access_token" in device_result:
-            return str(device_result["access_token"])
+            return self._remember_token(device_result)
 
         message = self._get_error_message(device_result)
         raise AuthenticationError(f"Device code login failed: {message}")
@@ -100,6 +163,76 @@ class AuthManager:
                 return self._app.acquire_token_interactive(**interactive_kwargs)
             raise
 
+    def _acquire_token_silent(
+        self,
+        account: dict[str, Any],
+        force_refresh: bool = False,
+    ) -> dict[str, Any] | None:
+        def acquire() -> dict[str, Any] | None:
+            result = self._app.acquire_token_silent(
+                scopes=list(self._settings.scopes),
+                account=account,
+                force_refresh=force_refresh,
+            )
+            if result and "access_token" in result:
+                self._remember_token(result, account)
+            return result
+
+        # Concurrent cache misses (and a background refresh racing them) share one MSAL round trip.
+        return self._silent_flight.do(str(account.get("home_account_id") or ""), acquire)
+
+    def _remember_token(self, result: dict[str, Any], account: dict[str, Any] | None = None) -> str:
+        access_token = str(result["access_token"])
+        account = account or self._account_for_result(result)
+        expires_in = result.get("expires_in")
+        if account and account.get("home_account_id") and expires_in:
+            self._token_cache.put(
+                tuple(self._settings.scopes),
+                str(account["home_account_id"]),
+                access_token,
+                float(expires_in),
+            )
+            self._active_account = account
+            self._schedule_refresh(
+                account,
+                float(expires_in) * self._settings.token_refresh_fraction,
+                time.time() + float(expires_in),
+            )
+        return access_token
+
+    def _schedule_refresh(self, account: dict[str, Any], delay_seconds: float, expires_at: float) -> None:
+        if self._settings.token_refresh_fraction <= 0:
+            return
+
+        account_id = str(account["home_account_id"])
+        timer = threading.Timer(delay_seconds, self._refresh_in_background, args=(account, expires_at))
+        timer.daemon = True
+        with self._refresh_timer_lock:
+            previous = self._refresh_timers.get(account_id)
+            if previous is not None:
+                previous.cancel()
+            self._refresh_timers[account_id] = timer
+        timer.start()
+
+    def _cancel_refresh(self) -> None:
+        with self._refresh_timer_lock:
+            for timer in self._refresh_timers.values():
+                timer.cancel()
+            self._refresh_timers.clear()
+
+    def _refresh_in_background(self, account: dict[str, Any], expires_at: float) -> None:
+        with self._refresh_timer_lock:
+            if self._refresh_timers.get(str(account["home_account_id"])) is not threading.current_thread():
+                return
+
+        try:
+            result = self._acquire_token_silent(account, force_refresh=True)
+        except Exception:
+            result = None
+        # On failure keep retrying until the current token expires; after that the request path takes over.
+        if (not result or "access_token" not in result) and time.time() + REFRESH_RETRY_SECONDS < expires_at:
+            self._schedule_refresh(account, REFRESH_RETRY_SECONDS, expires_at)
+
     @staticmethod
     def _get_error_message(result: dict[str, Any] | None) -> str:
         if not result:
@@ -136,24 +269,76 @@ class AuthManager:
         )
 
     def sign_out(self) -> None:
+        self._cancel_refresh()
+        self._active_account = None
+        self._pool_accounts = None
+        self._token_cache.invalidate()
+        self._identity_pool.forget()
         accounts = self._app.get_accounts()
         for account in accounts:
             self._app.remove_account(account)
-        self._cache._persistence.save("")
+        if isinstance(self._cache, BatchedPersistedTokenCache):
+            self._cache.clear()
+            return
+        persistence = getattr(self._cache, "_persistence", None)
+        if persistence is not None:
+            persistence.save("")
 
-    def get_user_id(self) -> str | None:
-        account = self._get_first_account()
+    def get_home_account_id(self, access_token: str) -> str | None:
+        # With several identities the token, not the active account, says whose data a response is.
+        # The in-memory token cache answers that without enumerating MSAL accounts on every call.
+        return self._token_cache.account_for_token(access_token)
+
+    def get_user_id(self, access_token: str | None = None) -> str | None:
+        if access_token:
+            return _account_object_id(self.get_home_account_id(access_token) or "")
+
+        account = self._active_account or self._get_first_account()
         if not account:
             return None
 
         local_account_id = str(account.get("local_account_id") or "").strip()
         if local_account_id:
             return local_account_id
+        return _account_object_id(str(account.get("home_account_id") or ""))
 
-        home_account_id = str(account.get("home_account_id") or "").strip()
-        if home_account_id and "." in home_account_id:
-            return home_account_id.split(".", 1)[0].strip() or None
+    def _select_account(self) -> dict[str, Any] | None:
+        if self._settings.identity_selection == "first":
+            return self._active_account
 
+        accounts = self._pool_accounts
+        if accounts is None:
+            accounts = [account for account in self._app.get_accounts() if account.get("home_account_id")]
+            self._pool_accounts = accounts
+        if not accounts:
+            return None
+
+        selected_id = self._identity_pool.select([str(account["home_account_id"]) for account in accounts])
+        return next(account for account in accounts if account["home_account_id"] == selected_id)
+
+    def _account_for_result(self, result: dict[str, Any]) -> dict[str, Any] | None:
+        accounts = self._app.get_accounts()
+        home_account_id = self._home_account_id(result)
+        if home_account_id:
+            for account in accounts:
+                if account.get("home_account_id") == home_account_id:
+                    return account
+        return accounts[0] if accounts else None
+
+    @staticmethod
+    def _home_account_id(result: dict[str, Any]) -> str | None:
+        client_info = result.get("client_info")
+        if isinstance(client_info, str) and client_info:
+            try:
+                decoded = json.loads(base64.urlsafe_b64decode(client_info + "=" * (-len(client_info) % 4)))
+            except ValueError:
+                decoded = None
+            if isinstance(decoded, dict) and decoded.get("uid") and decoded.get("utid"):
+                return f"{decoded['uid']}.{decoded['utid']}"
+
+        claims = result.get("id_token_claims")
+        if isinstance(claims, dict) and claims.get("oid") and claims.get("tid"):
+            return f"{claims['oid']}.{claims['tid']}"
         return None
 
     def _get_first_account(self) -> dict[str, Any] | None:
@@ -161,3 +346,10 @@ class AuthManager:
         if not accounts:
             return None
         return accounts[0]
+
+
+def _account_object_id(home_account_id: str) -> str | None:
+    home_account_id = home_account_id.strip()
+    if "." not in home_account_id:
+        return None
+    return home_account_id.split(".", 1)[0].strip() or None
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from requests.structures import CaseInsensitiveDict
+
+from copilot_client.retry import RetryPolicy
+
+
+GRAPH_BATCH_LIMIT = 20
+BATCH_ITEM_RETRY_STATUS_CODES = (429, 503)
+
+
+def chunk_requests(
+    requests_payload: list[dict[str, Any]],
+    size: int = GRAPH_BATCH_LIMIT,
+) -> list[list[dict[str, Any]]]:
+    return [requests_payload[index : index + size] for index in range(0, len(requests_payload), size)]
+
+
+def retryable_items(
+    responses: Iterable[dict[str, Any]],
+    retry_policy: RetryPolicy,
+    attempt: int,
+    elapsed_seconds: float,
+) -> tuple[list[str], float]:
+    retry_ids = []
+    delay = 0.0
+    for response in responses:
+        status_code = int(response.get("status") or 0)
+        if status_code not in BATCH_ITEM_RETRY_STATUS_CODES:
+            continue
+        item_delay = retry_policy.next_delay(
+            attempt,
+            status_code,
+            CaseInsensitiveDict(response.get("headers") or {}),
+            elapsed_seconds,
+        )
+        if item_delay is None:
+            continue
+        retry_ids.append(str(response.get("id")))
+        delay = max(delay, item_delay)
+    return retry_ids, delay
+
+
+def resubmittable(requests_payload: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # Dependencies that already succeeded are not part of the follow-up batch, and Graph
+    # rejects a dependsOn that points outside the batch.
+    request_ids = {str(request["id"]) for request in requests_payload}
+    resubmitted = []
+    for request in requests_payload:
+        depends_on = [item for item in request.get("dependsOn", []) if str(item) in request_ids]
+        request = {key: value for key, value in request.items() if key != "dependsOn"}
+        if depends_on:
+            request["dependsOn"] = depends_on
+        resubmitted.append(request)
+    return resubmitted
+
+
+def failed_chunk_responses(
+    requests_payload: list[dict[str, Any]],
+    status_code: int,
+    message: str,
+) -> list[dict[str, Any]]:
+    # A chunk whose $batch call failed outright is reported item by item, like a missing response,
+    # so the other chunks' results are still returned.
+    return [
+        {
+            "id": str(request["id"]),
+            "status": status_code,
+            "body": {"error": {"code": "batchRequestFailed", "message": message}},
+        }
+        for request in requests_payload
+    ]
+
+
+def order_responses(
+    requests_payload: list[dict[str, Any]],
+    responses: list[dict[str, Any]],
+) -> list[dict[str, Any]]:
+    by_id = {str(response.get("id")): response for response in responses}
+    ordered = []
+    for request in requests_payload:
+        request_id = str(request["id"])
+        response = by_id.get(request_id)
+        if response is None:
+            response = {
+                "id": request_id,
+                "status": 500,
+                "body": {"error": {"code": "missingBatchResponse", "message": "No response was returned for this item"}},
+            }
+        ordered.append(response)
+    return ordered
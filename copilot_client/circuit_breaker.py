@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+import threading
+import time
+from typing import Callable
+
+from copilot_client.config import AppSettings
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclass(frozen=True)
+class CircuitBreakerState:
+    endpoint: str
+    state: str
+    failure_rate: float
+    recorded_calls: int
+    rejected_calls: int
+    retry_after_seconds: float
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        minimum_calls: int = 8,
+        window_size: int = 20,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._failure_rate_threshold = failure_rate_threshold
+        self._minimum_calls = minimum_calls
+        self._outcomes: deque[bool] = deque(maxlen=window_size)
+        self._open_seconds = open_seconds
+        self._half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._rejected_calls = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self._open_seconds:
+                    self._rejected_calls += 1
+                    return False
+                self._state = HALF_OPEN
+                self._half_open_calls = 0
+
+            if self._state == HALF_OPEN:
+                if self._half_open_calls >= self._half_open_max_calls:
+                    self._rejected_calls += 1
+                    return False
+                self._half_open_calls += 1
+            return True
+
+    def release(self) -> None:
+        # A permitted call that never reached the server hands back its half-open probe.
+        with self._lock:
+            if self._state == HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+                self._outcomes.clear()
+            self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trip()
+                return
+
+            self._outcomes.append(False)
+            if len(self._outcomes) >= self._minimum_calls and self._failure_rate() >= self._failure_rate_threshold:
+                self._trip()
+
+    def snapshot(self, endpoint: str) -> CircuitBreakerState:
+        with self._lock:
+            retry_after = 0.0
+            if self._state == OPEN:
+                retry_after = max(0.0, self._open_seconds - (self._clock() - self._opened_at))
+            return CircuitBreakerState(
+                endpoint=endpoint,
+                state=self._state,
+                failure_rate=round(self._failure_rate(), 3),
+                recorded_calls=len(self._outcomes),
+                rejected_calls=self._rejected_calls,
+                retry_after_seconds=round(retry_after, 1),
+            )
+
+    def _trip(self) -> None:
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._half_open_calls = 0
+        self._outcomes.clear()
+
+    def _failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        failures = sum(1 for outcome in self._outcomes if not outcome)
+        return failures / len(self._outcomes)
+
+
+class CircuitBreakerRegistry:
+    def __init__(self, factory: Callable[[], CircuitBreaker]):
+        self._factory = factory
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def from_settings(settings: AppSettings) -> "CircuitBreakerRegistry":
+        return CircuitBreakerRegistry(
+            lambda: CircuitBreaker(
+                failure_rate_threshold=settings.circuit_failure_rate_threshold,
+                minimum_calls=settings.circuit_minimum_calls,
+                window_size=settings.circuit_window_size,
+                open_seconds=settings.circuit_open_seconds,
+            )
+        )
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = self._factory()
+                self._breakers[endpoint] = breaker
+            return breaker
+
+    def states(self) -> list[CircuitBreakerState]:
+        with self._lock:
+            breakers = list(self._breakers.items())
+        return [breaker.snapshot(endpoint) for endpoint, breaker in breakers]
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import copy
+import threading
+from typing import Any, Callable
+
+
+class _InFlightCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.followers = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: dict[str, _InFlightCall] = {}
+        self._coalesced_count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def coalesced_count(self) -> int:
+        return self._coalesced_count
+
+    def do(self, key: str, call: Callable[[], Any]) -> Any:
+        with self._lock:
+            in_flight = self._calls.get(key)
+            is_leader = in_flight is None
+            if is_leader:
+                in_flight = _InFlightCall()
+                self._calls[key] = in_flight
+            else:
+                in_flight.followers += 1
+                self._coalesced_count += 1
+
+        if not is_leader:
+            return self._wait(in_flight)
+
+        result = None
+        try:
+            result = call()
+        except BaseException as exc:
+            in_flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+                has_followers = in_flight.followers > 0
+            if has_followers and in_flight.error is None:
+                in_flight.result = copy.deepcopy(result)
+            in_flight.done.set()
+        return result
+
+    @staticmethod
+    def _wait(in_flight: _InFlightCall) -> Any:
+        in_flight.done.wait()
+        if in_flight.error is not None:
+            raise in_flight.error
+        return copy.deepcopy(in_flight.result)
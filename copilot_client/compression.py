@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import gzip
+import threading
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def supported_encodings() -> tuple[str, ...]:
+    if brotli is not None:
+        return ("gzip", "deflate", "br")
+    return ("gzip", "deflate")
+
+
+def accept_encoding_header(preferred: str) -> str:
+    supported = supported_encodings()
+    encodings = [item.strip().lower() for item in preferred.split(",") if item.strip()]
+    accepted = [encoding for encoding in encodings if encoding in supported or encoding == "identity"]
+    return ", ".join(accepted) or "identity"
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    if encoding == "deflate":
+        return zlib.compress(body, 6)
+    if encoding == "br":
+        if brotli is None:
+            raise RuntimeError("Brotli request compression requires the 'brotli' package")
+        return brotli.compress(body, quality=5)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+@dataclass(frozen=True)
+class EndpointTransferStats:
+    endpoint: str
+    requests: int
+    request_bytes: int
+    request_wire_bytes: int
+    response_bytes: int
+    response_wire_bytes: int
+
+    @property
+    def saved_bytes(self) -> int:
+        return (self.request_bytes - self.request_wire_bytes) + (self.response_bytes - self.response_wire_bytes)
+
+
+class TransferStats:
+    def __init__(self):
+        self._counters: dict[str, list[int]] = {}
+        self._lock = threading.Lock()
+
+    def record_request(self, endpoint: str, body_bytes: int, wire_bytes: int) -> None:
+        with self._lock:
+            counters = self._counters.setdefault(endpoint, [0, 0, 0, 0, 0])
+            counters[0] += 1
+            counters[1] += body_bytes
+            counters[2] += wire_bytes
+
+    def record_response(self, endpoint: str, body_bytes: int, wire_bytes: int) -> None:
+        with self._lock:
+            counters = self._counters.setdefault(endpoint, [0, 0, 0, 0, 0])
+            counters[3] += body_bytes
+            counters[4] += wire_bytes
+
+    def snapshot(self) -> list[EndpointTransferStats]:
+        with self._lock:
+            items = [(endpoint, list(counters)) for endpoint, counters in self._counters.items()]
+        return [
+            EndpointTransferStats(
+                endpoint=endpoint,
+                requests=counters[0],
+                request_bytes=counters[1],
+                request_wire_bytes=counters[2],
+                response_bytes=counters[3],
+                response_wire_bytes=counters[4],
+            )
+            for endpoint, counters in items
+        ]
@@ -5,6 +5,8 @@ import os
 from pathlib import Path
 import sys
 
+from copilot_client.compression import supported_encodings
+
 
 class ConfigurationError(ValueError):
     pass
@@ -26,6 +28,41 @@ class AppSettings:
     token_cache_path: str
     auth_flow: str
     redirect_uri: str
+    retry_base_delay_seconds: float = 0.5
+    retry_max_delay_seconds: float = 30.0
+    retry_max_total_seconds: float = 120.0
+    rate_limit_per_second: float = 20.0
+    rate_limit_burst: int = 20
+    initial_concurrency: int = 4
+    max_concurrency: int = 32
+    stream_reconnect_attempts: int = 0
+    token_refresh_fraction: float = 0.75
+    identity_selection: str = "first"
+    token_cache_persistence: str = "locked"
+    accept_encoding: str = "gzip, deflate, br"
+    request_compression: str = "none"
+    request_compression_min_bytes: int = 1024
+    http_transport: str = "http1"
+    search_cache_ttl_seconds: float = 0.0
+    retrieval_cache_ttl_seconds: float = 0.0
+    cache_max_entries: int = 256
+    cache_max_bytes: int = 64 * 1024 * 1024
+    cache_directory: str = ""
+    cache_disk_max_bytes: int = 256 * 1024 * 1024
+    circuit_failure_rate_threshold: float = 0.5
+    circuit_minimum_calls: int = 8
+    circuit_window_size: int = 20
+    circuit_open_seconds: float = 30.0
+    hedge_endpoints: tuple[str, ...] = ()
+    hedge_percentile: float = 95.0
+    hedge_initial_delay_seconds: float = 2.0
+    hedge_budget_ratio: float = 0.05
+    request_deadline_seconds: float = 120.0
+    batch_max_parallel: int = 4
+    conversation_pool_size: int = 4
+    conversation_idle_seconds: float = 600.0
+    warm_up_on_sign_in: bool = True
+    warm_up_conversations: int = 1
 
     @staticmethod
     def from_env() -> "AppSettings":
@@ -48,6 +85,42 @@ class AppSettings:
 
         timeout_seconds = int(os.getenv("COPILOT_TIMEOUT_SECONDS", "45"))
         retry_attempts = int(os.getenv("COPILOT_RETRY_ATTEMPTS", "3"))
+        retry_base_delay_seconds = float(os.getenv("COPILOT_RETRY_BASE_DELAY_SECONDS", "0.5"))
+        retry_max_delay_seconds = float(os.getenv("COPILOT_RETRY_MAX_DELAY_SECONDS", "30"))
+        retry_max_total_seconds = float(os.getenv("COPILOT_RETRY_MAX_TOTAL_SECONDS", "120"))
+        rate_limit_per_second = float(os.getenv("COPILOT_RATE_LIMIT_PER_SECOND", "20"))
+        rate_limit_burst = int(os.getenv("COPILOT_RATE_LIMIT_BURST", "20"))
+        initial_concurrency = int(os.getenv("COPILOT_INITIAL_CONCURRENCY", "4"))
+        max_concurrency = int(os.getenv("COPILOT_MAX_CONCURRENCY", "32"))
+        stream_reconnect_attempts = int(os.getenv("COPILOT_STREAM_RECONNECT_ATTEMPTS", "0"))
+        token_refresh_fraction = float(os.getenv("COPILOT_TOKEN_REFRESH_FRACTION", "0.75"))
+        identity_selection = os.getenv("COPILOT_IDENTITY_SELECTION", "first").strip().lower()
+        token_cache_persistence = os.getenv("COPILOT_TOKEN_CACHE_PERSISTENCE", "locked").strip().lower()
+        accept_encoding = os.getenv("COPILOT_ACCEPT_ENCODING", "gzip, deflate, br").strip()
+        request_compression = os.getenv("COPILOT_REQUEST_COMPRESSION", "none").strip().lower()
+        request_compression_min_bytes = int(os.getenv("COPILOT_REQUEST_COMPRESSION_MIN_BYTES", "1024"))
+        http_transport = os.getenv("COPILOT_HTTP_TRANSPORT", "http1").strip().lower()
+        search_cache_ttl_seconds = float(os.getenv("COPILOT_SEARCH_CACHE_TTL_SECONDS", "0"))
+        retrieval_cache_ttl_seconds = float(os.getenv("COPILOT_RETRIEVAL_CACHE_TTL_SECONDS", "0"))
+        cache_max_entries = int(os.getenv("COPILOT_CACHE_MAX_ENTRIES", "256"))
+        cache_max_bytes = int(os.getenv("COPILOT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+        cache_directory = os.getenv("COPILOT_CACHE_DIR", "").strip()
+        cache_disk_max_bytes = int(os.getenv("COPILOT_CACHE_DISK_MAX_BYTES", str(256 * 1024 * 1024)))
+        circuit_failure_rate_threshold = float(os.getenv("COPILOT_CIRCUIT_FAILURE_RATE_THRESHOLD", "0.5"))
+        circuit_minimum_calls = int(os.getenv("COPILOT_CIRCUIT_MINIMUM_CALLS", "8"))
+        circuit_window_size = int(os.getenv("COPILOT_CIRCUIT_WINDOW_SIZE", "20"))
+        circuit_open_seconds = float(os.getenv("COPILOT_CIRCUIT_OPEN_SECONDS", "30"))
+        raw_hedge_endpoints = os.getenv("COPILOT_HEDGE_ENDPOINTS", "").strip()
+        hedge_endpoints = tuple(s.strip().lower() for s in raw_hedge_endpoints.split(",") if s.strip())
+        hedge_percentile = float(os.getenv("COPILOT_HEDGE_PERCENTILE", "95"))
+        hedge_initial_delay_seconds = float(os.getenv("COPILOT_HEDGE_INITIAL_DELAY_SECONDS", "2"))
+        hedge_budget_ratio = float(os.getenv("COPILOT_HEDGE_BUDGET_RATIO", "0.05"))
+        request_deadline_seconds = float(os.getenv("COPILOT_REQUEST_DEADLINE_SECONDS", "120"))
+        batch_max_parallel = int(os.getenv("COPILOT_BATCH_MAX_PARALLEL", "4"))
+        conversation_pool_size = int(os.getenv("COPILOT_CONVERSATION_POOL_SIZE", "4"))
+        conversation_idle_seconds = float(os.getenv("COPILOT_CONVERSATION_IDLE_SECONDS", "600"))
+        warm_up_on_sign_in = os.getenv("COPILOT_WARM_UP", "true").strip().lower() in {"1", "true", "yes"}
+        warm_up_conversations = int(os.getenv("COPILOT_WARM_UP_CONVERSATIONS", "1"))
 
         default_cache_path = os.path.join(
             os.getenv("LOCALAPPDATA", os.getcwd()),
@@ -73,6 +146,41 @@ class AppSettings:
             token_cache_path=token_cache_path,
             auth_flow=auth_flow,
             redirect_uri=redirect_uri,
+            retry_base_delay_seconds=retry_base_delay_seconds,
+            retry_max_delay_seconds=retry_max_delay_seconds,
+            retry_max_total_seconds=retry_max_total_seconds,
+            rate_limit_per_second=rate_limit_per_second,
+            rate_limit_burst=rate_limit_burst,
+            initial_concurrency=initial_concurrency,
+            max_concurrency=max_concurrency,
+            stream_reconnect_attempts=stream_reconnect_attempts,
+            token_refresh_fraction=token_refresh_fraction,
+            identity_selection=identity_selection,
+            token_cache_persistence=token_cache_persistence,
+            accept_encoding=accept_encoding,
+            request_compression=request_compression,
+            request_compression_min_bytes=request_compression_min_bytes,
+            http_transport=http_transport,
+            search_cache_ttl_seconds=search_cache_ttl_seconds,
+            retrieval_cache_ttl_seconds=retrieval_cache_ttl_seconds,
+            cache_max_entries=cache_max_entries,
+            cache_max_bytes=cache_max_bytes,
+            cache_directory=cache_directory,
+            cache_disk_max_bytes=cache_disk_max_bytes,
+            circuit_failure_rate_threshold=circuit_failure_rate_threshold,
+            circuit_minimum_calls=circuit_minimum_calls,
+            circuit_window_size=circuit_window_size,
+            circuit_open_seconds=circuit_open_seconds,
+            hedge_endpoints=hedge_endpoints,
+            hedge_percentile=hedge_percentile,
+            hedge_initial_delay_seconds=hedge_initial_delay_seconds,
+            hedge_budget_ratio=hedge_budget_ratio,
+            request_deadline_seconds=request_deadline_seconds,
+            batch_max_parallel=batch_max_parallel,
+            conversation_pool_size=conversation_pool_size,
+            conversation_idle_seconds=conversation_idle_seconds,
+            warm_up_on_sign_in=warm_up_on_sign_in,
+            warm_up_conversations=warm_up_conversations,
         )
         settings.validate()
         return settings
@@ -111,6 +219,108 @@ class AppSettings:
         if self.retry_attempts < 0:
             raise ConfigurationError("COPILOT_RETRY_ATTEMPTS must be 0 or greater")
 
+        if self.retry_base_delay_seconds < 0 or self.retry_max_delay_seconds < 0:
+            raise ConfigurationError(
+                "COPILOT_RETRY_BASE_DELAY_SECONDS and COPILOT_RETRY_MAX_DELAY_SECONDS must be 0 or greater"
+            )
+
+        if self.retry_max_total_seconds <= 0:
+            raise ConfigurationError("COPILOT_RETRY_MAX_TOTAL_SECONDS must be greater than 0")
+
+        if self.rate_limit_per_second < 0:
+            raise ConfigurationError("COPILOT_RATE_LIMIT_PER_SECOND must be 0 or greater")
+
+        if self.rate_limit_burst <= 0:
+            raise ConfigurationError("COPILOT_RATE_LIMIT_BURST must be greater than 0")
+
+        if self.initial_concurrency <= 0 or self.max_concurrency < self.initial_concurrency:
+            raise ConfigurationError(
+                "COPILOT_INITIAL_CONCURRENCY must be greater than 0 and not exceed COPILOT_MAX_CONCURRENCY"
+            )
+
+        if self.stream_reconnect_attempts < 0:
+            raise ConfigurationError("COPILOT_STREAM_RECONNECT_ATTEMPTS must be 0 or greater")
+
+        if not 0 <= self.token_refresh_fraction < 1:
+            raise ConfigurationError("COPILOT_TOKEN_REFRESH_FRACTION must be at least 0 and less than 1")
+
+        if self.identity_selection not in {"first", "round_robin", "least_throttled"}:
+            raise ConfigurationError(
+                "COPILOT_IDENTITY_SELECTION must be one of: first, round_robin, least_throttled"
+            )
+
+        if self.token_cache_persistence not in {"locked", "batched"}:
+            raise ConfigurationError("COPILOT_TOKEN_CACHE_PERSISTENCE must be one of: locked, batched")
+
+        valid_request_compression = {"none", "gzip", "deflate", "br"}
+        if self.request_compression not in valid_request_compression:
+            raise ConfigurationError(
+                "COPILOT_REQUEST_COMPRESSION must be one of: none, gzip, deflate, br"
+            )
+        if self.request_compression not in {"none", *supported_encodings()}:
+            raise ConfigurationError(
+                f"COPILOT_REQUEST_COMPRESSION={self.request_compression} needs the brotli package; "
+                "install it with 'pip install brotli' or choose gzip or deflate"
+            )
+
+        if self.request_compression_min_bytes < 0:
+            raise ConfigurationError("COPILOT_REQUEST_COMPRESSION_MIN_BYTES must be 0 or greater")
+
+        if self.http_transport not in {"http1", "http2"}:
+            raise ConfigurationError("COPILOT_HTTP_TRANSPORT must be one of: http1, http2")
+
+        if self.search_cache_ttl_seconds < 0 or self.retrieval_cache_ttl_seconds < 0:
+            raise ConfigurationError(
+                "COPILOT_SEARCH_CACHE_TTL_SECONDS and COPILOT_RETRIEVAL_CACHE_TTL_SECONDS must be 0 or greater"
+            )
+
+        if self.cache_max_entries <= 0 or self.cache_max_bytes <= 0 or self.cache_disk_max_bytes <= 0:
+            raise ConfigurationError(
+                "COPILOT_CACHE_MAX_ENTRIES, COPILOT_CACHE_MAX_BYTES and COPILOT_CACHE_DISK_MAX_BYTES must be greater than 0"
+            )
+
+        if not 0 < self.circuit_failure_rate_threshold <= 1:
+            raise ConfigurationError("COPILOT_CIRCUIT_FAILURE_RATE_THRESHOLD must be greater than 0 and at most 1")
+
+        if self.circuit_minimum_calls <= 0 or self.circuit_window_size < self.circuit_minimum_calls:
+            raise ConfigurationError(
+                "COPILOT_CIRCUIT_MINIMUM_CALLS must be greater than 0 and not exceed COPILOT_CIRCUIT_WINDOW_SIZE"
+            )
+
+        if self.circuit_open_seconds <= 0:
+            raise ConfigurationError("COPILOT_CIRCUIT_OPEN_SECONDS must be greater than 0")
+
+        valid_hedge_endpoints = {"search", "retrieval"}
+        invalid_hedge_endpoints = [name for name in self.hedge_endpoints if name not in valid_hedge_endpoints]
+        if invalid_hedge_endpoints:
+            raise ConfigurationError(
+                "COPILOT_HEDGE_ENDPOINTS only supports idempotent endpoints: search, retrieval"
+            )
+
+        if not 0 < self.hedge_percentile <= 100:
+            raise ConfigurationError("COPILOT_HEDGE_PERCENTILE must be greater than 0 and at most 100")
+
+        if self.hedge_initial_delay_seconds <= 0:
+            raise ConfigurationError("COPILOT_HEDGE_INITIAL_DELAY_SECONDS must be greater than 0")
+
+        if not 0 <= self.hedge_budget_ratio <= 1:
+            raise ConfigurationError("COPILOT_HEDGE_BUDGET_RATIO must be between 0 and 1")
+
+        if self.request_deadline_seconds < 0:
+            raise ConfigurationError("COPILOT_REQUEST_DEADLINE_SECONDS must be 0 or greater")
+
+        if self.batch_max_parallel <= 0:
+            raise ConfigurationError("COPILOT_BATCH_MAX_PARALLEL must be greater than 0")
+
+        if self.conversation_pool_size <= 0:
+            raise ConfigurationError("COPILOT_CONVERSATION_POOL_SIZE must be greater than 0")
+
+        if self.conversation_idle_seconds <= 0:
+            raise ConfigurationError("COPILOT_CONVERSATION_IDLE_SECONDS must be greater than 0")
+
+        if self.warm_up_conversations < 0:
+            raise ConfigurationError("COPILOT_WARM_UP_CONVERSATIONS must be 0 or greater")
+
         valid_auth_flows = {"interactive", "device_code", "interactive_then_device"}
         if self.auth_flow not in valid_auth_flows:
             raise ConfigurationError(
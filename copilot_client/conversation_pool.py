@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+import threading
+import time
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class ConversationPoolStats:
+    idle: int
+    checked_out: int
+    created: int
+    reused: int
+    expired: int
+
+
+@dataclass
+class _IdleConversation:
+    conversation_id: str
+    idle_since: float
+    # A continued conversation carries earlier turns; only a caller continuing a chat may get it back.
+    continued: bool
+
+
+class ConversationPool:
+    def __init__(
+        self,
+        max_idle: int = 4,
+        idle_timeout_seconds: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_idle <= 0:
+            raise ValueError("max_idle must be greater than 0")
+        self._max_idle = max_idle
+        self._idle_timeout_seconds = idle_timeout_seconds
+        self._clock = clock
+        # Conversations belong to the identity that created them. Each owner's idle conversations
+        # are ordered oldest first, so the most recently returned one is handed out first.
+        self._idle: dict[str, deque[_IdleConversation]] = {}
+        self._checked_out: dict[str, str] = {}
+        # Fresh conversations handed out since the owner's last refill, and replacements still being created.
+        self._refills_due: dict[str, int] = {}
+        self._refilling: dict[str, int] = {}
+        self._generation = 0
+        self._created = 0
+        self._reused = 0
+        self._expired = 0
+        self._lock = threading.Lock()
+
+    @property
+    def max_idle(self) -> int:
+        return self._max_idle
+
+    def checkout(
+        self,
+        owner: str,
+        create: Callable[[], str],
+        continuing: bool = False,
+        reuse: bool = True,
+    ) -> tuple[str, bool]:
+        with self._lock:
+            self._drop_expired()
+            idle = self._take(owner, continuing) if reuse else None
+            if idle is not None:
+                self._checked_out[idle.conversation_id] = owner
+                self._reused += 1
+                if not idle.continued:
+                    self._refills_due[owner] = self._refills_due.get(owner, 0) + 1
+                return idle.conversation_id, True
+
+        conversation_id = create()
+        with self._lock:
+            self._checked_out[conversation_id] = owner
+            self._created += 1
+        return conversation_id, False
+
+    def checkin(self, conversation_id: str) -> None:
+        # Only called for a conversation its caller intends to continue; others are discarded.
+        with self._lock:
+            owner = self._checked_out.pop(conversation_id, None)
+            if owner is None:
+                return
+            self._append(owner, _IdleConversation(conversation_id, self._clock(), continued=True))
+
+    def discard(self, conversation_id: str) -> None:
+        with self._lock:
+            self._checked_out.pop(conversation_id, None)
+
+    def add(self, owner: str, conversation_id: str) -> None:
+        with self._lock:
+            self._created += 1
+            if len(self._idle.get(owner, ())) < self._max_idle:
+                self._append(owner, _IdleConversation(conversation_id, self._clock(), continued=False))
+
+    def start_refill(self, owner: str) -> int | None:
+        # Claims one replacement for a fresh conversation handed out of the pool. Returns a ticket for
+        # finish_refill, or None when nothing is due or the owner's idle and pending ones already fill it.
+        with self._lock:
+            self._drop_expired()
+            due = self._refills_due.pop(owner, 0)
+            if due <= 0:
+                return None
+            if due > 1:
+                self._refills_due[owner] = due - 1
+            pending = self._refilling.get(owner, 0)
+            if len(self._idle.get(owner, ())) + pending >= self._max_idle:
+                self._refills_due.pop(owner, None)
+                return None
+            self._refilling[owner] = pending + 1
+            return self._generation
+
+    def finish_refill(self, owner: str, ticket: int, conversation_id: str | None) -> None:
+        with self._lock:
+            if ticket != self._generation:
+                # The pool was cleared (e.g. on sign-out) while the replacement was being created.
+                return
+            pending = self._refilling.get(owner, 0) - 1
+            if pending > 0:
+                self._refilling[owner] = pending
+            else:
+                self._refilling.pop(owner, None)
+            if conversation_id is None:
+                return
+            self._created += 1
+            if len(self._idle.get(owner, ())) < self._max_idle:
+                self._append(owner, _IdleConversation(conversation_id, self._clock(), continued=False))
+
+    def idle_count(self, owner: str | None = None) -> int:
+        with self._lock:
+            self._drop_expired()
+            if owner is not None:
+                return len(self._idle.get(owner, ()))
+            return sum(len(idle) for idle in self._idle.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._idle.clear()
+            # Conversations still in use are not returned to the pool once they finish.
+            self._checked_out.clear()
+            self._refills_due.clear()
+            self._refilling.clear()
+            self._generation += 1
+
+    def stats(self) -> ConversationPoolStats:
+        with self._lock:
+            self._drop_expired()
+            return ConversationPoolStats(
+                idle=sum(len(idle) for idle in self._idle.values()),
+                checked_out=len(self._checked_out),
+                created=self._created,
+                reused=self._reused,
+                expired=self._expired,
+            )
+
+    def _take(self, owner: str, continuing: bool) -> _IdleConversation | None:
+        idle = self._idle.get(owner)
+        if not idle:
+            return None
+        # A continuing caller prefers its most recent continued conversation; any caller may take a
+        # fresh one, but an independent chat never lands in a conversation with earlier turns.
+        candidates = [index for index, entry in enumerate(idle) if continuing or not entry.continued]
+        if continuing:
+            candidates.sort(key=lambda index: (idle[index].continued, index))
+        if not candidates:
+            return None
+        index = candidates[-1]
+        entry = idle[index]
+        del idle[index]
+        return entry
+
+    def _append(self, owner: str, entry: _IdleConversation) -> None:
+        idle = self._idle.setdefault(owner, deque())
+        idle.append(entry)
+        while len(idle) > self._max_idle:
+            idle.popleft()
+
+    def _drop_expired(self) -> None:
+        cutoff = self._clock() - self._idle_timeout_seconds
+        for owner in list(self._idle):
+            idle = self._idle[owner]
+            while idle and idle[0].idle_since < cutoff:
+                idle.popleft()
+                self._expired += 1
+            if not idle:
+                del self._idle[owner]
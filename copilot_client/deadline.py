@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import time
+from typing import Callable
+
+
+class DeadlineExceededError(TimeoutError):
+    pass
+
+
+class Deadline:
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._seconds = seconds
+        self._expires_at = clock() + seconds
+
+    @property
+    def total_seconds(self) -> float:
+        return self._seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self._expires_at - self._clock())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def can_wait(self, seconds: float) -> bool:
+        return self.remaining() > seconds
+
+    def timeout(self, cap: float) -> float:
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceededError(f"Deadline of {self._seconds:g}s exceeded")
+        return min(cap, remaining)
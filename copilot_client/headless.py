@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+import sys
+import threading
+import time
+from typing import Any, BinaryIO, Callable, Iterator
+
+from copilot_client import codec
+from copilot_client.auth import AuthenticationError
+from copilot_client.config import AppSettings, ConfigurationError
+from copilot_client.logging_utils import configure_logging, get_logger
+from copilot_client.services import CopilotService, build_service
+
+
+OPERATION_TYPES = ("chat", "search", "retrieval")
+
+logger = get_logger(__name__)
+
+
+class ResultWriter:
+    def __init__(self, output: BinaryIO):
+        self._output = output
+        self._lock = threading.Lock()
+        self.succeeded = 0
+        self.failed = 0
+
+    def write(self, record: dict[str, Any]) -> None:
+        line = codec.dumps(record) + b"\n"
+        with self._lock:
+            self._output.write(line)
+            self._output.flush()
+            if record["status"] == "ok":
+                self.succeeded += 1
+            else:
+                self.failed += 1
+
+
+def iter_operations(input_file: BinaryIO) -> Iterator[tuple[int, dict[str, Any] | None, str | None]]:
+    for line_number, raw_line in enumerate(input_file, start=1):
+        if not raw_line.strip():
+            continue
+        try:
+            operation = codec.loads(raw_line)
+        except ValueError as exc:
+            yield line_number, None, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(operation, dict) or operation.get("type") not in OPERATION_TYPES:
+            yield line_number, None, f"Each line must be an object with type one of: {', '.join(OPERATION_TYPES)}"
+            continue
+        if not isinstance(operation.get("payload"), dict):
+            yield line_number, None, "Each line must have an object payload"
+            continue
+        yield line_number, operation, None
+
+
+def execute_operation(service: CopilotService, operation: dict[str, Any]) -> dict[str, Any]:
+    operation_type = operation["type"]
+    payload = operation["payload"]
+    if operation_type == "chat":
+        return service.send_chat(payload)
+    if operation_type == "search":
+        return service.run_search(payload, cache_mode=str(operation.get("cacheMode", "use")))
+    return service.run_retrieval(payload, cache_mode=str(operation.get("cacheMode", "use")))
+
+
+def run_workload(
+    service: CopilotService,
+    input_file: BinaryIO,
+    writer: ResultWriter,
+    workers: int,
+    clock: Callable[[], float] = time.perf_counter,
+) -> None:
+    # At most 2x workers operations are read ahead, so memory stays flat for any input size.
+    in_flight = threading.BoundedSemaphore(workers * 2)
+
+    def run(line_number: int, operation: dict[str, Any]) -> None:
+        started_at = datetime.now(timezone.utc).isoformat()
+        started = clock()
+        record: dict[str, Any] = {
+            "line": line_number,
+            "id": operation.get("id"),
+            "type": operation["type"],
+            "startedAt": started_at,
+        }
+        try:
+            result = execute_operation(service, operation)
+            record.update(status="ok", elapsedMs=round((clock() - started) * 1000, 1), result=result)
+        except Exception as exc:
+            record.update(status="error", elapsedMs=round((clock() - started) * 1000, 1), error=str(exc))
+        writer.write(record)
+
+    def release(_: Future) -> None:
+        in_flight.release()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="copilot-headless") as executor:
+        for line_number, operation, error in iter_operations(input_file):
+            if operation is None:
+                writer.write({"line": line_number, "status": "error", "elapsedMs": 0.0, "error": error})
+                continue
+            in_flight.acquire()
+            executor.submit(run, line_number, operation).add_done_callback(release)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="copilot-headless",
+        description="Run chat/search/retrieval operations from a JSONL file without the GUI.",
+    )
+    parser.add_argument(
+        "input",
+        help='JSONL file of {"type": "chat|search|retrieval", "payload": {...}} lines ("-" for stdin)',
+    )
+    parser.add_argument("-o", "--output", default="-", help='Output JSONL file for results ("-" for stdout)')
+    parser.add_argument("-w", "--workers", type=int, default=8, help="Concurrent operations")
+    parser.add_argument(
+        "--add-identity",
+        action="count",
+        default=0,
+        help="Sign in one more account for the identity pool before running (repeat for several)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.workers <= 0:
+        parser.error("--workers must be greater than 0")
+
+    configure_logging()
+    try:
+        service = build_service(AppSettings.from_env())
+    except ConfigurationError as exc:
+        logger.error("Configuration error: %s", exc)
+        return 2
+
+    try:
+        auth_state = service.sign_in()
+    except AuthenticationError as exc:
+        logger.error("Sign in failed: %s", exc)
+        return 2
+    logger.info("Signed in as %s", auth_state.username or "unknown user")
+    for _ in range(args.add_identity):
+        try:
+            service.add_identity()
+        except AuthenticationError as exc:
+            logger.error("Adding an identity failed: %s", exc)
+            return 2
+    # Connections, token and the first conversation are ready before any operation is timed.
+    service.wait_for_warm_up(service.request_deadline_seconds)
+
+    input_file = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    output_file = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    writer = ResultWriter(output_file)
+    started = time.perf_counter()
+    try:
+        run_workload(service, input_file, writer, args.workers)
+    finally:
+        service.close()
+        if input_file is not sys.stdin.buffer:
+            input_file.close()
+        if output_file is not sys.stdout.buffer:
+            output_file.close()
+
+    logger.info(
+        "Finished %d operations (%d failed) in %.1fs",
+        writer.succeeded + writer.failed,
+        writer.failed,
+        time.perf_counter() - started,
+    )
+    return 1 if writer.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
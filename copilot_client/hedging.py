@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+import math
+import threading
+
+from copilot_client.config import AppSettings
+
+
+@dataclass(frozen=True)
+class HedgeStats:
+    endpoint: str
+    primary_requests: int
+    hedged_requests: int
+    hedge_wins: int
+    hedge_delay_seconds: float
+
+
+class LatencyTracker:
+    def __init__(self, window_size: int = 200):
+        self._samples: deque[float] = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percentile: float) -> float | None:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, math.ceil(percentile / 100 * len(samples)) - 1))
+        return samples[index]
+
+
+class HedgingPolicy:
+    def __init__(
+        self,
+        endpoints: tuple[str, ...],
+        percentile: float = 95.0,
+        initial_delay_seconds: float = 2.0,
+        min_delay_seconds: float = 0.05,
+        budget_ratio: float = 0.05,
+        min_samples: int = 20,
+    ):
+        self._endpoints = frozenset(endpoints)
+        self._percentile = percentile
+        self._initial_delay_seconds = initial_delay_seconds
+        self._min_delay_seconds = min_delay_seconds
+        self._budget_ratio = budget_ratio
+        self._min_samples = min_samples
+        self._trackers: dict[str, LatencyTracker] = {}
+        self._counters: dict[str, list[int]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def from_settings(settings: AppSettings) -> "HedgingPolicy":
+        return HedgingPolicy(
+            endpoints=settings.hedge_endpoints,
+            percentile=settings.hedge_percentile,
+            initial_delay_seconds=settings.hedge_initial_delay_seconds,
+            budget_ratio=settings.hedge_budget_ratio,
+        )
+
+    def is_enabled(self, endpoint: str) -> bool:
+        return endpoint in self._endpoints
+
+    def delay_for(self, endpoint: str) -> float:
+        tracker = self._tracker(endpoint)
+        if len(tracker) < self._min_samples:
+            return self._initial_delay_seconds
+        observed = tracker.percentile(self._percentile)
+        if observed is None:
+            return self._initial_delay_seconds
+        return max(self._min_delay_seconds, observed)
+
+    def record_latency(self, endpoint: str, seconds: float) -> None:
+        self._tracker(endpoint).record(seconds)
+
+    def record_primary(self, endpoint: str) -> None:
+        with self._lock:
+            self._counter(endpoint)[0] += 1
+
+    def try_acquire_hedge(self, endpoint: str) -> bool:
+        with self._lock:
+            counters = self._counter(endpoint)
+            # One hedge is always allowed so a cold client can still cut a first slow request.
+            if counters[1] + 1 > max(1.0, counters[0] * self._budget_ratio):
+                return False
+            counters[1] += 1
+            return True
+
+    def record_hedge_win(self, endpoint: str) -> None:
+        with self._lock:
+            self._counter(endpoint)[2] += 1
+
+    def stats(self) -> list[HedgeStats]:
+        with self._lock:
+            counters = {endpoint: list(values) for endpoint, values in self._counters.items()}
+        return [
+            HedgeStats(
+                endpoint=endpoint,
+                primary_requests=values[0],
+                hedged_requests=values[1],
+                hedge_wins=values[2],
+                hedge_delay_seconds=round(self.delay_for(endpoint), 3),
+            )
+            for endpoint, values in counters.items()
+        ]
+
+    def _tracker(self, endpoint: str) -> LatencyTracker:
+        with self._lock:
+            tracker = self._trackers.get(endpoint)
+            if tracker is None:
+                tracker = LatencyTracker()
+                self._trackers[endpoint] = tracker
+            return tracker
+
+    def _counter(self, endpoint: str) -> list[int]:
+        counters = self._counters.get(endpoint)
+        if counters is None:
+            counters = [0, 0, 0]
+            self._counters[endpoint] = counters
+        return counters
@@ -1,11 +1,35 @@
 from __future__ import annotations
 
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    TimeoutError as FutureTimeoutError,
+    wait,
+)
+from contextlib import nullcontext
+import threading
 import time
-from typing import Any, Callable
+from typing import Any, Callable, Iterable, Iterator
 
 import requests
 
+from copilot_client import codec
+from copilot_client.circuit_breaker import CircuitBreakerRegistry, CircuitBreakerState
+from copilot_client.compression import (
+    EndpointTransferStats,
+    TransferStats,
+    accept_encoding_header,
+    compress_body,
+)
 from copilot_client.config import AppSettings
+from copilot_client.deadline import Deadline
+from copilot_client.hedging import HedgeStats, HedgingPolicy
+from copilot_client.json_stream import StreamedJsonArray
+from copilot_client.rate_limit import EndpointLimitStats, EndpointRateLimiter
+from copilot_client.retry import RetryPolicy, server_requested_delay
+from copilot_client.sse import SseDecoder, SseEvent
+from copilot_client.transport import Http2Response, Http2Session, RequestCancellation, build_session
 
 
 class ApiHttpError(RuntimeError):
@@ -14,87 +38,162 @@ class ApiHttpError(RuntimeError):
         self.status_code = status_code
 
 
+class StreamInterruptedError(ApiHttpError):
+    def __init__(self, message: str, events: list[dict[str, Any]] | None = None):
+        super().__init__(status_code=0, message=message)
+        self.events = events or []
+
+
+class RequestCancelledError(ApiHttpError):
+    def __init__(self):
+        super().__init__(status_code=0, message="Request cancelled")
+
+
+class CircuitOpenError(ApiHttpError):
+    def __init__(self, endpoint: str):
+        super().__init__(
+            status_code=0,
+            message=f"Circuit breaker for '{endpoint}' is open; failing fast until the endpoint recovers",
+        )
+        self.endpoint = endpoint
+
+
 class HttpClient:
-    def __init__(self, settings: AppSettings):
+    def __init__(
+        self,
+        settings: AppSettings,
+        retry_policy: RetryPolicy | None = None,
+        rate_limiter: EndpointRateLimiter | None = None,
+        circuit_breakers: CircuitBreakerRegistry | None = None,
+        hedging_policy: HedgingPolicy | None = None,
+        session: requests.Session | Http2Session | None = None,
+        throttle_listener: Callable[[str, float | None], None] | None = None,
+    ):
         self._settings = settings
-        self._session = requests.Session()
+        self._retry_policy = retry_policy or RetryPolicy.from_settings(settings)
+        self._rate_limiter = rate_limiter or EndpointRateLimiter.from_settings(settings)
+        self._circuit_breakers = circuit_breakers or CircuitBreakerRegistry.from_settings(settings)
+        self._hedging = hedging_policy or HedgingPolicy.from_settings(settings)
+        self._hedge_executor: ThreadPoolExecutor | None = None
+        self._hedge_executor_lock = threading.Lock()
+        self._transfer_stats = TransferStats()
+        self._throttle_listener = throttle_listener
+        self._session = session or build_session(settings.http_transport, settings.max_concurrency)
         self._session.headers.update(
             {
                 "Accept": "application/json",
+                "Accept-Encoding": accept_encoding_header(settings.accept_encoding),
                 "Content-Type": "application/json",
             }
         )
 
-    def post_json(self, token: str, path: str, payload: dict[str, Any]) -> dict[str, Any]:
+    def rate_limit_stats(self) -> list[EndpointLimitStats]:
+        return self._rate_limiter.stats()
+
+    def transfer_stats(self) -> list[EndpointTransferStats]:
+        return self._transfer_stats.snapshot()
+
+    def circuit_states(self) -> list[CircuitBreakerState]:
+        return self._circuit_breakers.states()
+
+    def hedge_stats(self) -> list[HedgeStats]:
+        return self._hedging.stats()
+
+    def close(self) -> None:
+        with self._hedge_executor_lock:
+            executor = self._hedge_executor
+            self._hedge_executor = None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        self._session.close()
+
+    def warm_connections(self, count: int | None = None) -> int:
+        # HTTP/2 multiplexes every call over one connection, so a single handshake is enough there.
+        if count is None:
+            count = 1 if self._settings.http_transport == "http2" else self._settings.initial_concurrency
+
+        def open_connection(_: int) -> bool:
+            # The status is irrelevant; the request only completes the TCP/TLS handshake for the pool.
+            try:
+                response = self._session.request("HEAD", self._settings.base_url, timeout=self._settings.timeout_seconds)
+            except requests.exceptions.RequestException:
+                return False
+            response.close()
+            return True
+
+        with ThreadPoolExecutor(max_workers=max(1, count), thread_name_prefix="copilot-warm-up") as executor:
+            return sum(executor.map(open_connection, range(count)))
+
+    def post_json(
+        self,
+        token: str,
+        path: str,
+        payload: dict[str, Any],
+        deadline: Deadline | None = None,
+    ) -> dict[str, Any]:
         url = f"{self._settings.base_url}{path}"
-        return self.post_absolute_json(token, url, payload)
+        return self.post_absolute_json(token, url, payload, deadline=deadline)
 
-    def post_absolute_json(self, token: str, url: str, payload: dict[str, Any]) -> dict[str, Any]:
+    def post_absolute_json(
+        self,
+        token: str,
+        url: str,
+        payload: dict[str, Any],
+        deadline: Deadline | None = None,
+    ) -> dict[str, Any]:
         headers = {"Authorization": f"Bearer {token}"}
+        body = self._encode_body(url, payload, headers)
+        endpoint = self._rate_limiter.resolve_endpoint(url)
+        if self._hedging.is_enabled(endpoint):
+            response = self._send_hedged(endpoint, url, headers, body, deadline)
+        else:
+            response = self._send_with_retry("POST", url, deadline, headers=headers, data=body)
+        self._record_response(url, response, len(response.content))
+        if not response.content:
+            return {}
+        return codec.loads(response.content)
 
-        last_error: ApiHttpError | None = None
-        attempts = self._settings.retry_attempts + 1
-        for attempt in range(1, attempts + 1):
-            response = self._session.post(
-                url,
-                headers=headers,
-                json=payload,
-                timeout=self._settings.timeout_seconds,
-            )
-
-            if response.ok:
-                if not response.content:
-                    return {}
-                return response.json()
-
-            message = response.text[:500]
-            last_error = ApiHttpError(
-                status_code=response.status_code,
-                message=f"HTTP {response.status_code}: {message}",
-            )
-            if response.status_code in (429, 500, 502, 503, 504) and attempt < attempts:
-                time.sleep(1.5 * attempt)
-                continue
-            raise last_error
-
-        if last_error is None:
-            raise ApiHttpError(status_code=0, message="Request failed")
-        raise last_error
+    def post_json_streamed(
+        self,
+        token: str,
+        path: str,
+        payload: dict[str, Any],
+        array_key: str,
+        deadline: Deadline | None = None,
+    ) -> StreamedJsonArray:
+        url = f"{self._settings.base_url}{path}"
+        headers = {"Authorization": f"Bearer {token}"}
+        body = self._encode_body(url, payload, headers)
+        response = self._send_with_retry("POST", url, deadline, headers=headers, data=body, stream=True)
+        return StreamedJsonArray(
+            self._iter_response_chunks(url, response),
+            array_key,
+            on_close=response.close,
+        )
 
     def get_json(
         self,
         token: str,
         path: str,
         params: dict[str, Any] | None = None,
+        deadline: Deadline | None = None,
     ) -> dict[str, Any]:
         url = f"{self._settings.base_url}{path}"
-        return self.get_absolute_json(token, url, params)
+        return self.get_absolute_json(token, url, params, deadline=deadline)
 
     def get_absolute_json(
         self,
         token: str,
         url: str,
         params: dict[str, Any] | None = None,
+        deadline: Deadline | None = None,
     ) -> dict[str, Any]:
         headers = {"Authorization": f"Bearer {token}"}
-
-        response = self._session.get(
-            url,
-            headers=headers,
-            params=params,
-            timeout=self._settings.timeout_seconds,
-        )
-
-        if response.ok:
-            if not response.content:
-                return {}
-            return response.json()
-
-        message = response.text[:500]
-        raise ApiHttpError(
-            status_code=response.status_code,
-            message=f"HTTP {response.status_code}: {message}",
-        )
+        response = self._send_with_retry("GET", url, deadline, headers=headers, params=params)
+        self._record_response(url, response, len(response.content))
+        if not response.content:
+            return {}
+        return codec.loads(response.content)
 
     def post_sse_json(
         self,
@@ -102,7 +201,30 @@ class HttpClient:
         path: str,
         payload: dict[str, Any],
         on_event: Callable[[dict[str, Any]], None] | None = None,
+        deadline: Deadline | None = None,
     ) -> list[dict[str, Any]]:
+        events: list[dict[str, Any]] = []
+        try:
+            for sse_event in self.iter_sse_events(token, path, payload, deadline=deadline):
+                event_payload = sse_event.data.strip()
+                if not event_payload:
+                    continue
+                event = self._parse_sse_event(event_payload)
+                events.append(event)
+                if on_event is not None:
+                    on_event(event)
+        except StreamInterruptedError as exc:
+            exc.events = events
+            raise
+        return events
+
+    def iter_sse_events(
+        self,
+        token: str,
+        path: str,
+        payload: dict[str, Any],
+        deadline: Deadline | None = None,
+    ) -> Iterator[SseEvent]:
         url = f"{self._settings.base_url}{path}"
         headers = {
             "Authorization": f"Bearer {token}",
@@ -110,57 +232,336 @@ class HttpClient:
             "Content-Type": "application/json",
         }
 
-        response = self._session.post(
-            url,
-            headers=headers,
-            json=payload,
-            timeout=self._settings.timeout_seconds,
-            stream=True,
+        body = self._encode_body(url, payload, headers)
+        resume = StreamResume()
+        server_retry_delay: float | None = None
+        while True:
+            try:
+                response = self._send_with_retry(
+                    "POST",
+                    url,
+                    deadline,
+                    headers=headers,
+                    data=body,
+                    stream=True,
+                )
+            except (ApiHttpError, requests.exceptions.RequestException) as exc:
+                if not resume.reconnects:
+                    raise
+                # A failed resume is still an interrupted stream, so callers keep the events received so far.
+                raise StreamInterruptedError(f"Stream interrupted and reconnect failed: {exc}") from exc
+
+            decoder = SseDecoder()
+            received_bytes = 0
+            try:
+                for chunk in response.iter_content(chunk_size=None):
+                    received_bytes += len(chunk)
+                    yield from resume.fresh(decoder.feed(chunk))
+                yield from resume.fresh(decoder.flush())
+                return
+            except (requests.exceptions.ChunkedEncodingError, requests.exceptions.ConnectionError) as exc:
+                if decoder.retry is not None:
+                    server_retry_delay = decoder.retry / 1000
+                if resume.last_event_id is None or resume.reconnects >= self._settings.stream_reconnect_attempts:
+                    raise StreamInterruptedError(f"Stream interrupted: {exc}") from exc
+            finally:
+                self._record_response(url, response, received_bytes)
+                response.close()
+
+            resume.reconnect()
+            headers["Last-Event-ID"] = resume.last_event_id
+            reconnect_delay = server_retry_delay
+            if reconnect_delay is None:
+                reconnect_delay = self._retry_policy.backoff_delay(resume.reconnects)
+            if deadline is not None and not deadline.can_wait(reconnect_delay):
+                raise StreamInterruptedError("Stream interrupted and the request deadline leaves no time to reconnect")
+            time.sleep(reconnect_delay)
+
+    def _iter_response_chunks(self, url: str, response: requests.Response) -> Iterator[bytes]:
+        received_bytes = 0
+        try:
+            for chunk in response.iter_content(chunk_size=16384):
+                received_bytes += len(chunk)
+                yield chunk
+        finally:
+            self._record_response(url, response, received_bytes)
+            response.close()
+
+    def _encode_body(self, url: str, payload: dict[str, Any], headers: dict[str, str]) -> bytes:
+        body = codec.dumps(payload)
+        wire_body = body
+        encoding = self._settings.request_compression
+        if encoding != "none" and len(body) >= self._settings.request_compression_min_bytes:
+            wire_body = compress_body(body, encoding)
+            headers["Content-Encoding"] = encoding
+        self._transfer_stats.record_request(
+            self._rate_limiter.resolve_endpoint(url),
+            len(body),
+            len(wire_body),
         )
+        return wire_body
 
-        if not response.ok:
-            message = response.text[:500]
-            raise ApiHttpError(
-                status_code=response.status_code,
-                message=f"HTTP {response.status_code}: {message}",
-            )
+    def _record_response(self, url: str, response: requests.Response, body_bytes: int) -> None:
+        wire_bytes = body_bytes
+        tell = getattr(response.raw, "tell", None)
+        if callable(tell):
+            try:
+                wire_bytes = int(tell())
+            except (OSError, ValueError):
+                pass
+        self._transfer_stats.record_response(
+            self._rate_limiter.resolve_endpoint(url),
+            body_bytes,
+            wire_bytes,
+        )
 
-        events: list[dict[str, Any]] = []
-        data_lines: list[str] = []
-
-        for raw_line in response.iter_lines(decode_unicode=True):
-            line = (raw_line or "").strip()
-
-            if not line:
-                if data_lines:
-                    event_payload = "\n".join(data_lines).strip()
-                    data_lines.clear()
-                    if event_payload:
-                        event = self._parse_sse_event(event_payload)
-                        events.append(event)
-                        if on_event is not None:
-                            on_event(event)
-                continue
-
-            if line.startswith("data:"):
-                data_lines.append(line[5:].strip())
-
-        if data_lines:
-            event_payload = "\n".join(data_lines).strip()
-            if event_payload:
-                event = self._parse_sse_event(event_payload)
-                events.append(event)
-                if on_event is not None:
-                    on_event(event)
+    def _send_hedged(
+        self,
+        endpoint: str,
+        url: str,
+        headers: dict[str, str],
+        body: bytes,
+        deadline: Deadline | None,
+    ) -> requests.Response:
+        executor = self._get_hedge_executor()
+        self._hedging.record_primary(endpoint)
+        primary_cancel = RequestCancellation()
+        primary = executor.submit(self._send_timed, endpoint, url, dict(headers), body, deadline, True, primary_cancel)
+        hedge_delay = self._hedging.delay_for(endpoint)
+        try:
+            return primary.result(timeout=hedge_delay)
+        except FutureTimeoutError:
+            pass
 
-        return events
+        if (deadline is not None and deadline.expired()) or not self._hedging.try_acquire_hedge(endpoint):
+            return primary.result()
+
+        hedge_cancel = RequestCancellation()
+        hedge = executor.submit(self._send_timed, endpoint, url, dict(headers), body, deadline, False, hedge_cancel)
+        done, _ = wait((primary, hedge), return_when=FIRST_COMPLETED)
+        first = primary if primary in done else hedge
+        second = hedge if first is primary else primary
+
+        if first.exception() is None:
+            # The loser is aborted mid-request, releasing its concurrency permit and connection.
+            (hedge_cancel if first is primary else primary_cancel).cancel()
+            self._discard_response(second)
+            winner = first
+        elif second.exception() is None:
+            winner = second
+        else:
+            raise primary.exception()
+
+        if winner is hedge:
+            self._hedging.record_hedge_win(endpoint)
+        return winner.result()
+
+    def _send_timed(
+        self,
+        endpoint: str,
+        url: str,
+        headers: dict[str, str],
+        body: bytes,
+        deadline: Deadline | None,
+        is_primary: bool,
+        cancel: RequestCancellation,
+    ) -> requests.Response:
+        started = time.monotonic()
+        # The body is read here, and closing the streamed response hands its concurrency permit back.
+        response = self._send_with_retry("POST", url, deadline, cancel=cancel, headers=headers, data=body, stream=True)
+        try:
+            response.content
+        finally:
+            response.close()
+        if is_primary:
+            self._hedging.record_latency(endpoint, time.monotonic() - started)
+        return response
+
+    @staticmethod
+    def _discard_response(future: Future) -> None:
+        if future.cancel():
+            return
+
+        def close_response(completed: Future) -> None:
+            if not completed.cancelled() and completed.exception() is None:
+                completed.result().close()
+
+        future.add_done_callback(close_response)
+
+    def _get_hedge_executor(self) -> ThreadPoolExecutor:
+        with self._hedge_executor_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=max(4, 2 * self._settings.max_concurrency),
+                    thread_name_prefix="copilot-hedge",
+                )
+            return self._hedge_executor
+
+    def _send_with_retry(
+        self,
+        method: str,
+        url: str,
+        deadline: Deadline | None = None,
+        cancel: RequestCancellation | None = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        endpoint = self._rate_limiter.resolve_endpoint(url)
+        breaker = self._circuit_breakers.get(endpoint)
+        if deadline is not None:
+            deadline.timeout(self._settings.timeout_seconds)
+        if not breaker.allow_request():
+            raise CircuitOpenError(endpoint)
+
+        # The breaker sees one outcome per logical call (its final attempt), so retries of a
+        # single failing call do not fill the failure window on their own.
+        failed: bool | None = None
+        started = time.monotonic()
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                if cancel is not None and cancel.is_set():
+                    raise RequestCancelledError()
+                try:
+                    with (
+                        self._rate_limiter.slot(url, deadline.remaining() if deadline is not None else None) as slot,
+                        cancel.scope() if cancel else nullcontext(),
+                    ):
+                        # Waiting for a rate-limit token or concurrency permit comes out of the same budget.
+                        timeout: float = self._settings.timeout_seconds
+                        if deadline is not None:
+                            timeout = deadline.timeout(timeout)
+                        response = self._session.request(
+                            method,
+                            url,
+                            timeout=timeout,
+                            **kwargs,
+                        )
+                        slot.status_code = response.status_code
+                        if kwargs.get("stream") and response.ok:
+                            # A streamed body is still in flight, so its permit is released when it closes.
+                            slot.hold()
+                            _release_on_close(response, slot.release)
+                except requests.exceptions.RequestException as exc:
+                    if cancel is not None and cancel.is_set():
+                        raise RequestCancelledError() from exc
+                    failed = True
+                    raise
+
+                failed = response.status_code >= 500
+                if cancel is not None and cancel.is_set():
+                    response.close()
+                    raise RequestCancelledError()
+
+                if response.status_code == 429 and self._throttle_listener is not None:
+                    authorization = str((kwargs.get("headers") or {}).get("Authorization", ""))
+                    self._throttle_listener(
+                        authorization.removeprefix("Bearer "),
+                        server_requested_delay(response.headers),
+                    )
+
+                if response.ok:
+                    return response
+
+                delay = self._retry_policy.next_delay(
+                    attempt,
+                    response.status_code,
+                    response.headers,
+                    time.monotonic() - started,
+                )
+                if delay is None or (deadline is not None and not deadline.can_wait(delay)):
+                    raise self._build_error(response)
+
+                response.close()
+                if cancel is None:
+                    time.sleep(delay)
+                elif cancel.wait(delay):
+                    raise RequestCancelledError()
+        finally:
+            if failed is None:
+                breaker.release()
+            elif failed:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+    @staticmethod
+    def _build_error(response: requests.Response) -> ApiHttpError:
+        message = response.text[:500]
+        return ApiHttpError(
+            status_code=response.status_code,
+            message=f"HTTP {response.status_code}: {message}",
+        )
 
     @staticmethod
     def _parse_sse_event(event_payload: str) -> dict[str, Any]:
         try:
-            parsed = requests.models.complexjson.loads(event_payload)
+            parsed = codec.loads(event_payload)
             if isinstance(parsed, dict):
                 return parsed
             return {"value": parsed}
         except Exception:
             return {"raw": event_payload}
+
+
+class StreamResume:
+    # Follows one logical SSE stream across reconnects: the Last-Event-ID to send, and which events
+    # a resumed connection replays.
+    def __init__(self):
+        self.last_event_id: str | None = None
+        self.reconnects = 0
+        self._delivered_ids: set[str] = set()
+        self._checked = True
+        self._replaying = False
+
+    def reconnect(self) -> None:
+        self.reconnects += 1
+        # The prompt is POSTed again, so the new stream must prove it continues the old one.
+        self._checked = False
+        # Only a resumed stream can replay events, and only events with their own id line can be
+        # recognised as replays; the first new id ends the replay.
+        self._replaying = True
+
+    def fresh(self, events: Iterable[SseEvent]) -> Iterator[SseEvent]:
+        for event in events:
+            if not self._checked:
+                self._check_resumed(event)
+                self._checked = True
+            if self._replaying and event.has_own_id:
+                if _already_delivered(event.id, self.last_event_id, self._delivered_ids):
+                    continue
+                self._replaying = False
+            if event.id is not None:
+                self.last_event_id = event.id
+            if event.has_own_id:
+                self._delivered_ids.add(event.id)
+            yield event
+
+    def _check_resumed(self, event: SseEvent) -> None:
+        # A server that honours Last-Event-ID starts at (or just after) that event; one that ignores it
+        # starts a new turn from its first event.
+        if event.id == self.last_event_id:
+            return
+        if event.id is None or _already_delivered(event.id, self.last_event_id, self._delivered_ids):
+            raise StreamInterruptedError("Stream interrupted and the server did not resume from Last-Event-ID")
+
+
+def _release_on_close(response: requests.Response | Http2Response, release: Callable[[], None]) -> None:
+    close = response.close
+
+    def close_and_release() -> None:
+        try:
+            close()
+        finally:
+            release()
+
+    response.close = close_and_release
+
+
+def _already_delivered(event_id: str | None, last_event_id: str | None, delivered_ids: set[str]) -> bool:
+    if event_id is None or last_event_id is None:
+        return False
+    if event_id in delivered_ids:
+        return True
+    # Numeric ids are ordered, so an id at or before the last one was delivered even if it was never seen.
+    return event_id.isdigit() and last_event_id.isdigit() and int(event_id) <= int(last_event_id)
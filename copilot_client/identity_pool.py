@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import threading
+import time
+from typing import Callable
+
+
+IDENTITY_SELECTIONS = ("first", "round_robin", "least_throttled")
+
+
+@dataclass(frozen=True)
+class IdentityStats:
+    account_id: str
+    tokens_issued: int
+    throttled_responses: int
+    throttled_for_seconds: float
+
+
+class IdentityPool:
+    def __init__(
+        self,
+        strategy: str = "round_robin",
+        default_throttle_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if strategy not in IDENTITY_SELECTIONS:
+            raise ValueError(f"strategy must be one of: {', '.join(IDENTITY_SELECTIONS)}")
+        self._strategy = strategy
+        self._default_throttle_seconds = default_throttle_seconds
+        self._clock = clock
+        self._next_index = 0
+        self._issued: dict[str, int] = {}
+        self._throttled: dict[str, int] = {}
+        self._last_throttled_at: dict[str, float] = {}
+        self._throttled_until: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def select(self, account_ids: list[str]) -> str:
+        if not account_ids:
+            raise ValueError("account_ids must not be empty")
+
+        with self._lock:
+            now = self._clock()
+            # Identities still inside a server-requested back-off window are only used when every one is.
+            available = [
+                account_id for account_id in account_ids if self._throttled_until.get(account_id, 0.0) <= now
+            ] or account_ids
+
+            if self._strategy == "first":
+                selected = available[0]
+            elif self._strategy == "least_throttled":
+                rotation = self._next_index % len(available)
+                self._next_index += 1
+                rotated = available[rotation:] + available[:rotation]
+                selected = min(rotated, key=lambda account_id: self._last_throttled_at.get(account_id, float("-inf")))
+            else:
+                selected = available[self._next_index % len(available)]
+                self._next_index += 1
+
+            self._issued[selected] = self._issued.get(selected, 0) + 1
+            return selected
+
+    def record_throttle(self, account_id: str, retry_after_seconds: float | None = None) -> None:
+        with self._lock:
+            now = self._clock()
+            back_off = self._default_throttle_seconds if retry_after_seconds is None else retry_after_seconds
+            self._throttled[account_id] = self._throttled.get(account_id, 0) + 1
+            self._last_throttled_at[account_id] = now
+            self._throttled_until[account_id] = max(self._throttled_until.get(account_id, 0.0), now + back_off)
+
+    def forget(self) -> None:
+        with self._lock:
+            self._issued.clear()
+            self._throttled.clear()
+            self._last_throttled_at.clear()
+            self._throttled_until.clear()
+
+    def stats(self) -> list[IdentityStats]:
+        with self._lock:
+            now = self._clock()
+            account_ids = sorted(set(self._issued) | set(self._throttled))
+            return [
+                IdentityStats(
+                    account_id=account_id,
+                    tokens_issued=self._issued.get(account_id, 0),
+                    throttled_responses=self._throttled.get(account_id, 0),
+                    throttled_for_seconds=round(max(0.0, self._throttled_until.get(account_id, 0.0) - now), 1),
+                )
+                for account_id in account_ids
+            ]
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import codecs
+import re
+from typing import Any, Callable, Iterable, Iterator
+
+from copilot_client import codec
+
+
+_STRUCTURAL = re.compile(r'["\[\]{}:]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class StreamedJsonArray:
+    def __init__(
+        self,
+        chunks: Iterable[bytes],
+        array_key: str,
+        on_close: Callable[[], None] | None = None,
+    ):
+        self._chunks = chunks
+        self._array_key = array_key
+        self._on_close = on_close
+        self._envelope: dict[str, Any] | None = None
+        self._consumed = False
+        self._closed = False
+
+    @property
+    def envelope(self) -> dict[str, Any]:
+        if self._envelope is None:
+            raise RuntimeError("Envelope is available after all items have been consumed")
+        return self._envelope
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._consumed:
+            raise RuntimeError("Streamed response can only be iterated once")
+        self._consumed = True
+
+        scanner = _ArrayScanner(self._array_key)
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        for chunk in self._chunks:
+            yield from scanner.feed(decoder.decode(chunk))
+        yield from scanner.feed(decoder.decode(b"", final=True))
+        self._envelope = scanner.finish()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        # A chunk generator that was never started skips its finally block, so the owner is told directly.
+        close_chunks = getattr(self._chunks, "close", None)
+        if close_chunks is not None:
+            close_chunks()
+        if self._on_close is not None:
+            self._on_close()
+
+    def __enter__(self) -> StreamedJsonArray:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class _ArrayScanner:
+    def __init__(self, array_key: str):
+        self._array_key = array_key
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._state = "envelope"
+        self._in_string = False
+        self._string_start = 0
+        self._last_key: str | None = None
+        self._key_matched = False
+        self._array_depth = 0
+        self._element_start = 0
+        self._segment_start = 0
+        self._envelope_parts: list[str] = []
+
+    def feed(self, text: str) -> Iterator[Any]:
+        if not text:
+            return
+        self._text += text
+        data = self._text
+        pos = self._pos
+
+        while True:
+            if self._in_string:
+                match = _STRING_SPECIAL.search(data, pos)
+                if match is None:
+                    pos = len(data)
+                    break
+                if match.group() == "\\":
+                    if match.end() >= len(data):
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                self._in_string = False
+                pos = match.end()
+                if self._state == "envelope" and self._depth == 1:
+                    self._last_key = data[self._string_start : match.start()]
+                continue
+
+            match = _STRUCTURAL.search(data, pos)
+            if match is None:
+                pos = len(data)
+                break
+
+            char = match.group()
+            pos = match.end()
+            if char == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif char == ":":
+                if self._state == "envelope" and self._depth == 1:
+                    self._key_matched = self._last_key == self._array_key
+            elif char in "[{":
+                if self._state == "envelope" and self._depth == 1 and char == "[" and self._key_matched:
+                    self._envelope_parts.append(data[self._segment_start : pos])
+                    self._state = "array"
+                    self._array_depth = self._depth + 1
+                elif self._state == "array" and self._depth == self._array_depth:
+                    self._state = "element"
+                    self._element_start = match.start()
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._state == "element" and self._depth == self._array_depth:
+                    self._state = "array"
+                    yield codec.loads(data[self._element_start : pos])
+                elif self._state == "array" and self._depth == self._array_depth - 1:
+                    self._state = "after"
+                    self._segment_start = match.start()
+
+        self._pos = pos
+        self._compact()
+
+    def finish(self) -> dict[str, Any]:
+        if self._state in ("envelope", "after"):
+            self._envelope_parts.append(self._text[self._segment_start :])
+        envelope_text = "".join(self._envelope_parts).strip()
+        if not envelope_text:
+            return {}
+        envelope = codec.loads(envelope_text)
+        if not isinstance(envelope, dict):
+            return {"value": envelope}
+        return envelope
+
+    def _compact(self) -> None:
+        keep_from = self._pos
+        if self._in_string:
+            keep_from = min(keep_from, self._string_start - 1)
+        if self._state == "element":
+            keep_from = min(keep_from, self._element_start)
+        if self._state in ("envelope", "after"):
+            self._envelope_parts.append(self._text[self._segment_start : keep_from])
+            self._segment_start = keep_from
+
+        if keep_from <= 0:
+            return
+        self._text = self._text[keep_from:]
+        self._pos -= keep_from
+        self._string_start -= keep_from
+        self._element_start -= keep_from
+        self._segment_start -= keep_from
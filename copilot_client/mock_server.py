@@ -0,0 +1,475 @@
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import gzip
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import math
+import random
+import re
+import threading
+import time
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+import uuid
+import zlib
+
+from copilot_client import codec
+
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal", "exponential")
+
+Response = tuple[int, dict[str, str], Any]
+
+
+@dataclass(frozen=True)
+class MockServerConfig:
+    latency_distribution: str = "lognormal"
+    latency_ms: float = 80.0
+    latency_spread: float = 0.5
+    throttle_rate: float = 0.0
+    error_rate: float = 0.0
+    retry_after_seconds: float = 1.0
+    search_hits: int = 25
+    search_pages: int = 3
+    retrieval_hits: int = 10
+    extract_bytes: int = 512
+    chat_response_bytes: int = 2000
+    sse_events: int = 20
+    sse_interval_ms: float = 20.0
+    stream_drop_rate: float = 0.0
+    stream_resume: bool = True
+    gzip_responses: bool = True
+    seed: int | None = None
+
+
+class LatencyModel:
+    def __init__(self, distribution: str, median_ms: float, spread: float, random_source: random.Random):
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"distribution must be one of: {', '.join(LATENCY_DISTRIBUTIONS)}")
+        self._distribution = distribution
+        self._median_seconds = median_ms / 1000
+        self._spread = spread
+        self._random = random_source
+
+    def sample(self) -> float:
+        if self._median_seconds <= 0:
+            return 0.0
+        if self._distribution == "uniform":
+            low = self._median_seconds * max(0.0, 1 - self._spread)
+            high = self._median_seconds * (1 + self._spread)
+            return self._random.uniform(low, high)
+        if self._distribution == "lognormal":
+            return self._random.lognormvariate(math.log(self._median_seconds), self._spread)
+        if self._distribution == "exponential":
+            # Scaled so the median matches latency_ms like the other distributions.
+            return self._random.expovariate(math.log(2) / self._median_seconds)
+        return self._median_seconds
+
+
+class MockGraphServer:
+    def __init__(self, config: MockServerConfig | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or MockServerConfig()
+        self._random = random.Random(self.config.seed)
+        self._random_lock = threading.Lock()
+        self._latency = LatencyModel(
+            self.config.latency_distribution,
+            self.config.latency_ms,
+            self.config.latency_spread,
+            self._random,
+        )
+        self._conversations: dict[str, int] = {}
+        self._counters: dict[str, int] = {}
+        self._state_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _MockGraphHandler)
+        self._server.daemon_threads = True
+        self._server.mock = self
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/beta"
+
+    def __enter__(self) -> "MockGraphServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-graph", daemon=True)
+        self._thread.start()
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self) -> dict[str, int]:
+        with self._state_lock:
+            return dict(self._counters)
+
+    def count(self, name: str) -> None:
+        with self._state_lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+
+    def random(self) -> float:
+        with self._random_lock:
+            return self._random.random()
+
+    def latency(self) -> float:
+        with self._random_lock:
+            return self._latency.sample()
+
+    def injected_fault(self) -> Response | None:
+        roll = self.random()
+        retry_after = {"Retry-After": f"{self.config.retry_after_seconds:g}"}
+        if roll < self.config.throttle_rate:
+            self.count("throttled")
+            return 429, retry_after, _error_body("TooManyRequests", "Mock throttling")
+        if roll < self.config.throttle_rate + self.config.error_rate:
+            self.count("failed")
+            return 503, retry_after, _error_body("ServiceUnavailable", "Mock server error")
+        return None
+
+    def create_conversation(self) -> dict[str, Any]:
+        conversation_id = str(uuid.uuid4())
+        with self._state_lock:
+            self._conversations[conversation_id] = 0
+        return _conversation(conversation_id, 0, [])
+
+    def chat_turn(self, conversation_id: str) -> int | None:
+        with self._state_lock:
+            if conversation_id not in self._conversations:
+                return None
+            self._conversations[conversation_id] += 1
+            return self._conversations[conversation_id]
+
+    def conversation_turns(self, conversation_id: str) -> int | None:
+        with self._state_lock:
+            return self._conversations.get(conversation_id)
+
+    def dispatch(self, method: str, path: str, query: dict[str, list[str]], body: Any, host: str) -> Response:
+        match = re.search(r"/copilot/conversations/([^/]+)/chat$", path)
+        if match and method == "POST":
+            turn = self.chat_turn(match.group(1))
+            if turn is None:
+                return 404, {}, _error_body("NotFound", "Conversation not found")
+            prompt = _prompt_text(body)
+            return 200, {}, _conversation(match.group(1), turn, [_response_message(prompt, self.response_text())])
+
+        match = re.search(r"/copilot/conversations/([^/]+)$", path)
+        if match and method == "GET":
+            turns = self.conversation_turns(match.group(1))
+            if turns is None:
+                return 404, {}, _error_body("NotFound", "Conversation not found")
+            return 200, {}, _conversation(match.group(1), turns, [_response_message("", self.response_text())])
+
+        if re.search(r"/copilot/conversations$", path) and method == "POST":
+            return 201, {}, self.create_conversation()
+
+        match = re.search(r"^(.*)/copilot/search$", path)
+        if match and method in ("GET", "POST"):
+            page = int((query.get("$skiptoken") or ["0"])[0] or 0)
+            return 200, {}, self._search_page(page, f"http://{host}{match.group(1)}/copilot/search")
+
+        if re.search(r"/copilot/retrieval$", path) and method == "POST":
+            return 200, {}, self._retrieval_response()
+
+        if re.search(r"/\$batch$", path) and method == "POST":
+            return 200, {}, self._batch_response(body, host)
+
+        return 404, {}, _error_body("NotFound", f"No mock route for {method} {path}")
+
+    def _search_page(self, page: int, search_url: str) -> dict[str, Any]:
+        preview = _filler(self.config.extract_bytes)
+        first = page * self.config.search_hits
+        result: dict[str, Any] = {
+            "@odata.context": "https://graph.microsoft.com/beta/$metadata#microsoft.graph.copilot.searchResponse",
+            "totalCount": self.config.search_hits * self.config.search_pages,
+            "searchHits": [
+                {
+                    "webUrl": f"https://contoso.sharepoint.com/sites/Mock/Shared Documents/Document {index}.docx",
+                    "preview": preview,
+                    "resourceType": "driveItem",
+                    "resourceMetadata": {"title": f"Document {index}", "author": "Mock Author"},
+                }
+                for index in range(first, first + self.config.search_hits)
+            ],
+        }
+        if page + 1 < self.config.search_pages:
+            result["@odata.nextLink"] = f"{search_url}?$skiptoken={page + 1}"
+        return result
+
+    def _retrieval_response(self) -> dict[str, Any]:
+        text = _filler(self.config.extract_bytes)
+        return {
+            "retrievalHits": [
+                {
+                    "webUrl": f"https://contoso.sharepoint.com/sites/Mock/Pages/Page{index}.aspx",
+                    "resourceType": "listItem",
+                    "extracts": [{"text": text, "relevanceScore": round(1 - index / 100, 3)}],
+                    "sensitivityLabel": {"sensitivityLabelId": "mock", "displayName": "General"},
+                }
+                for index in range(self.config.retrieval_hits)
+            ]
+        }
+
+    def _batch_response(self, body: Any, host: str) -> dict[str, Any]:
+        responses = []
+        for request in (body or {}).get("requests", []):
+            response = self.injected_fault()
+            if response is None:
+                url = urlsplit(str(request.get("url", "")))
+                response = self.dispatch(
+                    str(request.get("method", "GET")).upper(),
+                    url.path,
+                    parse_qs(url.query),
+                    request.get("body"),
+                    host,
+                )
+            status, headers, item_body = response
+            responses.append({"id": request.get("id"), "status": status, "headers": headers, "body": item_body})
+        return {"responses": responses}
+
+    def response_text(self) -> str:
+        return _filler(self.config.chat_response_bytes)
+
+
+class _MockGraphHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MockGraph/1.0"
+    # Headers and body go out in separate writes; with Nagle on, delayed ACKs add ~40ms per response.
+    disable_nagle_algorithm = True
+
+    @property
+    def mock(self) -> MockGraphServer:
+        return self.server.mock
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+    def do_HEAD(self) -> None:
+        self._handle("HEAD")
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _handle(self, method: str) -> None:
+        url = urlsplit(self.path)
+        body = self._read_body()
+        self.mock.count("requests")
+        time.sleep(self.mock.latency())
+
+        fault = self.mock.injected_fault()
+        if fault is not None:
+            self._send(*fault)
+            return
+
+        match = re.search(r"/copilot/conversations/([^/]+)/chatOverStream$", url.path)
+        if match and method == "POST":
+            last_event_id = self.headers.get("Last-Event-ID") if self.mock.config.stream_resume else None
+            self._stream_chat(match.group(1), _prompt_text(body), last_event_id)
+            return
+
+        # HEAD answers like GET without a body (the client's connection warm-up uses it).
+        route_method = "GET" if method == "HEAD" else method
+        response = self.mock.dispatch(route_method, url.path, parse_qs(url.query), body, self.headers.get("Host", ""))
+        self._send(*response, include_body=method != "HEAD")
+
+    def _read_body(self) -> Any:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        encoding = (self.headers.get("Content-Encoding") or "").lower()
+        if encoding == "gzip":
+            raw = gzip.decompress(raw)
+        elif encoding == "deflate":
+            raw = zlib.decompress(raw)
+        return codec.loads(raw) if raw else None
+
+    def _send(
+        self,
+        status: int,
+        headers: dict[str, str],
+        body: dict[str, Any] | None,
+        include_body: bool = True,
+    ) -> None:
+        payload = codec.dumps(body) if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if payload and self.mock.config.gzip_responses and "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            payload = gzip.compress(payload, compresslevel=5)
+            self.send_header("Content-Encoding", "gzip")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if include_body:
+            self.wfile.write(payload)
+
+    def _stream_chat(self, conversation_id: str, prompt: str, last_event_id: str | None) -> None:
+        # A resumed stream (Last-Event-ID) continues the same turn after the last delivered event.
+        resume_after = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+        if resume_after is None:
+            turn = self.mock.chat_turn(conversation_id)
+        else:
+            turn = self.mock.conversation_turns(conversation_id)
+            self.mock.count("stream_resumed")
+        if turn is None:
+            self._send(404, {}, _error_body("NotFound", "Conversation not found"))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        text = self.mock.response_text()
+        event_count = max(1, self.mock.config.sse_events)
+        first_index = 0 if resume_after is None else resume_after + 1
+        # Only fresh streams are cut, so every dropped stream can complete on its first resume.
+        drop_after = None
+        if resume_after is None and event_count > 1 and self.mock.random() < self.mock.config.stream_drop_rate:
+            drop_after = event_count // 2
+        for index in range(first_index, event_count):
+            partial = text[: max(1, len(text) * (index + 1) // event_count)]
+            event = _conversation(conversation_id, turn, [_response_message(prompt, partial)])
+            self._write_chunk(f"id: {index}\ndata: ".encode("utf-8") + codec.dumps(event) + b"\n\n")
+            if index == drop_after:
+                self.mock.count("stream_dropped")
+                # Closing without the terminating chunk looks like a dropped connection to the client.
+                self.close_connection = True
+                return
+            if index + 1 < event_count:
+                time.sleep(self.mock.config.sse_interval_ms / 1000)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+def _conversation(conversation_id: str, turn_count: int, messages: list[dict[str, Any]]) -> dict[str, Any]:
+    return {
+        "id": conversation_id,
+        "createdDateTime": _now(),
+        "displayName": "Mock conversation",
+        "state": "active",
+        "turnCount": turn_count,
+        "messages": messages,
+    }
+
+
+def _response_message(prompt: str, text: str) -> dict[str, Any]:
+    return {
+        "@odata.type": "#microsoft.graph.copilotConversationResponseMessage",
+        "id": str(uuid.uuid4()),
+        "text": text,
+        "createdDateTime": _now(),
+        "adaptiveCards": [],
+        "attributions": [],
+        "sensitivityLabel": {"sensitivityLabelId": None, "displayName": None},
+        "requestPrompt": prompt,
+    }
+
+
+def _prompt_text(body: Any) -> str:
+    if isinstance(body, dict) and isinstance(body.get("message"), dict):
+        return str(body["message"].get("text", ""))
+    return ""
+
+
+def _error_body(code: str, message: str) -> dict[str, Any]:
+    return {"error": {"code": code, "message": message}}
+
+
+def _filler(size: int) -> str:
+    sentence = "The quarterly report shows steady growth across all regions. "
+    return (sentence * (size // len(sentence) + 1))[:size]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def main(argv: list[str] | None = None) -> None:
+    defaults = MockServerConfig()
+    parser = argparse.ArgumentParser(
+        prog="copilot-mock-server",
+        description="Local stand-in for the Microsoft Graph Copilot APIs. Point COPILOT_BASE_URL at the printed URL.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-distribution", choices=LATENCY_DISTRIBUTIONS, default=defaults.latency_distribution)
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="Median server latency")
+    parser.add_argument(
+        "--latency-spread",
+        type=float,
+        default=defaults.latency_spread,
+        help="Lognormal sigma, or +/- fraction of the median for uniform",
+    )
+    parser.add_argument("--throttle-rate", type=float, default=defaults.throttle_rate, help="Fraction of 429s")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Fraction of 503s")
+    parser.add_argument("--retry-after-seconds", type=float, default=defaults.retry_after_seconds)
+    parser.add_argument("--search-hits", type=int, default=defaults.search_hits, help="Hits per search page")
+    parser.add_argument("--search-pages", type=int, default=defaults.search_pages)
+    parser.add_argument("--retrieval-hits", type=int, default=defaults.retrieval_hits)
+    parser.add_argument("--extract-bytes", type=int, default=defaults.extract_bytes)
+    parser.add_argument("--chat-response-bytes", type=int, default=defaults.chat_response_bytes)
+    parser.add_argument("--sse-events", type=int, default=defaults.sse_events)
+    parser.add_argument("--sse-interval-ms", type=float, default=defaults.sse_interval_ms)
+    parser.add_argument(
+        "--stream-drop-rate",
+        type=float,
+        default=defaults.stream_drop_rate,
+        help="Fraction of chat streams cut mid-way (resumable with Last-Event-ID)",
+    )
+    parser.add_argument(
+        "--no-stream-resume",
+        action="store_true",
+        help="Ignore Last-Event-ID and answer a reconnect as a new chat turn",
+    )
+    parser.add_argument("--no-gzip", action="store_true", help="Never compress responses")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    config = MockServerConfig(
+        latency_distribution=args.latency_distribution,
+        latency_ms=args.latency_ms,
+        latency_spread=args.latency_spread,
+        throttle_rate=args.throttle_rate,
+        error_rate=args.error_rate,
+        retry_after_seconds=args.retry_after_seconds,
+        search_hits=args.search_hits,
+        search_pages=args.search_pages,
+        retrieval_hits=args.retrieval_hits,
+        extract_bytes=args.extract_bytes,
+        chat_response_bytes=args.chat_response_bytes,
+        sse_events=args.sse_events,
+        sse_interval_ms=args.sse_interval_ms,
+        stream_drop_rate=args.stream_drop_rate,
+        stream_resume=not args.no_stream_resume,
+        gzip_responses=not args.no_gzip,
+        seed=args.seed,
+    )
+    server = MockGraphServer(config, host=args.host, port=args.port)
+    print(f"Mock Graph server listening; set COPILOT_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
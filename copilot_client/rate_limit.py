@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+import threading
+import time
+from typing import AsyncIterator, Callable, Iterator
+from urllib.parse import urlparse
+
+from copilot_client.config import AppSettings
+from copilot_client.deadline import DeadlineExceededError
+
+
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+@dataclass(frozen=True)
+class EndpointLimitStats:
+    endpoint: str
+    concurrency_limit: float
+    in_flight: int
+    throttled_count: int
+    success_count: int
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        rate_per_second: float,
+        burst: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._rate = rate_per_second
+        self._capacity = float(max(1, burst))
+        self._tokens = self._capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            self._tokens -= 1.0
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self._rate
+
+
+class AdaptiveConcurrencyLimiter:
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        decrease_factor: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._min_limit = max(1, min_limit)
+        self._max_limit = max(self._min_limit, max_limit)
+        self._limit = float(min(self._max_limit, max(self._min_limit, initial_limit)))
+        self._decrease_factor = decrease_factor
+        self._clock = clock
+        self._last_decrease_at = float("-inf")
+        self._in_flight = 0
+        self._throttled_count = 0
+        self._success_count = 0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> float:
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def throttled_count(self) -> int:
+        return self._throttled_count
+
+    @property
+    def success_count(self) -> int:
+        return self._success_count
+
+    def acquire(self, timeout: float | None = None) -> float:
+        wait_until = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                remaining = None if wait_until is None else wait_until - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise DeadlineExceededError("Deadline exceeded waiting for a concurrency permit")
+                self._condition.wait(remaining)
+            self._in_flight += 1
+            return self._clock()
+
+    def try_acquire(self) -> float | None:
+        with self._condition:
+            if self._in_flight >= int(self._limit):
+                return None
+            self._in_flight += 1
+            return self._clock()
+
+    async def acquire_async(self, timeout: float | None = None) -> float:
+        started_at = self.try_acquire()
+        if started_at is not None:
+            return started_at
+        # The limiter is shared with threaded callers, so waiting happens on a worker thread. A permit
+        # granted after the waiting task was cancelled is handed straight back.
+        waiter = asyncio.get_running_loop().run_in_executor(None, self.acquire, timeout)
+        try:
+            return await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            waiter.add_done_callback(
+                lambda done: done.cancelled() or done.exception() is not None or self.release(None)
+            )
+            raise
+
+    def release(self, status_code: int | None, started_at: float | None = None) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            if status_code in THROTTLE_STATUS_CODES:
+                self._throttled_count += 1
+                # Requests sent before the last decrease belong to the same throttling episode
+                # (about one round trip), so a burst of 429s only halves the limit once.
+                if started_at is None or started_at >= self._last_decrease_at:
+                    self._limit = max(float(self._min_limit), self._limit * self._decrease_factor)
+                    self._last_decrease_at = self._clock()
+            elif status_code is not None and status_code < 500:
+                self._success_count += 1
+                self._limit = min(float(self._max_limit), self._limit + 1.0 / self._limit)
+            self._condition.notify_all()
+
+
+class EndpointRateLimiter:
+    def __init__(
+        self,
+        endpoint_paths: dict[str, str],
+        rate_per_second: float,
+        burst: int,
+        initial_concurrency: int,
+        max_concurrency: int,
+    ):
+        self._endpoint_paths = sorted(endpoint_paths.items(), key=lambda item: len(item[1]), reverse=True)
+        self._rate_per_second = rate_per_second
+        self._burst = burst
+        self._initial_concurrency = initial_concurrency
+        self._max_concurrency = max_concurrency
+        self._buckets: dict[str, TokenBucket] = {}
+        self._limiters: dict[str, AdaptiveConcurrencyLimiter] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def from_settings(settings: AppSettings) -> "EndpointRateLimiter":
+        return EndpointRateLimiter(
+            endpoint_paths={
+                "chat": settings.chat_path,
+                "search": settings.search_path,
+                "retrieval": settings.retrieval_path,
+                "batch": settings.batch_path,
+            },
+            rate_per_second=settings.rate_limit_per_second,
+            burst=settings.rate_limit_burst,
+            initial_concurrency=settings.initial_concurrency,
+            max_concurrency=settings.max_concurrency,
+        )
+
+    def resolve_endpoint(self, url: str) -> str:
+        path = urlparse(url).path
+        for endpoint, endpoint_path in self._endpoint_paths:
+            if endpoint_path in path:
+                return endpoint
+        return "default"
+
+    @contextmanager
+    def slot(self, url: str, timeout: float | None = None) -> Iterator["_Slot"]:
+        endpoint = self.resolve_endpoint(url)
+        bucket, limiter = self._get_endpoint_state(endpoint)
+
+        wait_until = None if timeout is None else time.monotonic() + timeout
+        delay = self._token_delay(bucket, wait_until)
+        if delay > 0:
+            time.sleep(delay)
+
+        started_at = limiter.acquire(None if wait_until is None else wait_until - time.monotonic())
+        slot = _Slot(lambda status_code: limiter.release(status_code, started_at))
+        try:
+            yield slot
+        finally:
+            if not slot.held:
+                slot.release()
+
+    @asynccontextmanager
+    async def async_slot(self, url: str, timeout: float | None = None) -> AsyncIterator["_Slot"]:
+        # Same token bucket and concurrency permits as slot(), so asyncio and threaded callers share limits.
+        endpoint = self.resolve_endpoint(url)
+        bucket, limiter = self._get_endpoint_state(endpoint)
+
+        wait_until = None if timeout is None else time.monotonic() + timeout
+        delay = self._token_delay(bucket, wait_until)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        started_at = await limiter.acquire_async(None if wait_until is None else wait_until - time.monotonic())
+        slot = _Slot(lambda status_code: limiter.release(status_code, started_at))
+        try:
+            yield slot
+        finally:
+            if not slot.held:
+                slot.release()
+
+    @staticmethod
+    def _token_delay(bucket: TokenBucket | None, wait_until: float | None) -> float:
+        if bucket is None:
+            return 0.0
+        delay = bucket.reserve()
+        if wait_until is not None and time.monotonic() + delay >= wait_until:
+            raise DeadlineExceededError("Deadline exceeded waiting for a rate-limit token")
+        return delay
+
+    def stats(self) -> list[EndpointLimitStats]:
+        with self._lock:
+            limiters = list(self._limiters.items())
+        return [
+            EndpointLimitStats(
+                endpoint=endpoint,
+                concurrency_limit=round(limiter.limit, 2),
+                in_flight=limiter.in_flight,
+                throttled_count=limiter.throttled_count,
+                success_count=limiter.success_count,
+            )
+            for endpoint, limiter in limiters
+        ]
+
+    def _get_endpoint_state(self, endpoint: str) -> tuple[TokenBucket | None, AdaptiveConcurrencyLimiter]:
+        with self._lock:
+            limiter = self._limiters.get(endpoint)
+            if limiter is None:
+                limiter = AdaptiveConcurrencyLimiter(
+                    initial_limit=self._initial_concurrency,
+                    max_limit=self._max_concurrency,
+                )
+                self._limiters[endpoint] = limiter
+                if self._rate_per_second > 0:
+                    self._buckets[endpoint] = TokenBucket(self._rate_per_second, self._burst)
+            return self._buckets.get(endpoint), limiter
+
+
+class _Slot:
+    def __init__(self, release: Callable[[int | None], None]):
+        self.status_code: int | None = None
+        self.held = False
+        self._release = release
+        self._released = False
+        self._lock = threading.Lock()
+
+    def hold(self) -> None:
+        # The permit outlives the with-block; whoever reads the streamed body calls release().
+        self.held = True
+
+    def release(self) -> None:
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._release(self.status_code)
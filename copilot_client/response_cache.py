@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+import hashlib
+import json
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Any, Callable
+
+from copilot_client import codec
+from copilot_client.config import AppSettings
+
+
+CACHE_MODES = ("use", "bypass", "refresh")
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        ttl_seconds: dict[str, float],
+        max_entries: int = 256,
+        max_bytes: int = 64 * 1024 * 1024,
+        disk_directory: str | None = None,
+        disk_max_bytes: int = 256 * 1024 * 1024,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._ttl_seconds = dict(ttl_seconds)
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._disk_directory = Path(disk_directory) if disk_directory else None
+        self._disk_max_bytes = disk_max_bytes
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._total_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+        if self._disk_directory is not None:
+            self._disk_directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def from_settings(settings: AppSettings) -> "ResponseCache":
+        return ResponseCache(
+            ttl_seconds={
+                "search": settings.search_cache_ttl_seconds,
+                "retrieval": settings.retrieval_cache_ttl_seconds,
+            },
+            max_entries=settings.cache_max_entries,
+            max_bytes=settings.cache_max_bytes,
+            disk_directory=settings.cache_directory or None,
+            disk_max_bytes=settings.cache_disk_max_bytes,
+        )
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def is_enabled(self, endpoint: str) -> bool:
+        return self._ttl_seconds.get(endpoint, 0) > 0
+
+    def get_or_fetch(
+        self,
+        endpoint: str,
+        identity: str,
+        payload: dict[str, Any],
+        fetch: Callable[[], dict[str, Any]],
+        cache_mode: str = "use",
+    ) -> dict[str, Any]:
+        if cache_mode not in CACHE_MODES:
+            raise ValueError(f"cache_mode must be one of: {', '.join(CACHE_MODES)}")
+
+        if cache_mode == "bypass" or not self.is_enabled(endpoint):
+            return fetch()
+
+        key = self.build_key(endpoint, identity, payload)
+        if cache_mode == "use":
+            cached = self._get(key)
+            if cached is not None:
+                return cached
+
+        value = fetch()
+        self._put(key, self._ttl_seconds[endpoint], value)
+        return value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+        if self._disk_directory is not None:
+            for path in self._disk_directory.glob("*.json"):
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+
+    @staticmethod
+    def build_key(endpoint: str, identity: str, payload: dict[str, Any]) -> str:
+        normalized = json.dumps(
+            _normalize(payload),
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+        )
+        digest = hashlib.sha256()
+        digest.update(endpoint.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(identity.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(normalized.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _get(self, key: str) -> dict[str, Any] | None:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, encoded = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return codec.loads(encoded)
+                self._remove(key)
+
+        disk_entry = self._read_disk(key, now)
+        with self._lock:
+            if disk_entry is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._store(key, *disk_entry)
+        return codec.loads(disk_entry[1])
+
+    def _put(self, key: str, ttl_seconds: float, value: dict[str, Any]) -> None:
+        expires_at = self._clock() + ttl_seconds
+        encoded = codec.dumps(value)
+        with self._lock:
+            self._store(key, expires_at, encoded)
+        self._write_disk(key, expires_at, encoded)
+
+    def _store(self, key: str, expires_at: float, encoded: bytes) -> None:
+        if len(encoded) > self._max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (expires_at, encoded)
+        self._total_bytes += len(encoded)
+        while self._entries and (
+            len(self._entries) > self._max_entries or self._total_bytes > self._max_bytes
+        ):
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= len(entry[1])
+
+    def _read_disk(self, key: str, now: float) -> tuple[float, bytes] | None:
+        if self._disk_directory is None:
+            return None
+
+        path = self._disk_directory / f"{key}.json"
+        try:
+            with path.open("rb") as cache_file:
+                header = cache_file.readline()
+                encoded = cache_file.read()
+            expires_at = float(header.decode("ascii").strip())
+        except (OSError, ValueError):
+            return None
+
+        if expires_at <= now:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            # Another process evicted the file after we read it.
+            return None
+        return expires_at, encoded
+
+    def _write_disk(self, key: str, expires_at: float, encoded: bytes) -> None:
+        if self._disk_directory is None or len(encoded) > self._disk_max_bytes:
+            return
+
+        path = self._disk_directory / f"{key}.json"
+        temporary_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with temporary_path.open("wb") as cache_file:
+                cache_file.write(f"{expires_at}\n".encode("ascii"))
+                cache_file.write(encoded)
+            os.replace(temporary_path, path)
+        except OSError:
+            return
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        entries = []
+        total_bytes = 0
+        for path in self._disk_directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_bytes += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_bytes <= self._disk_max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total_bytes -= size
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    if isinstance(value, str):
+        return value.strip()
+    return value
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import random
+from typing import Callable, Mapping
+
+from copilot_client.config import AppSettings
+
+
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_retries: int = 3
+    base_delay_seconds: float = 0.5
+    max_delay_seconds: float = 30.0
+    max_total_seconds: float = 120.0
+    retryable_status_codes: tuple[int, ...] = RETRYABLE_STATUS_CODES
+    random_source: Callable[[], float] = field(default=random.random, compare=False, repr=False)
+
+    @staticmethod
+    def from_settings(settings: AppSettings) -> "RetryPolicy":
+        return RetryPolicy(
+            max_retries=settings.retry_attempts,
+            base_delay_seconds=settings.retry_base_delay_seconds,
+            max_delay_seconds=settings.retry_max_delay_seconds,
+            max_total_seconds=settings.retry_max_total_seconds,
+        )
+
+    def next_delay(
+        self,
+        attempt: int,
+        status_code: int,
+        headers: Mapping[str, str] | None,
+        elapsed_seconds: float,
+    ) -> float | None:
+        if status_code not in self.retryable_status_codes or attempt > self.max_retries:
+            return None
+
+        delay = server_requested_delay(headers)
+        if delay is None:
+            delay = self.backoff_delay(attempt)
+
+        if elapsed_seconds + delay > self.max_total_seconds:
+            return None
+        return delay
+
+    def backoff_delay(self, attempt: int) -> float:
+        ceiling = min(self.max_delay_seconds, self.base_delay_seconds * (2 ** (attempt - 1)))
+        return ceiling * self.random_source()
+
+
+def server_requested_delay(headers: Mapping[str, str] | None) -> float | None:
+    if not headers:
+        return None
+
+    retry_after = _parse_retry_after(headers.get("Retry-After"))
+    if retry_after is not None:
+        return retry_after
+
+    return _parse_seconds(headers.get("RateLimit-Reset"))
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    seconds = _parse_seconds(value)
+    if seconds is not None or not value:
+        return seconds
+
+    try:
+        retry_at = parsedate_to_datetime(value.strip())
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _parse_seconds(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        seconds = float(value.strip())
+    except ValueError:
+        return None
+    if seconds != seconds or seconds < 0:
+        return None
+    return seconds
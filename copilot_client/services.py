@@ -1,9 +1,27 @@
 from __future__ import annotations
 
-from typing import Any, Callable
+import threading
+from typing import Any, Callable, Iterator
 
 from copilot_client.apis import ChatApi, RetrievalApi, SearchApi
 from copilot_client.auth import AuthManager
+from copilot_client.config import AppSettings
+from copilot_client.circuit_breaker import CircuitBreakerState
+from copilot_client.coalescing import SingleFlight
+from copilot_client.compression import EndpointTransferStats
+from copilot_client.conversation_pool import ConversationPoolStats
+from copilot_client.deadline import Deadline
+from copilot_client.hedging import HedgeStats
+from copilot_client.http import HttpClient
+from copilot_client.identity_pool import IdentityStats
+from copilot_client.json_stream import StreamedJsonArray
+from copilot_client.logging_utils import get_logger
+from copilot_client.rate_limit import EndpointLimitStats
+from copilot_client.response_cache import ResponseCache
+from copilot_client.token_cache import TokenCacheStats
+
+
+logger = get_logger(__name__)
 
 
 class CopilotService:
@@ -14,97 +32,363 @@ class CopilotService:
         search_api: SearchApi,
         retrieval_api: RetrievalApi,
         request_timeout_seconds: int,
+        http_client: HttpClient | None = None,
+        response_cache: ResponseCache | None = None,
+        request_deadline_seconds: float | None = None,
+        warm_up_on_sign_in: bool = False,
+        warm_up_conversations: int = 1,
     ):
         self._auth_manager = auth_manager
         self._chat_api = chat_api
         self._search_api = search_api
         self._retrieval_api = retrieval_api
         self._request_timeout_seconds = request_timeout_seconds
+        self._http_client = http_client
+        self._response_cache = response_cache
+        self._request_deadline_seconds = request_deadline_seconds
+        self._single_flight = SingleFlight()
+        self._warm_up_on_sign_in = warm_up_on_sign_in
+        self._warm_up_conversations = warm_up_conversations
+        self._warm_up_thread: threading.Thread | None = None
 
     @property
     def request_timeout_seconds(self) -> int:
         return self._request_timeout_seconds
 
+    @property
+    def request_deadline_seconds(self) -> float | None:
+        return self._request_deadline_seconds
+
+    def endpoint_limits(self) -> list[EndpointLimitStats]:
+        if self._http_client is None:
+            return []
+        return self._http_client.rate_limit_stats()
+
+    def token_cache_stats(self) -> TokenCacheStats:
+        return self._auth_manager.token_cache_stats()
+
+    def identity_stats(self) -> list[IdentityStats]:
+        return self._auth_manager.identity_stats()
+
+    def transfer_stats(self) -> list[EndpointTransferStats]:
+        if self._http_client is None:
+            return []
+        return self._http_client.transfer_stats()
+
+    def circuit_states(self) -> list[CircuitBreakerState]:
+        if self._http_client is None:
+            return []
+        return self._http_client.circuit_states()
+
+    def hedge_stats(self) -> list[HedgeStats]:
+        if self._http_client is None:
+            return []
+        return self._http_client.hedge_stats()
+
+    def conversation_pool_stats(self) -> ConversationPoolStats:
+        return self._chat_api.conversation_pool_stats()
+
+    @property
+    def coalesced_request_count(self) -> int:
+        return self._single_flight.coalesced_count
+
     def auth_state(self):
         return self._auth_manager.get_auth_state()
 
     def sign_in(self):
-        return self._auth_manager.sign_in()
+        state = self._auth_manager.sign_in()
+        if state.is_signed_in and self._warm_up_on_sign_in:
+            self.start_warm_up()
+        return state
+
+    def start_warm_up(self) -> threading.Thread:
+        def run() -> None:
+            try:
+                self.warm_up()
+            except Exception as exc:
+                # Warm-up only saves latency; the first real call repeats whatever failed here.
+                logger.warning("Warm-up failed: %s", exc)
+
+        thread = threading.Thread(target=run, name="copilot-warm-up", daemon=True)
+        self._warm_up_thread = thread
+        thread.start()
+        return thread
+
+    def wait_for_warm_up(self, timeout: float | None = None) -> None:
+        thread = self._warm_up_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def warm_up(self, deadline: Deadline | None = None) -> None:
+        deadline = self._resolve_deadline(deadline)
+        # Warm-up runs without user interaction, so it never falls back to an interactive prompt.
+        token = self._auth_manager.acquire_access_token_silent()
+        if not token:
+            logger.info("Warm-up skipped: no cached token")
+            return
+        opened = self._http_client.warm_connections() if self._http_client is not None else 0
+        conversations = self._chat_api.precreate_conversations(token, self._warm_up_conversations, deadline)
+        logger.info("Warm-up opened %d connections and created %d conversations", opened, conversations)
+
+    def add_identity(self):
+        return self._auth_manager.add_identity()
 
     def sign_out(self) -> None:
         self._auth_manager.sign_out()
+        self._chat_api.reset_conversations()
+        if self._response_cache is not None:
+            self._response_cache.invalidate()
+
+    def close(self) -> None:
+        self._chat_api.close()
+        if self._http_client is not None:
+            self._http_client.close()
 
     def send_chat(
         self,
         payload: dict[str, Any],
         on_stream_event: Callable[[dict[str, Any]], None] | None = None,
+        deadline: Deadline | None = None,
+        continue_conversation: bool = False,
     ) -> dict[str, Any]:
+        deadline = self._resolve_deadline(deadline)
         token = self._auth_manager.acquire_access_token()
-        return self._chat_api.send(token, payload, on_stream_event=on_stream_event)
+        return self._chat_api.send(
+            token,
+            payload,
+            on_stream_event=on_stream_event,
+            deadline=deadline,
+            continue_conversation=continue_conversation,
+        )
+
+    def run_search(
+        self,
+        payload: dict[str, Any],
+        cache_mode: str = "use",
+        deadline: Deadline | None = None,
+    ) -> dict[str, Any]:
+        deadline = self._resolve_deadline(deadline)
+        return self._cached_call(
+            "search",
+            payload,
+            cache_mode,
+            lambda token: self._search_api.search(token, payload, deadline=deadline),
+        )
 
-    def run_search(self, payload: dict[str, Any]) -> dict[str, Any]:
+    def stream_search(self, payload: dict[str, Any], deadline: Deadline | None = None) -> StreamedJsonArray:
+        deadline = self._resolve_deadline(deadline)
         token = self._auth_manager.acquire_access_token()
-        return self._search_api.search(token, payload)
+        return self._search_api.search_streamed(token, payload, deadline=deadline)
 
-    def run_search_next_page(self, next_link: str) -> dict[str, Any]:
+    def run_search_next_page(self, next_link: str, deadline: Deadline | None = None) -> dict[str, Any]:
+        deadline = self._resolve_deadline(deadline)
         token = self._auth_manager.acquire_access_token()
-        return self._search_api.search_next_page(token, next_link)
+        identity = self._auth_manager.get_user_id(token)
 
-    def run_retrieval(self, payload: dict[str, Any]) -> dict[str, Any]:
+        def fetch() -> dict[str, Any]:
+            return self._search_api.search_next_page(token, next_link, deadline=deadline)
+
+        if identity is None:
+            # Without an identity there is no safe key; coalescing could hand one caller another's page.
+            return fetch()
+        key = ResponseCache.build_key("search_next_page", identity, {"nextLink": next_link})
+        return self._single_flight.do(key, fetch)
+
+    def run_retrieval(
+        self,
+        payload: dict[str, Any],
+        cache_mode: str = "use",
+        deadline: Deadline | None = None,
+    ) -> dict[str, Any]:
+        deadline = self._resolve_deadline(deadline)
+        return self._cached_call(
+            "retrieval",
+            payload,
+            cache_mode,
+            lambda token: self._retrieval_api.retrieve(token, payload, deadline=deadline),
+        )
+
+    def stream_retrieval(self, payload: dict[str, Any], deadline: Deadline | None = None) -> StreamedJsonArray:
+        deadline = self._resolve_deadline(deadline)
         token = self._auth_manager.acquire_access_token()
-        return self._retrieval_api.retrieve(token, payload)
+        return self._retrieval_api.retrieve_streamed(token, payload, deadline=deadline)
 
-    def run_graph_batch(self, payload: dict[str, Any]) -> dict[str, Any]:
+    def run_graph_batch(self, payload: dict[str, Any], deadline: Deadline | None = None) -> dict[str, Any]:
+        deadline = self._resolve_deadline(deadline)
         token = self._auth_manager.acquire_access_token()
 
+        operations = ("chat", "search", "retrieval")
         requests_payload: list[dict[str, Any]] = []
-        request_number = 1
-
-        chat_payload = payload.get("chat")
-        if isinstance(chat_payload, dict):
-            prompt = str(chat_payload.get("prompt", "")).strip()
-            if prompt:
-                requests_payload.append(
-                    self._chat_api.build_batch_request(
-                        token,
-                        str(request_number),
-                        {
-                            "prompt": prompt,
-                            "webSearchEnabled": bool(chat_payload.get("webSearchEnabled", True)),
-                        },
-                    )
+        conversation_ids = self._checkout_batch_conversations(
+            token,
+            sum(1 for operation in operations if self._batch_chat_prompt(operation, payload.get(operation))),
+            deadline,
+        )
+        pending_conversations = iter(conversation_ids)
+        try:
+            for operation in operations:
+                request = self._build_batch_item(
+                    str(len(requests_payload) + 1),
+                    operation,
+                    payload.get(operation),
+                    pending_conversations,
                 )
-                request_number += 1
-
-        search_payload = payload.get("search")
-        if isinstance(search_payload, dict):
-            query = str(search_payload.get("query", "")).strip()
-            if query:
-                requests_payload.append(
-                    self._search_api.build_batch_request(
-                        str(request_number),
-                        search_payload,
-                        self._search_api.search_path,
-                    )
+                if request is not None:
+                    requests_payload.append(request)
+
+            if not requests_payload:
+                raise ValueError(
+                    "Provide at least one operation for batch: Chat prompt, Search query, or Retrieval query+data source."
                 )
-                request_number += 1
-
-        retrieval_payload = payload.get("retrieval")
-        if isinstance(retrieval_payload, dict):
-            query_string = str(retrieval_payload.get("queryString", "")).strip()
-            data_source = str(retrieval_payload.get("dataSource", "")).strip()
-            if query_string and data_source:
-                requests_payload.append(
-                    self._retrieval_api.build_batch_request(
-                        str(request_number),
-                        retrieval_payload,
-                        self._retrieval_api.retrieval_path,
-                    )
+
+            return self._search_api.run_graph_batch(token, requests_payload, deadline=deadline)
+        finally:
+            self._discard_conversations(conversation_ids)
+
+    def run_bulk_batch(
+        self,
+        operations: list[dict[str, Any]],
+        deadline: Deadline | None = None,
+    ) -> dict[str, Any]:
+        deadline = self._resolve_deadline(deadline)
+        token = self._auth_manager.acquire_access_token()
+
+        requests_payload: list[dict[str, Any]] = []
+        conversation_ids = self._checkout_batch_conversations(
+            token,
+            sum(
+                1
+                for operation in operations
+                if self._batch_chat_prompt(str(operation.get("type", "")), operation.get("payload"))
+            ),
+            deadline,
+        )
+        pending_conversations = iter(conversation_ids)
+        try:
+            for index, operation in enumerate(operations, start=1):
+                request = self._build_batch_item(
+                    str(index),
+                    str(operation.get("type", "")),
+                    operation.get("payload"),
+                    pending_conversations,
                 )
+                if request is None:
+                    raise ValueError(f"Batch operation {index} is not a valid chat, search or retrieval operation")
+                requests_payload.append(request)
+
+            if not requests_payload:
+                raise ValueError("Provide at least one operation for batch")
+
+            return self._search_api.run_graph_batches(token, requests_payload, deadline=deadline)
+        finally:
+            self._discard_conversations(conversation_ids)
+
+    def _checkout_batch_conversations(self, token: str, count: int, deadline: Deadline | None) -> list[str]:
+        # Each chat item gets its own conversation, since Graph runs batch items in parallel.
+        if not count:
+            return []
+        return self._chat_api.checkout_conversations(token, count, deadline)
+
+    @staticmethod
+    def _batch_chat_prompt(operation: str, payload: Any) -> str:
+        if operation != "chat" or not isinstance(payload, dict):
+            return ""
+        return str(payload.get("prompt", "")).strip()
+
+    def _build_batch_item(
+        self,
+        request_id: str,
+        operation: str,
+        payload: Any,
+        conversation_ids: Iterator[str],
+    ) -> dict[str, Any] | None:
+        if not isinstance(payload, dict):
+            return None
+
+        if operation == "chat":
+            prompt = self._batch_chat_prompt(operation, payload)
+            if not prompt:
+                return None
+            return self._chat_api.build_batch_request(
+                next(conversation_ids),
+                request_id,
+                {
+                    "prompt": prompt,
+                    "webSearchEnabled": bool(payload.get("webSearchEnabled", True)),
+                },
+            )
 
-        if not requests_payload:
-            raise ValueError(
-                "Provide at least one operation for batch: Chat prompt, Search query, or Retrieval query+data source."
+        if operation == "search":
+            query = str(payload.get("query", "")).strip()
+            if not query:
+                return None
+            return self._search_api.build_batch_request(request_id, payload, self._search_api.search_path)
+
+        if operation == "retrieval":
+            query_string = str(payload.get("queryString", "")).strip()
+            data_source = str(payload.get("dataSource", "")).strip()
+            if not query_string or not data_source:
+                return None
+            return self._retrieval_api.build_batch_request(
+                request_id,
+                payload,
+                self._retrieval_api.retrieval_path,
             )
 
-        return self._search_api.run_graph_batch(token, requests_payload)
+        return None
+
+    def _discard_conversations(self, conversation_ids: list[str]) -> None:
+        # Batch chats are independent one-off turns; their conversations are never handed out again.
+        for conversation_id in conversation_ids:
+            self._chat_api.return_conversation(conversation_id, reusable=False)
+
+    def _resolve_deadline(self, deadline: Deadline | None) -> Deadline | None:
+        if deadline is not None or not self._request_deadline_seconds:
+            return deadline
+        return Deadline(self._request_deadline_seconds)
+
+    def _cached_call(
+        self,
+        endpoint: str,
+        payload: dict[str, Any],
+        cache_mode: str,
+        call: Callable[[str], dict[str, Any]],
+    ) -> dict[str, Any]:
+        # The token is chosen first so the key names the identity that actually makes the call.
+        token = self._auth_manager.acquire_access_token()
+        identity = self._auth_manager.get_user_id(token)
+
+        def fetch() -> dict[str, Any]:
+            return call(token)
+
+        if identity is None:
+            # An unresolved identity must not share cache entries or in-flight calls with anyone else.
+            return fetch()
+
+        key = ResponseCache.build_key(f"{endpoint}:{cache_mode}", identity, payload)
+
+        if self._response_cache is None:
+            return self._single_flight.do(key, fetch)
+
+        return self._single_flight.do(
+            key,
+            lambda: self._response_cache.get_or_fetch(endpoint, identity, payload, fetch, cache_mode),
+        )
+
+
+def build_service(settings: AppSettings | None = None) -> CopilotService:
+    settings = settings or AppSettings.from_env()
+    auth_manager = AuthManager(settings)
+    http_client = HttpClient(settings, throttle_listener=auth_manager.record_throttle)
+    return CopilotService(
+        auth_manager=auth_manager,
+        chat_api=ChatApi(settings, http_client, account_for_token=auth_manager.get_home_account_id),
+        search_api=SearchApi(settings, http_client),
+        retrieval_api=RetrievalApi(settings, http_client),
+        request_timeout_seconds=settings.timeout_seconds,
+        http_client=http_client,
+        response_cache=ResponseCache.from_settings(settings),
+        request_deadline_seconds=settings.request_deadline_seconds or None,
+        warm_up_on_sign_in=settings.warm_up_on_sign_in,
+        warm_up_conversations=settings.warm_up_conversations,
+    )
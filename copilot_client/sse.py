@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+_BOM = b"\xef\xbb\xbf"
+
+
+@dataclass(frozen=True)
+class SseEvent:
+    data: str
+    event: str = "message"
+    id: str | None = None
+    retry: int | None = None
+    # False when id is only carried forward from an earlier event, as the SSE spec requires.
+    has_own_id: bool = False
+
+
+class SseDecoder:
+    def __init__(self):
+        self._buffer = bytearray()
+        self._data: list[bytes] = []
+        self._event_type = b""
+        self._last_event_id = b""
+        self._event_has_id = False
+        self._retry: int | None = None
+        self._started = False
+
+    @property
+    def last_event_id(self) -> str | None:
+        if not self._last_event_id:
+            return None
+        return self._last_event_id.decode("utf-8", errors="replace")
+
+    @property
+    def retry(self) -> int | None:
+        return self._retry
+
+    def feed(self, chunk: bytes) -> list[SseEvent]:
+        if not chunk:
+            return []
+
+        buffer = self._buffer
+        buffer += chunk
+        if not self._started:
+            if len(buffer) < len(_BOM) and _BOM.startswith(bytes(buffer)):
+                return []
+            if buffer.startswith(_BOM):
+                del buffer[: len(_BOM)]
+            self._started = True
+
+        end = max(buffer.rfind(b"\n"), buffer.rfind(b"\r"))
+        if end < 0:
+            return []
+        # A trailing CR may be the first half of a CRLF split across chunks.
+        if buffer[end] == 0x0D and end == len(buffer) - 1:
+            end -= 1
+            if end < 0:
+                return []
+            end = max(buffer.rfind(b"\n", 0, end + 1), buffer.rfind(b"\r", 0, end + 1))
+            if end < 0:
+                return []
+
+        complete = bytes(buffer[: end + 1])
+        del buffer[: end + 1]
+        return self._process_lines(complete.splitlines())
+
+    def flush(self) -> list[SseEvent]:
+        lines = bytes(self._buffer).splitlines()
+        self._buffer.clear()
+        events = self._process_lines(lines)
+        event = self._dispatch()
+        if event is not None:
+            events.append(event)
+        return events
+
+    def _process_lines(self, lines: list[bytes]) -> list[SseEvent]:
+        events: list[SseEvent] = []
+        for line in lines:
+            if not line:
+                event = self._dispatch()
+                if event is not None:
+                    events.append(event)
+                continue
+
+            if line[0] == 0x3A:
+                continue
+
+            colon = line.find(b":")
+            if colon < 0:
+                field, value = line, b""
+            else:
+                field = line[:colon]
+                value_start = colon + 2 if line[colon + 1 : colon + 2] == b" " else colon + 1
+                value = line[value_start:]
+
+            if field == b"data":
+                self._data.append(value)
+            elif field == b"event":
+                self._event_type = value
+            elif field == b"id":
+                if b"\x00" not in value:
+                    self._last_event_id = value
+                    self._event_has_id = True
+            elif field == b"retry":
+                if value.isdigit():
+                    self._retry = int(value)
+        return events
+
+    def _dispatch(self) -> SseEvent | None:
+        data = self._data
+        event_type = self._event_type
+        has_own_id = self._event_has_id
+        self._event_type = b""
+        self._event_has_id = False
+        if not data:
+            return None
+
+        self._data = []
+        payload = data[0] if len(data) == 1 else b"\n".join(data)
+        return SseEvent(
+            data=payload.decode("utf-8", errors="replace"),
+            event=event_type.decode("utf-8", errors="replace") if event_type else "message",
+            id=self.last_event_id,
+            retry=self._retry,
+            has_own_id=has_own_id,
+        )
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import threading
+import time
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class TokenCacheStats:
+    hits: int
+    misses: int
+    cached_tokens: int
+
+
+class AccessTokenCache:
+    def __init__(self, refresh_margin_seconds: float = 300.0, clock: Callable[[], float] = time.time):
+        self._refresh_margin_seconds = refresh_margin_seconds
+        self._clock = clock
+        self._tokens: dict[tuple[tuple[str, ...], str], tuple[str, float]] = {}
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, scopes: tuple[str, ...], account_id: str | None) -> str | None:
+        with self._lock:
+            entry = self._tokens.get((scopes, account_id or ""))
+            if entry is not None and entry[1] - self._refresh_margin_seconds > self._clock():
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+            return None
+
+    def put(self, scopes: tuple[str, ...], account_id: str, access_token: str, expires_in: float) -> None:
+        with self._lock:
+            self._tokens[(scopes, account_id)] = (access_token, self._clock() + expires_in)
+
+    def account_for_token(self, access_token: str) -> str | None:
+        with self._lock:
+            for (_, account_id), (cached_token, _) in self._tokens.items():
+                if cached_token == access_token:
+                    return account_id
+        return None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+
+    def stats(self) -> TokenCacheStats:
+        with self._lock:
+            return TokenCacheStats(hits=self._hits, misses=self._misses, cached_tokens=len(self._tokens))
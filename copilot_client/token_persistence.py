@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import atexit
+import threading
+from typing import Any
+
+import msal
+from msal_extensions import CrossPlatLock
+from msal_extensions.persistence import BasePersistence
+
+
+TOKEN_CACHE_PERSISTENCE_MODES = ("locked", "batched")
+
+
+class BatchedPersistedTokenCache(msal.SerializableTokenCache):
+    def __init__(self, persistence: BasePersistence, flush_delay_seconds: float = 1.0):
+        super().__init__()
+        self._persistence = persistence
+        self._lock_location = persistence.get_location() + ".lockfile"
+        self._flush_delay_seconds = flush_delay_seconds
+        self._pending: list[tuple[str, Any, Any]] = []
+        self._last_mtime: float | None = None
+        self._last_saved = ""
+        self._flush_timer: threading.Timer | None = None
+        # MSAL calls modify() while holding its own cache lock, so sharing that lock keeps the
+        # flush timer from acquiring the two in the opposite order.
+        self._state_lock = self._lock
+        self.is_encrypted = persistence.is_encrypted
+        atexit.register(self.flush)
+
+    def search(self, credential_type: str, **kwargs: Any):
+        with self._state_lock:
+            self._reload_if_changed()
+        return super().search(credential_type, **kwargs)
+
+    def modify(self, credential_type: str, old_entry: dict[str, Any], new_key_value_pairs: Any = None) -> None:
+        with self._state_lock:
+            self._reload_if_changed()
+            super().modify(credential_type, old_entry, new_key_value_pairs=new_key_value_pairs)
+            self._pending.append((credential_type, old_entry, new_key_value_pairs))
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self._flush_delay_seconds, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self) -> None:
+        with self._state_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._pending:
+                return
+            if self.serialize() == self._last_saved:
+                self._pending.clear()
+                return
+
+            # Only real changes pay for the cross-process lock. Under it, anything another
+            # process wrote since our last read is reloaded and our batched edits are replayed on top.
+            with CrossPlatLock(self._lock_location):
+                self._reload_locked()
+                self._save_locked()
+                self._pending.clear()
+
+    def clear(self) -> None:
+        # Sign-out empties the file immediately, under the lock, so a pending batch cannot restore
+        # the removed accounts and other processes reload the empty cache.
+        with self._state_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            self._pending.clear()
+            with CrossPlatLock(self._lock_location):
+                self.deserialize("")
+                self._save_locked()
+
+    def _reload_if_changed(self) -> None:
+        if self._read_mtime() in (None, self._last_mtime):
+            return
+        # Writers save under the cross-process lock, so reading under it never sees a half-written file.
+        with CrossPlatLock(self._lock_location):
+            self._reload_locked()
+
+    def _reload_locked(self) -> None:
+        mtime = self._read_mtime()
+        if mtime is None or mtime == self._last_mtime:
+            return
+
+        try:
+            serialized = self._persistence.load()
+        except OSError:
+            return
+        if not serialized:
+            # Our own writes are never empty, so this is a file being replaced by another writer.
+            # Leaving the mtime unrecorded makes the next call read it again.
+            return
+        try:
+            self.deserialize(serialized)
+        except ValueError:
+            return
+        self._last_saved = serialized
+        self._last_mtime = mtime
+        for credential_type, old_entry, new_key_value_pairs in self._pending:
+            super().modify(credential_type, old_entry, new_key_value_pairs=new_key_value_pairs)
+
+    def _save_locked(self) -> None:
+        serialized = self.serialize()
+        self._persistence.save(serialized)
+        self._last_saved = serialized
+        self._last_mtime = self._read_mtime()
+
+    def _read_mtime(self) -> float | None:
+        try:
+            return self._persistence.time_last_modified()
+        except OSError:
+            return None
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import contextmanager
+import socket
+import threading
+from typing import Any, AsyncIterator, Callable, Coroutine, Iterator
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+
+HTTP_TRANSPORTS = ("http1", "http2")
+
+
+_request_scope = threading.local()
+
+
+def http2_available() -> bool:
+    return h2 is not None
+
+
+class RequestCancellation:
+    def __init__(self):
+        self._event = threading.Event()
+        self._socket: socket.socket | None = None
+        self._lock = threading.Lock()
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, seconds: float) -> bool:
+        return self._event.wait(seconds)
+
+    def cancel(self) -> None:
+        self._event.set()
+        with self._lock:
+            sock = self._socket
+        if sock is not None:
+            _shutdown(sock)
+
+    @contextmanager
+    def scope(self) -> Iterator[None]:
+        _request_scope.cancellation = self
+        try:
+            yield
+        finally:
+            _request_scope.cancellation = None
+            with self._lock:
+                self._socket = None
+
+    def _attach(self, sock: socket.socket) -> None:
+        with self._lock:
+            self._socket = sock
+        if self._event.is_set():
+            _shutdown(sock)
+
+
+def _shutdown(sock: socket.socket) -> None:
+    # shutdown() wakes a thread blocked in recv() on this socket; close() alone does not.
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+class _CancellableConnectionMixin:
+    def getresponse(self):
+        cancellation = getattr(_request_scope, "cancellation", None)
+        sock = getattr(self, "sock", None)
+        if cancellation is not None and sock is not None:
+            cancellation._attach(sock)
+        return super().getresponse()
+
+
+class _CancellableHTTPConnection(_CancellableConnectionMixin, HTTPConnection):
+    pass
+
+
+class _CancellableHTTPSConnection(_CancellableConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _CancellableHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CancellableHTTPConnection
+
+
+class _CancellableHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CancellableHTTPSConnection
+
+
+class _CancellableAdapter(HTTPAdapter):
+    # Lets RequestCancellation.cancel() abort a request that is still waiting for its response.
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CancellableHTTPConnectionPool,
+            "https": _CancellableHTTPSConnectionPool,
+        }
+
+
+class _WireCounter:
+    def __init__(self, response: httpx.Response):
+        self._response = response
+
+    def tell(self) -> int:
+        return self._response.num_bytes_downloaded
+
+
+class Http2Response:
+    def __init__(self, response: httpx.Response, run: Callable[[Coroutine[Any, Any, Any]], Any]):
+        self._response = response
+        self._run = run
+        self.raw = _WireCounter(response)
+
+    @property
+    def status_code(self) -> int:
+        return self._response.status_code
+
+    @property
+    def ok(self) -> bool:
+        return self._response.status_code < 400
+
+    @property
+    def headers(self) -> httpx.Headers:
+        return self._response.headers
+
+    @property
+    def http_version(self) -> str:
+        return self._response.http_version
+
+    @property
+    def content(self) -> bytes:
+        return self._read()
+
+    @property
+    def text(self) -> str:
+        self._read()
+        return self._response.text
+
+    def iter_content(self, chunk_size: int | None = None) -> Iterator[bytes]:
+        chunks = self._response.aiter_bytes(chunk_size=chunk_size)
+        while True:
+            try:
+                chunk = self._run(_next_chunk(chunks))
+            except httpx.HTTPError as exc:
+                raise translate_httpx_error(exc, streaming=True) from exc
+            if chunk is None:
+                return
+            yield chunk
+
+    def close(self) -> None:
+        # Buffered responses are already closed, so only streams need a trip to the event loop.
+        if not self._response.is_closed:
+            self._run(self._response.aclose())
+
+    def _read(self) -> bytes:
+        if self._response.is_stream_consumed:
+            return self._response.content
+        try:
+            return self._run(self._response.aread())
+        except httpx.HTTPError as exc:
+            raise translate_httpx_error(exc) from exc
+
+
+class Http2Session:
+    def __init__(self, max_connections: int = 10, prior_knowledge: bool = False):
+        if h2 is None:
+            raise RuntimeError("The HTTP/2 transport requires the 'h2' package (pip install httpx[http2])")
+
+        # httpcore's threaded HTTP/2 connection shares one h2 state machine between threads without
+        # locking, which reorders and duplicates frames under concurrent use. Every HTTP/2 call
+        # therefore runs on one event loop thread; calling threads block on their own result, and
+        # their requests are still multiplexed over the shared connection.
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="copilot-http2", daemon=True)
+        self._thread.start()
+        # Prior knowledge skips HTTP/1.1 entirely, which is what plain-text (h2c) stand-in servers need.
+        self._client = httpx.AsyncClient(
+            http1=not prior_knowledge,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+        self.headers = self._client.headers
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        timeout: float | None = None,
+        headers: dict[str, str] | None = None,
+        data: bytes | None = None,
+        params: dict[str, Any] | None = None,
+        stream: bool = False,
+    ) -> Http2Response:
+        request = self._client.build_request(
+            method,
+            url,
+            headers=headers,
+            content=data,
+            params=params,
+            timeout=timeout,
+        )
+        try:
+            response = self._run(self._client.send(request, stream=stream))
+        except httpx.HTTPError as exc:
+            raise translate_httpx_error(exc) from exc
+        return Http2Response(response, self._run)
+
+    def close(self) -> None:
+        if self._loop.is_closed():
+            return
+        self._run(self._client.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def _run(self, coroutine: Coroutine[Any, Any, Any]) -> Any:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+
+async def _next_chunk(chunks: AsyncIterator[bytes]) -> bytes | None:
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+def build_session(transport: str, max_connections: int) -> requests.Session | Http2Session:
+    if transport == "http2":
+        return Http2Session(max_connections=max_connections)
+    session = requests.Session()
+    # One pool per host sized to the concurrency limit, so every in-flight call keeps its connection.
+    adapter = _CancellableAdapter(pool_maxsize=max_connections)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def translate_httpx_error(exc: httpx.HTTPError, streaming: bool = False) -> requests.exceptions.RequestException:
+    # The retry, circuit-breaker and stream-resume paths of both HTTP clients catch requests
+    # exceptions, so httpx failures are reported in the same terms.
+    if isinstance(exc, httpx.ConnectTimeout):
+        return requests.exceptions.ConnectTimeout(str(exc))
+    if isinstance(exc, httpx.TimeoutException):
+        return requests.exceptions.ReadTimeout(str(exc))
+    if streaming and isinstance(exc, (httpx.RemoteProtocolError, httpx.ReadError)):
+        return requests.exceptions.ChunkedEncodingError(str(exc))
+    if isinstance(exc, httpx.TransportError):
+        return requests.exceptions.ConnectionError(str(exc))
+    return requests.exceptions.RequestException(str(exc))
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+
+NO_FORMATTED_TEXT = "No formatted text found in the response."
+
+
+def extract_formatted_text(response: dict[str, object]) -> str:
+    batch_responses = response.get("responses") if isinstance(response, dict) else None
+    if isinstance(batch_responses, list):
+        formatted_parts = []
+        for item in batch_responses:
+            if not isinstance(item, dict):
+                continue
+            body = item.get("body")
+            if not isinstance(body, dict):
+                continue
+            body_text = extract_formatted_text(body)
+            if body_text and body_text != NO_FORMATTED_TEXT:
+                request_id = str(item.get("id", "?")).strip() or "?"
+                formatted_parts.append(f"Batch Request {request_id}\n{body_text}")
+        if formatted_parts:
+            return "\n\n===\n\n".join(formatted_parts)
+
+    final_conversation = response.get("finalConversation") if isinstance(response, dict) else None
+    if isinstance(final_conversation, dict):
+        response = final_conversation
+
+    messages = response.get("messages") if isinstance(response, dict) else None
+    if isinstance(messages, list):
+        chat_texts = []
+        for message in messages:
+            if isinstance(message, dict):
+                text = str(message.get("text", "")).strip()
+                if text:
+                    chat_texts.append(text)
+        if chat_texts:
+            return "\n\n---\n\n".join(chat_texts)
+
+    search_hits = response.get("searchHits") if isinstance(response, dict) else None
+    if isinstance(search_hits, list):
+        search_previews = []
+        for hit in search_hits:
+            preview = format_search_hit(hit)
+            if preview:
+                search_previews.append(preview)
+        if search_previews:
+            return "\n\n---\n\n".join(search_previews)
+
+    retrieval_hits = response.get("retrievalHits") if isinstance(response, dict) else None
+    if isinstance(retrieval_hits, list):
+        retrieval_texts = []
+        for hit in retrieval_hits:
+            retrieval_texts.extend(format_retrieval_hit(hit))
+        if retrieval_texts:
+            return "\n\n---\n\n".join(retrieval_texts)
+
+    return NO_FORMATTED_TEXT
+
+
+def format_search_hit(hit: object) -> str:
+    if not isinstance(hit, dict):
+        return ""
+    preview = str(hit.get("preview", "")).strip()
+    if not preview:
+        return ""
+    resource_metadata = hit.get("resourceMetadata")
+    title = ""
+    if isinstance(resource_metadata, dict):
+        title = str(resource_metadata.get("title", "")).strip()
+    if not title:
+        title = str(hit.get("webUrl", "")).strip()
+    return f"{title}\n{preview}" if title else preview
+
+
+def format_retrieval_hit(hit: object) -> list[str]:
+    if not isinstance(hit, dict):
+        return []
+    extracts = hit.get("extracts")
+    if not isinstance(extracts, list):
+        return []
+    texts = []
+    for extract in extracts:
+        if isinstance(extract, dict):
+            text = str(extract.get("text", "")).strip()
+            if text:
+                texts.append(text)
+    return texts
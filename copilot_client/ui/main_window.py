@@ -1,18 +1,21 @@
 from __future__ import annotations
 
 from datetime import datetime
-import json
 import threading
 import traceback
 
 import customtkinter as ctk
 
-from copilot_client.apis import ChatApi, RetrievalApi, SearchApi
-from copilot_client.auth import AuthManager
-from copilot_client.config import AppSettings, ConfigurationError
-from copilot_client.http import HttpClient
+from copilot_client import codec
+from copilot_client.config import ConfigurationError
 from copilot_client.logging_utils import configure_logging
-from copilot_client.services import CopilotService
+from copilot_client.services import CopilotService, build_service
+from copilot_client.ui.formatting import (
+	NO_FORMATTED_TEXT,
+	extract_formatted_text,
+	format_retrieval_hit,
+	format_search_hit,
+)
 
 
 class MainWindow(ctk.CTk):
@@ -37,7 +40,10 @@ class MainWindow(ctk.CTk):
 		self._request_progress_bar.set(0)
 
 		self._progress_active = False
-		self._progress_total_seconds = max(1, int(self._service.request_timeout_seconds))
+		self._progress_total_seconds = max(
+			1,
+			int(self._service.request_deadline_seconds or self._service.request_timeout_seconds),
+		)
 		self._progress_elapsed_seconds = 0.0
 		self._progress_update_interval_seconds = 0.1
 		self._set_progress_idle()
@@ -48,6 +54,9 @@ class MainWindow(ctk.CTk):
 		self._sign_in_btn = ctk.CTkButton(action_row, text="Sign in", command=self._sign_in)
 		self._sign_in_btn.pack(side="left", padx=(8, 6), pady=8)
 
+		self._add_account_btn = ctk.CTkButton(action_row, text="Add account", command=self._add_account)
+		self._add_account_btn.pack(side="left", padx=6, pady=8)
+
 		self._sign_out_btn = ctk.CTkButton(action_row, text="Sign out", command=self._sign_out)
 		self._sign_out_btn.pack(side="left", padx=6, pady=8)
 
@@ -130,6 +139,13 @@ class MainWindow(ctk.CTk):
 		self._search_next_page_label = ctk.CTkLabel(search_tab, text="")
 		self._search_next_page_label.pack(anchor="w", padx=12, pady=(0, 6))
 
+		self._search_incremental = ctk.BooleanVar(value=False)
+		ctk.CTkCheckBox(
+			search_tab,
+			text="Render hits as they arrive",
+			variable=self._search_incremental,
+		).pack(anchor="w", padx=12, pady=4)
+
 		ctk.CTkButton(search_tab, text="Run Search", command=self._run_search).pack(
 			anchor="w", padx=12, pady=8
 		)
@@ -176,6 +192,13 @@ class MainWindow(ctk.CTk):
 		self._retrieval_max_results.pack(fill="x", padx=12, pady=6)
 		self._retrieval_max_results.insert(0, "10")
 
+		self._retrieval_incremental = ctk.BooleanVar(value=False)
+		ctk.CTkCheckBox(
+			retrieval_tab,
+			text="Render hits as they arrive",
+			variable=self._retrieval_incremental,
+		).pack(anchor="w", padx=12, pady=4)
+
 		ctk.CTkButton(retrieval_tab, text="Run Retrieval", command=self._run_retrieval).pack(
 			anchor="w", padx=12, pady=8
 		)
@@ -254,8 +277,8 @@ class MainWindow(ctk.CTk):
 		def worker():
 			try:
 				response = call(payload)
-				raw_rendered = json.dumps(response, indent=2)
-				formatted_rendered = self._extract_formatted_text(response)
+				raw_rendered = codec.dumps_pretty(response)
+				formatted_rendered = extract_formatted_text(response)
 				if on_success:
 					self.after(0, lambda: on_success(response))
 			except Exception as exc:
@@ -275,9 +298,71 @@ class MainWindow(ctk.CTk):
 
 		threading.Thread(target=worker, daemon=True).start()
 
+	def _run_streamed_in_background(
+		self,
+		formatted_widget: ctk.CTkTextbox,
+		raw_widget: ctk.CTkTextbox,
+		call,
+		payload,
+		array_key: str,
+		format_hit,
+		on_success=None,
+	):
+		self._render_output(formatted_widget, "Running request...")
+		self._render_output(raw_widget, "Running request...")
+		self._start_request_progress()
+
+		def worker():
+			hits = []
+			rendered_count = 0
+			try:
+				with call(payload) as streamed_hits:
+					for hit in streamed_hits:
+						hits.append(hit)
+						texts = format_hit(hit)
+						if texts:
+							self.after(
+								0,
+								lambda texts=texts, first=rendered_count == 0: self._append_formatted_hit(
+									formatted_widget,
+									texts,
+									first,
+								),
+							)
+							rendered_count += 1
+					response = {**streamed_hits.envelope, array_key: hits}
+				raw_rendered = codec.dumps_pretty(response)
+				formatted_rendered = extract_formatted_text(response)
+				if on_success:
+					self.after(0, lambda: on_success(response))
+			except Exception as exc:
+				raw_rendered = f"{type(exc).__name__}: {exc}\n\n{traceback.format_exc()}"
+				formatted_rendered = f"{type(exc).__name__}: {exc}"
+
+			self.after(
+				0,
+				lambda: self._render_dual_output(
+					formatted_widget,
+					raw_widget,
+					formatted_rendered,
+					raw_rendered,
+				),
+			)
+			self.after(0, self._stop_request_progress)
+
+		threading.Thread(target=worker, daemon=True).start()
+
+	@staticmethod
+	def _append_formatted_hit(text_widget: ctk.CTkTextbox, texts: list[str], first: bool):
+		if first:
+			text_widget.delete("1.0", "end")
+		else:
+			text_widget.insert("end", "\n\n---\n\n")
+		text_widget.insert("end", "\n\n---\n\n".join(texts))
+
 	def _set_progress_idle(self):
 		self._request_progress_label.configure(
-			text=f"Request timeout: {self._progress_total_seconds}s"
+			text=f"Request deadline: {self._progress_total_seconds}s"
 		)
 		self._request_progress_bar.set(0)
 
@@ -288,7 +373,7 @@ class MainWindow(ctk.CTk):
 		self._request_progress_label.configure(
 			text=(
 				f"Request in progress: 0.0s / {self._progress_total_seconds}s "
-				"(timeout window)"
+				"(deadline)"
 			)
 		)
 		self._tick_request_progress()
@@ -304,7 +389,7 @@ class MainWindow(ctk.CTk):
 		if progress >= 1.0:
 			self._request_progress_label.configure(
 				text=(
-					f"Reached timeout window ({self._progress_total_seconds}s). "
+					f"Reached request deadline ({self._progress_total_seconds}s). "
 					"Waiting for response or timeout result..."
 				)
 			)
@@ -312,7 +397,7 @@ class MainWindow(ctk.CTk):
 			self._request_progress_label.configure(
 				text=(
 					f"Request in progress: {self._progress_elapsed_seconds:.1f}s / "
-					f"{self._progress_total_seconds}s (timeout window)"
+					f"{self._progress_total_seconds}s (deadline)"
 				)
 			)
 
@@ -361,77 +446,6 @@ class MainWindow(ctk.CTk):
 		text_widget.delete("1.0", "end")
 		text_widget.insert("1.0", text)
 
-	@staticmethod
-	def _extract_formatted_text(response: dict[str, object]) -> str:
-		batch_responses = response.get("responses") if isinstance(response, dict) else None
-		if isinstance(batch_responses, list):
-			formatted_parts = []
-			for item in batch_responses:
-				if not isinstance(item, dict):
-					continue
-				body = item.get("body")
-				if not isinstance(body, dict):
-					continue
-				body_text = MainWindow._extract_formatted_text(body)
-				if body_text and body_text != "No formatted text found in the response.":
-					request_id = str(item.get("id", "?")).strip() or "?"
-					formatted_parts.append(f"Batch Request {request_id}\n{body_text}")
-			if formatted_parts:
-				return "\n\n===\n\n".join(formatted_parts)
-
-		final_conversation = response.get("finalConversation") if isinstance(response, dict) else None
-		if isinstance(final_conversation, dict):
-			response = final_conversation
-
-		messages = response.get("messages") if isinstance(response, dict) else None
-		if isinstance(messages, list):
-			chat_texts = []
-			for message in messages:
-				if isinstance(message, dict):
-					text = str(message.get("text", "")).strip()
-					if text:
-						chat_texts.append(text)
-			if chat_texts:
-				return "\n\n---\n\n".join(chat_texts)
-
-		search_hits = response.get("searchHits") if isinstance(response, dict) else None
-		if isinstance(search_hits, list):
-			search_previews = []
-			for hit in search_hits:
-				if not isinstance(hit, dict):
-					continue
-				preview = str(hit.get("preview", "")).strip()
-				if not preview:
-					continue
-				resource_metadata = hit.get("resourceMetadata")
-				title = ""
-				if isinstance(resource_metadata, dict):
-					title = str(resource_metadata.get("title", "")).strip()
-				if not title:
-					title = str(hit.get("webUrl", "")).strip()
-				search_previews.append(f"{title}\n{preview}" if title else preview)
-			if search_previews:
-				return "\n\n---\n\n".join(search_previews)
-
-		retrieval_hits = response.get("retrievalHits") if isinstance(response, dict) else None
-		if isinstance(retrieval_hits, list):
-			retrieval_texts = []
-			for hit in retrieval_hits:
-				if not isinstance(hit, dict):
-					continue
-				extracts = hit.get("extracts")
-				if not isinstance(extracts, list):
-					continue
-				for extract in extracts:
-					if isinstance(extract, dict):
-						text = str(extract.get("text", "")).strip()
-						if text:
-							retrieval_texts.append(text)
-			if retrieval_texts:
-				return "\n\n---\n\n".join(retrieval_texts)
-
-		return "No formatted text found in the response."
-
 	def _refresh_auth_state(self):
 		try:
 			state = self._service.auth_state()
@@ -450,10 +464,12 @@ class MainWindow(ctk.CTk):
 	def _set_auth_button_state(self, is_signed_in: bool):
 		if is_signed_in:
 			self._sign_in_btn.configure(state="disabled")
+			self._add_account_btn.configure(state="normal")
 			self._sign_out_btn.configure(state="normal")
 			return
 
 		self._sign_in_btn.configure(state="normal")
+		self._add_account_btn.configure(state="disabled")
 		self._sign_out_btn.configure(state="disabled")
 
 	def _sign_in(self):
@@ -485,6 +501,28 @@ class MainWindow(ctk.CTk):
 
 		threading.Thread(target=worker, daemon=True).start()
 
+	def _add_account(self):
+		self._status_label.configure(text="Adding account...")
+		self._add_account_btn.configure(state="disabled")
+
+		def worker():
+			try:
+				state = self._service.add_identity()
+				username = self._mask_username_domain(state.username or "signed-in user")
+				text = f"Signed in as {username} | Added an account to the identity pool"
+			except Exception as exc:
+				text = f"Add account failed: {exc}"
+
+			self.after(
+				0,
+				lambda: (
+					self._status_label.configure(text=text),
+					self._add_account_btn.configure(state="normal"),
+				),
+			)
+
+		threading.Thread(target=worker, daemon=True).start()
+
 	def _sign_out(self):
 		try:
 			self._service.sign_out()
@@ -510,10 +548,14 @@ class MainWindow(ctk.CTk):
 		self._run_in_background(
 			self._chat_formatted_output,
 			self._chat_output,
-			self._service.send_chat,
+			self._continue_chat,
 			payload,
 		)
 
+	def _continue_chat(self, payload: dict[str, object]):
+		# The chat tab is one ongoing session, so its conversation keeps the earlier turns.
+		return self._service.send_chat(payload, continue_conversation=True)
+
 	def _run_chat_stream_in_background(self, payload: dict[str, object]):
 		self._render_output(self._chat_formatted_output, "Connecting to stream...")
 		self._render_output(self._chat_output, "Connecting to stream...")
@@ -530,9 +572,9 @@ class MainWindow(ctk.CTk):
 				"streamEvents": list(stream_events),
 				"finalConversation": event,
 			}
-			raw_rendered = json.dumps(response_snapshot, indent=2)
-			formatted_rendered = self._extract_formatted_text(response_snapshot)
-			if formatted_rendered == "No formatted text found in the response." and len(stream_events) > 1:
+			raw_rendered = codec.dumps_pretty(response_snapshot)
+			formatted_rendered = extract_formatted_text(response_snapshot)
+			if formatted_rendered == NO_FORMATTED_TEXT and len(stream_events) > 1:
 				return
 			self.after(
 				0,
@@ -546,9 +588,13 @@ class MainWindow(ctk.CTk):
 
 		def worker():
 			try:
-				response = self._service.send_chat(payload, on_stream_event=on_stream_event)
-				raw_rendered = json.dumps(response, indent=2)
-				formatted_rendered = self._extract_formatted_text(response)
+				response = self._service.send_chat(
+					payload,
+					on_stream_event=on_stream_event,
+					continue_conversation=True,
+				)
+				raw_rendered = codec.dumps_pretty(response)
+				formatted_rendered = extract_formatted_text(response)
 				self.after(0, lambda: self._set_chat_stream_status("completed", len(stream_events)))
 			except Exception as exc:
 				raw_rendered = f"{type(exc).__name__}: {exc}\n\n{traceback.format_exc()}"
@@ -608,6 +654,17 @@ class MainWindow(ctk.CTk):
 		filter_expression = self._search_filter.get().strip()
 		if filter_expression:
 			payload["filterExpression"] = filter_expression
+		if self._search_incremental.get():
+			self._run_streamed_in_background(
+				self._search_formatted_output,
+				self._search_output,
+				self._service.stream_search,
+				payload,
+				"searchHits",
+				lambda hit: [text] if (text := format_search_hit(hit)) else [],
+				on_success=self._update_search_next_link,
+			)
+			return
 		self._run_in_background(
 			self._search_formatted_output,
 			self._search_output,
@@ -686,6 +743,16 @@ class MainWindow(ctk.CTk):
 		filter_expression = self._retrieval_filter.get().strip()
 		if filter_expression:
 			payload["filterExpression"] = filter_expression
+		if self._retrieval_incremental.get():
+			self._run_streamed_in_background(
+				self._retrieval_formatted_output,
+				self._retrieval_output,
+				self._service.stream_retrieval,
+				payload,
+				"retrievalHits",
+				format_retrieval_hit,
+			)
+			return
 		self._run_in_background(
 			self._retrieval_formatted_output,
 			self._retrieval_output,
@@ -799,19 +866,6 @@ class MainWindow(ctk.CTk):
 		return f"{local}@{masked_domain}"
 
 
-def build_service() -> CopilotService:
-	settings = AppSettings.from_env()
-	auth_manager = AuthManager(settings)
-	http_client = HttpClient(settings)
-	return CopilotService(
-		auth_manager=auth_manager,
-		chat_api=ChatApi(settings, http_client),
-		search_api=SearchApi(settings, http_client),
-		retrieval_api=RetrievalApi(settings, http_client),
-		request_timeout_seconds=settings.timeout_seconds,
-	)
-
-
 def run_app() -> None:
 	configure_logging()
 	ctk.set_appearance_mode("System")
@@ -838,4 +892,7 @@ def run_app() -> None:
 		return
 
 	window = MainWindow(service)
-	window.mainloop()
+	try:
+		window.mainloop()
+	finally:
+		service.close()
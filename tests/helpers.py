@@ -0,0 +1,101 @@
+# Shared test doubles and settings, imported by the test modules instead of from each other.
+from dataclasses import replace
+import time
+
+from copilot_client.config import AppSettings
+from copilot_client.mock_server import MockServerConfig
+
+
+FAST = MockServerConfig(latency_ms=0, sse_events=6, sse_interval_ms=0, search_hits=5, seed=7)
+
+
+class FakeClock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def settings(base_url: str, **overrides) -> AppSettings:
+    return replace(
+        AppSettings(
+            tenant_id="tenant",
+            client_id="client",
+            authority="https://login.microsoftonline.com/tenant",
+            scopes=("https://graph.microsoft.com/.default",),
+            base_url=base_url,
+            chat_path="/copilot/conversations",
+            search_path="/copilot/search",
+            retrieval_path="/copilot/retrieval",
+            batch_path="/$batch",
+            timeout_seconds=5,
+            retry_attempts=2,
+            token_cache_path="",
+            auth_flow="interactive",
+            redirect_uri="http://localhost",
+            retry_base_delay_seconds=0.01,
+            retry_max_delay_seconds=0.02,
+            rate_limit_per_second=0.0,
+        ),
+        **overrides,
+    )
+
+
+class FakeMsalApp:
+    # Stands in for msal.PublicClientApplication: accounts and tokens live in memory and every
+    # call is counted, so tests can see which paths reach MSAL.
+    def __init__(self, user_ids: tuple[str, ...] = ("user-a",), expires_in: float = 3600, latency: float = 0.0):
+        self.accounts = [self._account(user_id) for user_id in user_ids]
+        self.expires_in = expires_in
+        self.latency = latency
+        self.calls: dict[str, int] = {}
+        self._issued = 0
+
+    def get_accounts(self) -> list[dict]:
+        self._count("get_accounts")
+        return list(self.accounts)
+
+    def acquire_token_silent(self, scopes: list[str], account: dict, force_refresh: bool = False) -> dict:
+        self._count("force_refresh" if force_refresh else "acquire_token_silent")
+        time.sleep(self.latency)
+        return self._issue(account)
+
+    def acquire_token_interactive(self, scopes: list[str], **kwargs) -> dict:
+        self._count("acquire_token_interactive")
+        account = self._account(f"user-{len(self.accounts)}")
+        self.accounts.append(account)
+        return self._issue(account)
+
+    def initiate_device_flow(self, scopes: list[str]) -> dict:
+        return {"user_code": "ABCD", "message": "Enter ABCD at https://microsoft.com/devicelogin"}
+
+    def acquire_token_by_device_flow(self, flow: dict) -> dict:
+        self._count("acquire_token_by_device_flow")
+        account = self._account(f"user-{len(self.accounts)}")
+        self.accounts.append(account)
+        return self._issue(account)
+
+    def remove_account(self, account: dict) -> None:
+        self.accounts.remove(account)
+
+    def _issue(self, account: dict) -> dict:
+        self._issued += 1
+        user_id = account["local_account_id"]
+        return {
+            "access_token": f"token-{user_id}-{self._issued}",
+            "expires_in": self.expires_in,
+            "id_token_claims": {"oid": user_id, "tid": "tenant"},
+        }
+
+    def _count(self, name: str) -> None:
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    @staticmethod
+    def _account(user_id: str) -> dict:
+        return {
+            "home_account_id": f"{user_id}.tenant",
+            "local_account_id": user_id,
+            "username": f"{user_id}@contoso.com",
+            "realm": "tenant",
+        }
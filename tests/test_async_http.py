@@ -0,0 +1,206 @@
+import asyncio
+from dataclasses import replace
+
+import pytest
+import requests
+
+from copilot_client.async_http import AsyncHttpClient
+from copilot_client.circuit_breaker import CircuitBreaker, CircuitBreakerRegistry
+from copilot_client.deadline import Deadline, DeadlineExceededError
+from copilot_client.http import ApiHttpError, CircuitOpenError, HttpClient, StreamInterruptedError
+from copilot_client.rate_limit import EndpointRateLimiter
+from copilot_client.mock_server import MockGraphServer
+from tests.helpers import FAST, settings
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_concurrent_calls_share_one_client():
+    async def scenario(base_url: str) -> list[dict]:
+        async with AsyncHttpClient(settings(base_url)) as client:
+            return await asyncio.gather(
+                *(client.post_json("token", "/copilot/search", {"query": f"q{index}"}) for index in range(8))
+            )
+
+    with MockGraphServer(FAST) as mock:
+        results = run(scenario(mock.base_url))
+
+    assert len(results) == 8
+    assert all(len(result["searchHits"]) == 5 for result in results)
+
+
+def test_throttled_call_retries_then_reports_the_status():
+    async def scenario(base_url: str) -> None:
+        async with AsyncHttpClient(settings(base_url)) as client:
+            await client.post_json("token", "/copilot/search", {"query": "q"})
+
+    with MockGraphServer(replace(FAST, throttle_rate=1.0, retry_after_seconds=0)) as mock:
+        with pytest.raises(ApiHttpError) as excinfo:
+            run(scenario(mock.base_url))
+
+        assert excinfo.value.status_code == 429
+        assert mock.stats()["requests"] == 3
+
+
+def test_deadline_stops_retrying():
+    async def scenario(base_url: str) -> None:
+        async with AsyncHttpClient(settings(base_url)) as client:
+            await client.post_json("token", "/copilot/search", {"query": "q"}, deadline=Deadline(0.5))
+
+    with MockGraphServer(replace(FAST, throttle_rate=1.0, retry_after_seconds=5)) as mock:
+        with pytest.raises(ApiHttpError):
+            run(scenario(mock.base_url))
+
+        assert mock.stats()["requests"] == 1
+
+
+def test_expired_deadline_fails_before_sending():
+    async def scenario(base_url: str) -> None:
+        async with AsyncHttpClient(settings(base_url)) as client:
+            await client.post_json("token", "/copilot/search", {"query": "q"}, deadline=Deadline(0))
+
+    with MockGraphServer(FAST) as mock:
+        with pytest.raises(DeadlineExceededError):
+            run(scenario(mock.base_url))
+
+        assert mock.stats().get("requests", 0) == 0
+
+
+def test_chat_stream_yields_every_event():
+    async def scenario(base_url: str) -> list[dict]:
+        async with AsyncHttpClient(settings(base_url)) as client:
+            conversation = await client.post_json("token", "/copilot/conversations", {})
+            stream = client.post_sse_json(
+                "token",
+                f"/copilot/conversations/{conversation['id']}/chatOverStream",
+                {"message": {"text": "hello"}},
+            )
+            return [event async for event in stream]
+
+    with MockGraphServer(FAST) as mock:
+        events = run(scenario(mock.base_url))
+
+    assert len(events) == 6
+    assert events[-1]["turnCount"] == 1
+
+
+def test_throttling_is_charged_to_the_shared_rate_limiter():
+    async def scenario(base_url: str, limiter: EndpointRateLimiter) -> None:
+        async with AsyncHttpClient(settings(base_url), rate_limiter=limiter) as client:
+            await client.post_json("token", "/copilot/search", {"query": "q"})
+
+    with MockGraphServer(replace(FAST, throttle_rate=1.0, retry_after_seconds=0)) as mock:
+        app_settings = settings(mock.base_url, initial_concurrency=4)
+        limiter = EndpointRateLimiter.from_settings(app_settings)
+        sync_client = HttpClient(app_settings, rate_limiter=limiter)
+        with pytest.raises(ApiHttpError):
+            run(scenario(mock.base_url, limiter))
+
+    [stats] = sync_client.rate_limit_stats()
+    assert (stats.endpoint, stats.throttled_count, stats.in_flight) == ("search", 3, 0)
+    assert stats.concurrency_limit < 4
+
+
+def test_open_circuit_fails_fast_without_sending():
+    breakers = CircuitBreakerRegistry(lambda: CircuitBreaker(minimum_calls=1, window_size=1, open_seconds=60))
+    breaker = breakers.get("search")
+    assert breaker.allow_request()
+    breaker.record_failure()
+
+    async def scenario(base_url: str) -> None:
+        async with AsyncHttpClient(settings(base_url), circuit_breakers=breakers) as client:
+            await client.post_json("token", "/copilot/search", {"query": "q"})
+
+    with MockGraphServer(FAST) as mock:
+        with pytest.raises(CircuitOpenError):
+            run(scenario(mock.base_url))
+
+        assert mock.stats().get("requests", 0) == 0
+
+
+def test_connection_errors_are_reported_as_requests_errors_and_trip_the_breaker():
+    async def scenario(client: AsyncHttpClient) -> None:
+        async with client:
+            await client.post_json("token", "/copilot/search", {"query": "q"})
+
+    with MockGraphServer(FAST) as mock:
+        base_url = mock.base_url
+    client = AsyncHttpClient(settings(base_url))
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        run(scenario(client))
+
+    [state] = client.circuit_states()
+    assert (state.endpoint, state.recorded_calls) == ("search", 1)
+    assert client.rate_limit_stats()[0].in_flight == 0
+
+
+def test_request_bodies_are_compressed():
+    async def scenario(client: AsyncHttpClient) -> None:
+        async with client:
+            await client.post_json("token", "/copilot/search", {"query": "quarterly revenue " * 20})
+
+    with MockGraphServer(replace(FAST, search_hits=25)) as mock:
+        client = AsyncHttpClient(settings(mock.base_url, request_compression="gzip", request_compression_min_bytes=64))
+        run(scenario(client))
+
+    [stats] = client.transfer_stats()
+    assert stats.request_wire_bytes < stats.request_bytes
+    assert stats.response_wire_bytes < stats.response_bytes
+
+
+def test_stream_keeps_its_permit_until_closed():
+    async def scenario(base_url: str) -> list[int]:
+        async with AsyncHttpClient(settings(base_url)) as client:
+            conversation = await client.post_json("token", "/copilot/conversations", {})
+            stream = client.post_sse_json(
+                "token",
+                f"/copilot/conversations/{conversation['id']}/chatOverStream",
+                {"message": {"text": "hello"}},
+            )
+            in_flight = []
+            async for _ in stream:
+                in_flight.append(client.rate_limit_stats()[0].in_flight)
+            in_flight.append(client.rate_limit_stats()[0].in_flight)
+            return in_flight
+
+    with MockGraphServer(FAST) as mock:
+        in_flight = run(scenario(mock.base_url))
+
+    assert in_flight == [1] * 6 + [0]
+
+
+def chat_over_stream(base_url: str, **overrides) -> list[dict]:
+    async def scenario() -> list[dict]:
+        async with AsyncHttpClient(settings(base_url, **overrides)) as client:
+            conversation = await client.post_json("token", "/copilot/conversations", {})
+            stream = client.post_sse_json(
+                "token",
+                f"/copilot/conversations/{conversation['id']}/chatOverStream",
+                {"message": {"text": "hello"}},
+            )
+            return [event async for event in stream]
+
+    return run(scenario())
+
+
+def test_dropped_stream_resumes_from_the_last_event_when_enabled():
+    with MockGraphServer(replace(FAST, stream_drop_rate=1.0)) as mock:
+        events = chat_over_stream(mock.base_url, stream_reconnect_attempts=3)
+
+        assert mock.stats()["stream_resumed"] == 1
+
+    assert len(events) == 6
+    assert events[-1]["turnCount"] == 1
+
+
+def test_dropped_stream_is_not_posted_again_by_default():
+    with MockGraphServer(replace(FAST, stream_drop_rate=1.0)) as mock:
+        with pytest.raises(StreamInterruptedError) as excinfo:
+            chat_over_stream(mock.base_url)
+
+        assert mock.stats()["requests"] == 2
+
+    assert len(excinfo.value.events) == 4
@@ -0,0 +1,118 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import msal
+
+from copilot_client.auth import AuthManager
+from tests.helpers import FakeMsalApp, settings
+
+
+def auth_manager(app: FakeMsalApp, **overrides) -> AuthManager:
+    return AuthManager(
+        settings("https://graph.microsoft.com/beta", **{"token_refresh_fraction": 0.0, **overrides}),
+        app=app,
+        token_cache=msal.SerializableTokenCache(),
+    )
+
+
+def test_user_id_for_a_token_does_not_enumerate_accounts():
+    app = FakeMsalApp(("user-a", "user-b"))
+    manager = auth_manager(app, identity_selection="round_robin")
+    tokens = [manager.acquire_access_token() for _ in range(2)]
+    app.calls.clear()
+
+    assert [manager.get_user_id(token) for token in tokens] == ["user-a", "user-b"]
+    assert manager.get_user_id("token-from-elsewhere") is None
+    assert app.calls == {}
+
+
+def test_cached_token_is_served_without_reaching_msal():
+    app = FakeMsalApp()
+    manager = auth_manager(app)
+    token = manager.acquire_access_token()
+    app.calls.clear()
+
+    assert [manager.acquire_access_token() for _ in range(5)] == [token] * 5
+    assert app.calls == {}
+    assert manager.token_cache_stats().hits == 5
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_token_is_refreshed_in_the_background_before_it_expires():
+    app = FakeMsalApp(expires_in=2)
+    manager = auth_manager(app, token_refresh_fraction=0.05)
+    first_token = manager.acquire_access_token()
+    try:
+        assert wait_for(lambda: app.calls.get("force_refresh", 0) >= 1)
+        # The refreshed token replaced the first one in the in-memory cache.
+        assert wait_for(lambda: manager.get_user_id(first_token) is None)
+    finally:
+        manager.sign_out()
+
+    assert app.calls["acquire_token_silent"] == 1
+
+
+def test_sign_out_cancels_the_scheduled_refresh():
+    app = FakeMsalApp(expires_in=2)
+    manager = auth_manager(app, token_refresh_fraction=0.1)
+    manager.acquire_access_token()
+    manager.sign_out()
+    time.sleep(0.4)
+
+    assert "force_refresh" not in app.calls
+
+
+def test_concurrent_cache_misses_share_one_silent_acquisition():
+    app = FakeMsalApp(latency=0.2)
+    manager = auth_manager(app)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        tokens = list(executor.map(lambda _: manager.acquire_access_token(), range(8)))
+
+    assert len(set(tokens)) == 1
+    assert app.calls["acquire_token_silent"] == 1
+
+
+def test_round_robin_rotates_between_two_signed_in_accounts():
+    app = FakeMsalApp(())
+    manager = auth_manager(app, identity_selection="round_robin")
+    manager.sign_in()
+    manager.add_identity()
+
+    tokens = [manager.acquire_access_token() for _ in range(4)]
+
+    assert [manager.get_user_id(token) for token in tokens] == ["user-0", "user-1", "user-0", "user-1"]
+    assert {stats.account_id: stats.tokens_issued for stats in manager.identity_stats()} == {
+        "user-0.tenant": 2,
+        "user-1.tenant": 2,
+    }
+
+
+def test_throttled_account_is_skipped_until_its_back_off_passes():
+    app = FakeMsalApp(("user-a", "user-b"))
+    manager = auth_manager(app, identity_selection="round_robin")
+    throttled = manager.acquire_access_token()
+    manager.record_throttle(throttled, retry_after_seconds=60)
+
+    users = {manager.get_user_id(manager.acquire_access_token()) for _ in range(4)}
+
+    assert users == {"user-b"}
+
+
+def test_device_code_prompt_goes_to_stderr(capsys):
+    app = FakeMsalApp(())
+    manager = auth_manager(app, auth_flow="device_code")
+
+    manager.acquire_access_token()
+
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "Enter ABCD" in captured.err
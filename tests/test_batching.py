@@ -0,0 +1,149 @@
+import threading
+
+import pytest
+
+from copilot_client.apis.search_api import SearchApi
+from copilot_client.batching import (
+    chunk_requests,
+    failed_chunk_responses,
+    order_responses,
+    resubmittable,
+    retryable_items,
+)
+from copilot_client.http import ApiHttpError
+from copilot_client.retry import RetryPolicy
+from tests.helpers import settings
+
+
+class FakeBatchClient:
+    # Answers each $batch call item by item, and fails outright any call that carries a poisoned id.
+    def __init__(self, failing_ids: set[str]):
+        self.failing_ids = failing_ids
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def post_json(self, token: str, path: str, payload: dict, deadline=None) -> dict:
+        with self._lock:
+            self.calls += 1
+        request_ids = [request["id"] for request in payload["requests"]]
+        if self.failing_ids.intersection(request_ids):
+            raise ApiHttpError(status_code=503, message="HTTP 503: Service Unavailable")
+        return {"responses": [{"id": request_id, "status": 200, "body": {}} for request_id in reversed(request_ids)]}
+
+
+class ScriptedBatchClient:
+    # Replies to each $batch call with the next scripted result, raising it if it is an exception.
+    def __init__(self, replies: list):
+        self.replies = list(replies)
+        self.payloads: list[dict] = []
+
+    def post_json(self, token: str, path: str, payload: dict, deadline=None) -> dict:
+        self.payloads.append(payload)
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+def search_api(client: FakeBatchClient) -> SearchApi:
+    return SearchApi(settings("https://graph.microsoft.com/beta", batch_max_parallel=2), client)
+
+
+def test_chunks_at_the_graph_limit():
+    requests_payload = [{"id": str(index)} for index in range(45)]
+
+    chunks = chunk_requests(requests_payload)
+
+    assert [len(chunk) for chunk in chunks] == [20, 20, 5]
+    assert [request for chunk in chunks for request in chunk] == requests_payload
+    assert chunk_requests([]) == []
+
+
+def test_orders_responses_and_fills_missing_items():
+    requests_payload = [{"id": "1"}, {"id": "2"}, {"id": "3"}]
+    responses = [{"id": "3", "status": 200}, {"id": "1", "status": 201}]
+
+    ordered = order_responses(requests_payload, responses)
+
+    assert [(response["id"], response["status"]) for response in ordered] == [("1", 201), ("2", 500), ("3", 200)]
+    assert ordered[1]["body"]["error"]["code"] == "missingBatchResponse"
+
+
+def test_retryable_items_use_the_longest_requested_delay():
+    responses = [
+        {"id": "1", "status": 429, "headers": {"retry-after": "3"}},
+        {"id": "2", "status": 200},
+        {"id": "3", "status": 503, "headers": {"Retry-After": "1"}},
+        {"id": "4", "status": 500},
+    ]
+
+    retry_ids, delay = retryable_items(responses, RetryPolicy(), attempt=1, elapsed_seconds=0.0)
+
+    assert retry_ids == ["1", "3"]
+    assert delay == 3.0
+
+
+def test_retryable_items_respect_the_retry_policy():
+    responses = [{"id": "1", "status": 429, "headers": {"Retry-After": "3"}}]
+
+    assert retryable_items(responses, RetryPolicy(max_retries=1), attempt=2, elapsed_seconds=0.0) == ([], 0.0)
+
+
+def test_resubmittable_drops_dependencies_outside_the_batch():
+    requests_payload = [
+        {"id": "2", "method": "GET", "dependsOn": ["1"]},
+        {"id": "3", "method": "GET", "dependsOn": ["1", "2"]},
+    ]
+
+    assert resubmittable(requests_payload) == [
+        {"id": "2", "method": "GET"},
+        {"id": "3", "method": "GET", "dependsOn": ["2"]},
+    ]
+
+
+def test_failed_chunk_items_carry_the_error():
+    responses = failed_chunk_responses([{"id": "1"}, {"id": "2"}], 503, "HTTP 503: Service Unavailable")
+
+    assert [(response["id"], response["status"]) for response in responses] == [("1", 503), ("2", 503)]
+    assert responses[0]["body"]["error"] == {"code": "batchRequestFailed", "message": "HTTP 503: Service Unavailable"}
+
+
+def test_one_failed_chunk_keeps_the_other_chunks_results():
+    requests_payload = [{"id": str(index), "method": "GET", "url": "/me"} for index in range(45)]
+    client = FakeBatchClient(failing_ids={"25"})
+
+    responses = search_api(client).run_graph_batches("token", requests_payload)["responses"]
+
+    assert client.calls == 3
+    assert [response["id"] for response in responses] == [str(index) for index in range(45)]
+    statuses = [response["status"] for response in responses]
+    assert statuses == [200] * 20 + [503] * 20 + [200] * 5
+    assert responses[25]["body"]["error"]["code"] == "batchRequestFailed"
+
+
+def test_batch_with_no_successful_chunk_raises():
+    requests_payload = [{"id": str(index), "method": "GET", "url": "/me"} for index in range(25)]
+    client = FakeBatchClient(failing_ids={"0", "20"})
+
+    with pytest.raises(ApiHttpError) as excinfo:
+        search_api(client).run_graph_batches("token", requests_payload)
+
+    assert excinfo.value.status_code == 503
+
+
+def test_failed_item_retry_keeps_the_first_pass_results():
+    requests_payload = [{"id": str(index), "method": "GET", "url": "/me"} for index in (1, 2, 3)]
+    first_pass = {
+        "responses": [
+            {"id": "1", "status": 200, "body": {"value": 1}},
+            {"id": "2", "status": 429, "headers": {"Retry-After": "0"}, "body": {}},
+            {"id": "3", "status": 200, "body": {"value": 3}},
+        ]
+    }
+    client = ScriptedBatchClient([first_pass, ApiHttpError(status_code=503, message="HTTP 503: Service Unavailable")])
+
+    responses = search_api(client).run_graph_batch("token", requests_payload)["responses"]
+
+    assert [request["id"] for request in client.payloads[1]["requests"]] == ["2"]
+    assert [(response["id"], response["status"]) for response in responses] == [("1", 200), ("2", 429), ("3", 200)]
+    assert responses[0]["body"] == {"value": 1}
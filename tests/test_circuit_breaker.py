@@ -0,0 +1,84 @@
+from copilot_client.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from tests.helpers import FakeClock
+
+
+def breaker(clock: FakeClock) -> CircuitBreaker:
+    return CircuitBreaker(failure_rate_threshold=0.5, minimum_calls=4, window_size=10, open_seconds=30, clock=clock)
+
+
+def trip(circuit: CircuitBreaker) -> None:
+    for _ in range(4):
+        assert circuit.allow_request()
+        circuit.record_failure()
+
+
+def test_stays_closed_below_minimum_calls():
+    circuit = breaker(FakeClock())
+    for _ in range(3):
+        circuit.record_failure()
+
+    assert circuit.snapshot("search").state == CLOSED
+    assert circuit.allow_request()
+
+
+def test_stays_closed_below_failure_rate():
+    circuit = breaker(FakeClock())
+    for _ in range(3):
+        circuit.record_success()
+        circuit.record_success()
+        circuit.record_failure()
+
+    assert circuit.snapshot("search").state == CLOSED
+
+
+def test_opens_and_rejects_until_the_open_period_ends():
+    clock = FakeClock()
+    circuit = breaker(clock)
+    trip(circuit)
+
+    assert not circuit.allow_request()
+    state = circuit.snapshot("search")
+    assert (state.state, state.rejected_calls, state.retry_after_seconds) == (OPEN, 1, 30)
+
+    clock.now += 30
+    assert circuit.allow_request()
+    assert circuit.snapshot("search").state == HALF_OPEN
+
+
+def test_half_open_allows_one_probe_and_closes_on_success():
+    clock = FakeClock()
+    circuit = breaker(clock)
+    trip(circuit)
+    clock.now += 30
+
+    assert circuit.allow_request()
+    assert not circuit.allow_request()
+    circuit.record_success()
+
+    assert circuit.snapshot("search").state == CLOSED
+    assert circuit.allow_request()
+
+
+def test_half_open_failure_reopens():
+    clock = FakeClock()
+    circuit = breaker(clock)
+    trip(circuit)
+    clock.now += 30
+
+    assert circuit.allow_request()
+    circuit.record_failure()
+
+    assert circuit.snapshot("search").state == OPEN
+    assert not circuit.allow_request()
+
+
+def test_release_returns_the_half_open_probe():
+    clock = FakeClock()
+    circuit = breaker(clock)
+    trip(circuit)
+    clock.now += 30
+
+    assert circuit.allow_request()
+    circuit.release()
+
+    assert circuit.allow_request()
@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+import pytest
+
+from copilot_client.coalescing import SingleFlight
+
+
+def blocking_call(release: threading.Event, result):
+    calls = []
+
+    def call():
+        calls.append(1)
+        release.wait(5)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    return call, calls
+
+
+def wait_for_followers(flight: SingleFlight, count: int) -> None:
+    for _ in range(500):
+        if flight.coalesced_count >= count:
+            return
+        time.sleep(0.01)
+
+
+def test_identical_calls_share_one_execution_and_get_independent_copies():
+    flight = SingleFlight()
+    release = threading.Event()
+    call, calls = blocking_call(release, {"searchHits": [1, 2]})
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(flight.do, "search", call) for _ in range(4)]
+        wait_for_followers(flight, 3)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert flight.coalesced_count == 3
+    assert all(result == {"searchHits": [1, 2]} for result in results)
+    results[0]["searchHits"].append(3)
+    assert results[1] == {"searchHits": [1, 2]}
+
+
+def test_followers_see_the_leaders_error():
+    flight = SingleFlight()
+    release = threading.Event()
+    call, calls = blocking_call(release, RuntimeError("HTTP 503"))
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(flight.do, "search", call) for _ in range(3)]
+        wait_for_followers(flight, 2)
+        release.set()
+        for future in futures:
+            with pytest.raises(RuntimeError, match="HTTP 503"):
+                future.result()
+
+    assert len(calls) == 1
+
+
+def test_different_keys_and_later_calls_run_separately():
+    flight = SingleFlight()
+    calls = []
+
+    def call():
+        calls.append(1)
+        return len(calls)
+
+    assert flight.do("a", call) == 1
+    assert flight.do("b", call) == 2
+    assert flight.do("a", call) == 3
+    assert flight.coalesced_count == 0
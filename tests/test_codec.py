@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from copilot_client import codec
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(codec, "orjson", None)
+    return request.param
+
+
+def test_dumps_is_compact_utf8(backend):
+    encoded = codec.dumps({"text": "café", "hits": [1, 2]})
+
+    assert encoded == '{"text":"café","hits":[1,2]}'.encode("utf-8")
+
+
+def test_loads_accepts_bytes_and_text(backend):
+    value = {"searchHits": [{"webUrl": "https://contoso/doc.docx", "score": 0.5}]}
+
+    assert codec.loads(codec.dumps(value)) == value
+    assert codec.loads(json.dumps(value)) == value
+    assert codec.loads(bytearray(codec.dumps(value))) == value
+
+
+def test_values_orjson_rejects_fall_back_to_json(backend):
+    value = {"id": 2**70}
+
+    assert codec.loads(codec.dumps(value)) == value
+    assert json.loads(codec.dumps_pretty(value)) == value
+
+
+def test_dumps_pretty_indents_two_spaces(backend):
+    assert codec.dumps_pretty({"a": [1]}) == '{\n  "a": [\n    1\n  ]\n}'
+
+
+def test_invalid_json_raises_value_error(backend):
+    with pytest.raises(ValueError):
+        codec.loads(b"{not json")
@@ -0,0 +1,66 @@
+from dataclasses import replace
+import gzip
+import zlib
+
+import pytest
+
+from copilot_client import compression
+from copilot_client.compression import TransferStats, accept_encoding_header, compress_body, supported_encodings
+from copilot_client.config import ConfigurationError
+from copilot_client.http import HttpClient
+from copilot_client.mock_server import MockGraphServer
+from tests.helpers import FAST, settings
+
+
+def test_accept_encoding_keeps_only_supported_encodings():
+    assert accept_encoding_header("gzip, zstd, identity") == "gzip, identity"
+    assert accept_encoding_header("zstd") == "identity"
+    if "br" not in supported_encodings():
+        assert accept_encoding_header("br, gzip") == "gzip"
+
+
+def test_compress_body_round_trips():
+    body = b'{"requests":[' + b'{"id":"1","method":"POST"},' * 50 + b"{}]}"
+
+    assert gzip.decompress(compress_body(body, "gzip")) == body
+    assert zlib.decompress(compress_body(body, "deflate")) == body
+    with pytest.raises(ValueError):
+        compress_body(body, "zstd")
+
+
+def test_transfer_stats_report_saved_bytes():
+    stats = TransferStats()
+    stats.record_request("batch", 1000, 200)
+    stats.record_response("batch", 5000, 1000)
+    stats.record_request("batch", 10, 10)
+
+    [snapshot] = stats.snapshot()
+    assert (snapshot.endpoint, snapshot.requests, snapshot.request_bytes) == ("batch", 2, 1010)
+    assert snapshot.saved_bytes == 800 + 4000
+
+
+def test_compressed_request_and_response_bodies_are_counted_on_the_wire():
+    with MockGraphServer(replace(FAST, search_hits=25)) as mock:
+        client = HttpClient(settings(mock.base_url, request_compression="gzip", request_compression_min_bytes=64))
+        client.post_json("token", "/copilot/search", {"query": "quarterly revenue " * 20})
+
+    [stats] = client.transfer_stats()
+    assert stats.request_wire_bytes < stats.request_bytes
+    assert stats.response_wire_bytes < stats.response_bytes
+
+
+def test_small_bodies_are_sent_uncompressed():
+    with MockGraphServer(FAST) as mock:
+        client = HttpClient(settings(mock.base_url, request_compression="gzip", request_compression_min_bytes=4096))
+        client.post_json("token", "/copilot/search", {"query": "q"})
+
+    [stats] = client.transfer_stats()
+    assert stats.request_wire_bytes == stats.request_bytes
+
+
+def test_brotli_request_compression_is_rejected_at_startup_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+
+    settings("https://graph.microsoft.com/beta", request_compression="gzip").validate()
+    with pytest.raises(ConfigurationError, match="brotli"):
+        settings("https://graph.microsoft.com/beta", request_compression="br").validate()
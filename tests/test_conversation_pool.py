@@ -0,0 +1,209 @@
+from dataclasses import replace
+import time
+
+from copilot_client.apis import ChatApi
+from copilot_client.conversation_pool import ConversationPool
+from copilot_client.http import HttpClient
+from copilot_client.mock_server import MockGraphServer
+from tests.helpers import FAST, FakeClock, settings
+
+
+def creator():
+    created = iter(f"conversation-{index}" for index in range(100))
+    return lambda: next(created)
+
+
+def test_continuing_caller_gets_its_most_recent_conversation_back():
+    pool = ConversationPool(max_idle=4, clock=FakeClock())
+    create = creator()
+    first, _ = pool.checkout("user-a", create, continuing=True)
+    second, _ = pool.checkout("user-a", create, continuing=True)
+    pool.checkin(first)
+    pool.checkin(second)
+
+    assert pool.checkout("user-a", create, continuing=True) == (second, True)
+    assert pool.checkout("user-a", create, continuing=True) == (first, True)
+
+
+def test_independent_chats_only_get_fresh_conversations():
+    pool = ConversationPool(clock=FakeClock())
+    create = creator()
+    used, _ = pool.checkout("user-a", create, continuing=True)
+    pool.checkin(used)
+    pool.add("user-a", "fresh")
+
+    assert pool.checkout("user-a", create) == ("fresh", True)
+    assert pool.checkout("user-a", create) == ("conversation-1", False)
+    assert pool.idle_count("user-a") == 1
+
+
+def test_continuing_caller_prefers_a_continued_conversation_over_a_fresh_one():
+    pool = ConversationPool(clock=FakeClock())
+    create = creator()
+    used, _ = pool.checkout("user-a", create, continuing=True)
+    pool.checkin(used)
+    pool.add("user-a", "fresh")
+
+    assert pool.checkout("user-a", create, continuing=True) == (used, True)
+    assert pool.checkout("user-a", create, continuing=True) == ("fresh", True)
+
+
+def test_conversations_are_not_shared_between_owners():
+    pool = ConversationPool(clock=FakeClock())
+    create = creator()
+    pool.add("user-a", "fresh-a")
+
+    assert pool.checkout("user-b", create, continuing=True) == ("conversation-0", False)
+    pool.checkin("conversation-0")
+    assert pool.checkout("user-a", create, continuing=True) == ("fresh-a", True)
+    assert pool.idle_count("user-a") == 0
+    assert pool.idle_count("user-b") == 1
+
+
+def test_checkout_without_reuse_always_creates():
+    pool = ConversationPool(clock=FakeClock())
+    pool.add("user-a", "a")
+
+    assert pool.checkout("user-a", creator(), reuse=False) == ("conversation-0", False)
+    assert pool.idle_count("user-a") == 1
+
+
+def test_checkin_keeps_at_most_max_idle_per_owner():
+    pool = ConversationPool(max_idle=2, clock=FakeClock())
+    create = creator()
+    conversation_ids = [pool.checkout("user-a", create)[0] for _ in range(3)]
+    for conversation_id in conversation_ids:
+        pool.checkin(conversation_id)
+
+    stats = pool.stats()
+    assert (stats.idle, stats.checked_out, stats.created) == (2, 0, 3)
+    assert pool.checkout("user-a", create, continuing=True) == ("conversation-2", True)
+
+
+def test_idle_conversations_expire():
+    clock = FakeClock()
+    pool = ConversationPool(idle_timeout_seconds=60, clock=clock)
+    pool.add("user-a", "old")
+    clock.now = 50
+    pool.add("user-a", "new")
+
+    clock.now = 61
+    assert pool.idle_count() == 1
+    assert pool.stats().expired == 1
+    assert pool.checkout("user-a", creator()) == ("new", True)
+
+
+def test_discarded_and_unknown_conversations_are_not_pooled():
+    pool = ConversationPool(clock=FakeClock())
+    conversation_id, _ = pool.checkout("user-a", creator())
+    pool.discard(conversation_id)
+    pool.checkin(conversation_id)
+    pool.checkin("never-checked-out")
+
+    assert pool.idle_count() == 0
+
+
+def test_clear_forgets_checked_out_conversations():
+    pool = ConversationPool(clock=FakeClock())
+    conversation_id, _ = pool.checkout("user-a", creator())
+    pool.add("user-a", "idle")
+    pool.clear()
+    pool.checkin(conversation_id)
+
+    assert pool.idle_count() == 0
+
+
+def wait_for_idle(chat: ChatApi, idle: int) -> None:
+    # Replacements are created in the background; give them a moment to land.
+    deadline = time.monotonic() + 5.0
+    while chat.conversation_pool_stats().idle < idle and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def chat_api(base_url: str) -> ChatApi:
+    accounts = {"token-a": "user-a.tenant", "token-a-refreshed": "user-a.tenant", "token-b": "user-b.tenant"}
+    return ChatApi(settings(base_url), HttpClient(settings(base_url)), account_for_token=accounts.get)
+
+
+def test_independent_chats_each_start_a_new_conversation():
+    with MockGraphServer(FAST) as mock:
+        chat = chat_api(mock.base_url)
+        results = [chat.send("token-a", {"prompt": "hello"}) for _ in range(3)]
+
+    assert [result["turnCount"] for result in results] == [1, 1, 1]
+    assert chat.conversation_pool_stats().idle == 0
+
+
+def test_continued_chat_keeps_its_conversation_across_token_refreshes():
+    with MockGraphServer(FAST) as mock:
+        chat = chat_api(mock.base_url)
+        first = chat.send("token-a", {"prompt": "hello"}, continue_conversation=True)
+        second = chat.send("token-a-refreshed", {"prompt": "again"}, continue_conversation=True)
+        other_identity = chat.send("token-b", {"prompt": "hello"}, continue_conversation=True)
+
+    assert second["id"] == first["id"]
+    assert second["turnCount"] == 2
+    assert other_identity["id"] != first["id"]
+    assert other_identity["turnCount"] == 1
+
+
+def test_precreated_conversation_is_used_by_the_first_chat_of_its_owner():
+    with MockGraphServer(FAST) as mock:
+        chat = chat_api(mock.base_url)
+        chat.precreate_conversations("token-a", 1)
+        chat.send("token-b", {"prompt": "hello"})
+        chat.send("token-a", {"prompt": "hello"})
+        wait_for_idle(chat, 1)
+
+    stats = chat.conversation_pool_stats()
+    assert (stats.created, stats.reused, stats.idle) == (3, 1, 1)
+
+
+def test_pool_is_refilled_across_sequential_chats():
+    with MockGraphServer(FAST) as mock:
+        chat = chat_api(mock.base_url)
+        chat.precreate_conversations("token-a", 1)
+        for _ in range(5):
+            chat.send("token-a", {"prompt": "hello"})
+            wait_for_idle(chat, 1)
+
+    stats = chat.conversation_pool_stats()
+    assert (stats.created, stats.reused, stats.idle) == (6, 5, 1)
+
+
+def test_refill_stops_at_the_pool_size_and_skips_cleared_pools():
+    pool = ConversationPool(max_idle=2, clock=FakeClock())
+    create = creator()
+    pool.add("user-a", "fresh-1")
+    pool.add("user-a", "fresh-2")
+    pool.checkout("user-a", create)
+    pool.checkout("user-a", create)
+
+    first = pool.start_refill("user-a")
+    second = pool.start_refill("user-a")
+    assert pool.start_refill("user-a") is None
+    pool.clear()
+    pool.finish_refill("user-a", first, "stale")
+    assert pool.idle_count("user-a") == 0
+    assert second is not None
+
+
+def test_continued_conversations_are_not_refilled():
+    pool = ConversationPool(clock=FakeClock())
+    create = creator()
+    used, _ = pool.checkout("user-a", create, continuing=True)
+    pool.checkin(used)
+    pool.checkout("user-a", create, continuing=True)
+
+    assert pool.start_refill("user-a") is None
+
+
+def test_dropped_chat_stream_recovers_from_the_conversation_state_without_posting_again():
+    with MockGraphServer(replace(FAST, stream_drop_rate=1.0)) as mock:
+        chat = chat_api(mock.base_url)
+        result = chat.send("token-a", {"prompt": "hello", "useStream": True})
+
+        # One POST creates the conversation, one starts the stream, and one GET fetches the state.
+        assert mock.stats()["requests"] == 3
+
+    assert result["finalConversation"]["turnCount"] == 1
@@ -0,0 +1,33 @@
+import pytest
+
+from copilot_client.deadline import Deadline, DeadlineExceededError
+from tests.helpers import FakeClock
+
+
+def test_timeout_is_capped_by_the_remaining_budget():
+    clock = FakeClock()
+    deadline = Deadline(10, clock=clock)
+
+    assert deadline.timeout(30) == 10
+    clock.now = 8
+    assert deadline.timeout(30) == 2
+    assert deadline.timeout(1) == 1
+
+
+def test_can_wait_only_while_time_remains_after_the_wait():
+    clock = FakeClock()
+    deadline = Deadline(5, clock=clock)
+
+    assert deadline.can_wait(4)
+    assert not deadline.can_wait(5)
+
+
+def test_expired_deadline_raises():
+    clock = FakeClock()
+    deadline = Deadline(5, clock=clock)
+    clock.now = 6
+
+    assert deadline.expired()
+    assert deadline.remaining() == 0
+    with pytest.raises(DeadlineExceededError):
+        deadline.timeout(30)
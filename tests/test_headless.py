@@ -0,0 +1,114 @@
+import io
+import threading
+
+from copilot_client import codec, headless
+from copilot_client.headless import ResultWriter, run_workload
+from copilot_client.models import AuthState
+from tests.helpers import settings
+
+
+class FakeService:
+    def __init__(self):
+        self.calls: list[tuple[str, dict]] = []
+        self.added_identities = 0
+        self.closed = False
+        self.request_deadline_seconds = None
+        self._lock = threading.Lock()
+
+    def send_chat(self, payload: dict) -> dict:
+        return self._record("chat", payload)
+
+    def run_search(self, payload: dict, cache_mode: str = "use") -> dict:
+        if payload.get("query") == "fail":
+            raise RuntimeError("HTTP 500: boom")
+        return self._record("search", payload)
+
+    def run_retrieval(self, payload: dict, cache_mode: str = "use") -> dict:
+        return self._record("retrieval", payload)
+
+    def sign_in(self) -> AuthState:
+        return AuthState(is_signed_in=True, username="user@contoso.com")
+
+    def add_identity(self) -> AuthState:
+        self.added_identities += 1
+        return self.sign_in()
+
+    def wait_for_warm_up(self, timeout: float | None = None) -> bool:
+        return True
+
+    def close(self) -> None:
+        self.closed = True
+
+    def _record(self, operation_type: str, payload: dict) -> dict:
+        with self._lock:
+            self.calls.append((operation_type, payload))
+        return {"echo": payload}
+
+
+def workload(*lines) -> io.BytesIO:
+    return io.BytesIO(b"\n".join(line if isinstance(line, bytes) else codec.dumps(line) for line in lines) + b"\n")
+
+
+def read_records(output: io.BytesIO) -> list[dict]:
+    return [codec.loads(line) for line in output.getvalue().splitlines()]
+
+
+def test_every_line_produces_one_record():
+    service = FakeService()
+    output = io.BytesIO()
+    writer = ResultWriter(output)
+    input_file = workload(
+        {"id": "a", "type": "chat", "payload": {"prompt": "hello"}},
+        {"id": "b", "type": "search", "payload": {"query": "q"}},
+        b"",
+        {"id": "c", "type": "retrieval", "payload": {"queryString": "r"}},
+        {"id": "d", "type": "search", "payload": {"query": "fail"}},
+        b"{not json",
+        {"id": "e", "type": "delete", "payload": {}},
+    )
+
+    run_workload(service, input_file, writer, workers=2)
+
+    records = sorted(read_records(output), key=lambda record: record["line"])
+    assert [(record["line"], record["status"]) for record in records] == [
+        (1, "ok"),
+        (2, "ok"),
+        (4, "ok"),
+        (5, "error"),
+        (6, "error"),
+        (7, "error"),
+    ]
+    assert [record["id"] for record in records[:4]] == ["a", "b", "c", "d"]
+    assert records[0]["result"] == {"echo": {"prompt": "hello"}}
+    assert records[3]["error"] == "HTTP 500: boom"
+    assert records[4]["error"].startswith("Invalid JSON")
+    assert all("elapsedMs" in record for record in records)
+    assert (writer.succeeded, writer.failed) == (3, 3)
+
+
+def test_large_workload_runs_every_operation_once():
+    service = FakeService()
+    output = io.BytesIO()
+    operations = [{"id": str(index), "type": "search", "payload": {"query": f"q{index}"}} for index in range(500)]
+    input_file = workload(*operations)
+
+    run_workload(service, input_file, ResultWriter(output), workers=8)
+
+    assert sorted(int(record["id"]) for record in read_records(output)) == list(range(500))
+    assert len(service.calls) == 500
+
+
+def test_main_signs_in_extra_identities_and_closes_the_service(tmp_path, monkeypatch):
+    service = FakeService()
+    monkeypatch.setattr(headless.AppSettings, "from_env", staticmethod(lambda: settings("http://127.0.0.1")))
+    monkeypatch.setattr(headless, "build_service", lambda app_settings: service)
+    input_path = tmp_path / "workload.jsonl"
+    input_path.write_bytes(workload({"type": "chat", "payload": {"prompt": "hello"}}).getvalue())
+    output_path = tmp_path / "results.jsonl"
+
+    exit_code = headless.main([str(input_path), "-o", str(output_path), "--add-identity", "--add-identity"])
+
+    assert exit_code == 0
+    assert service.added_identities == 2
+    assert service.closed
+    assert [record["status"] for record in read_records(io.BytesIO(output_path.read_bytes()))] == ["ok"]
@@ -0,0 +1,120 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import time
+
+import pytest
+
+from copilot_client.hedging import HedgingPolicy, LatencyTracker
+from copilot_client.http import HttpClient
+from tests.helpers import settings
+
+
+class SlowFirstServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, first_delay: float):
+        self.first_delay = first_delay
+        self.requests = 0
+        self.lock = threading.Lock()
+        super().__init__(("127.0.0.1", 0), SlowFirstHandler)
+
+
+class SlowFirstHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", "0")))
+        with self.server.lock:
+            self.server.requests += 1
+            number = self.server.requests
+        if number == 1:
+            time.sleep(self.server.first_delay)
+        body = f'{{"request":{number}}}'.encode("ascii")
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            pass
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def slow_first_server():
+    server = SlowFirstServer(first_delay=2.0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_latency_percentile():
+    tracker = LatencyTracker()
+    for seconds in range(1, 101):
+        tracker.record(seconds / 100)
+
+    assert tracker.percentile(50) == 0.5
+    assert tracker.percentile(95) == 0.95
+    assert LatencyTracker().percentile(95) is None
+
+
+def test_delay_uses_the_initial_value_until_enough_samples():
+    policy = HedgingPolicy(("search",), initial_delay_seconds=2.0, min_delay_seconds=0.05, min_samples=3)
+    policy.record_latency("search", 0.01)
+    policy.record_latency("search", 0.02)
+    assert policy.delay_for("search") == 2.0
+
+    policy.record_latency("search", 0.3)
+    assert policy.delay_for("search") == 0.3
+    assert policy.is_enabled("search") and not policy.is_enabled("chat")
+
+
+def test_hedges_are_capped_by_the_budget():
+    policy = HedgingPolicy(("search",), budget_ratio=0.1)
+    for _ in range(20):
+        policy.record_primary("search")
+
+    assert [policy.try_acquire_hedge("search") for _ in range(3)] == [True, True, False]
+    [stats] = policy.stats()
+    assert (stats.primary_requests, stats.hedged_requests) == (20, 2)
+
+
+def test_slow_primary_is_beaten_by_the_hedge(slow_first_server):
+    client = HttpClient(
+        settings(
+            f"http://127.0.0.1:{slow_first_server.server_port}",
+            hedge_endpoints=("search",),
+            hedge_initial_delay_seconds=0.1,
+        )
+    )
+
+    started = time.monotonic()
+    result = client.post_json("token", "/copilot/search", {"query": "q"})
+    elapsed = time.monotonic() - started
+    client.close()
+
+    assert result == {"request": 2}
+    assert elapsed < 1.5
+    [stats] = client.hedge_stats()
+    assert (stats.primary_requests, stats.hedged_requests, stats.hedge_wins) == (1, 1, 1)
+    assert client.rate_limit_stats()[0].in_flight == 0
+
+
+def test_close_stops_the_hedge_threads(slow_first_server):
+    slow_first_server.first_delay = 0
+    client = HttpClient(
+        settings(
+            f"http://127.0.0.1:{slow_first_server.server_port}",
+            hedge_endpoints=("search",),
+        )
+    )
+    client.post_json("token", "/copilot/search", {"query": "q"})
+    assert any(thread.name.startswith("copilot-hedge") for thread in threading.enumerate())
+
+    client.close()
+
+    assert not any(thread.name.startswith("copilot-hedge") for thread in threading.enumerate())
@@ -0,0 +1,212 @@
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+
+import pytest
+
+from copilot_client.deadline import Deadline, DeadlineExceededError
+from copilot_client.http import ApiHttpError, CircuitOpenError, HttpClient, StreamInterruptedError, _already_delivered
+from copilot_client.mock_server import MockGraphServer
+from tests.helpers import FAST, settings
+
+
+class ScriptedSseServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, streams: list[tuple[bytes, bool]]):
+        # Each POST gets the next (body, drop) pair; a dropped stream closes without its final chunk.
+        self.streams = list(streams)
+        self.last_event_ids: list[str | None] = []
+        super().__init__(("127.0.0.1", 0), ScriptedSseHandler)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class ScriptedSseHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", "0")))
+        self.server.last_event_ids.append(self.headers.get("Last-Event-ID"))
+        body, drop = self.server.streams.pop(0)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.wfile.write(f"{len(body):x}\r\n".encode("ascii") + body + b"\r\n")
+        if drop:
+            self.close_connection = True
+            return
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def server():
+    with MockGraphServer(FAST) as mock:
+        yield mock
+
+
+@pytest.fixture
+def scripted_sse():
+    servers = []
+
+    def start(*streams: tuple[bytes, bool]) -> ScriptedSseServer:
+        server = ScriptedSseServer(list(streams))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_dropped_stream_resumes_from_the_last_event():
+    with MockGraphServer(replace(FAST, stream_drop_rate=1.0)) as mock:
+        client = HttpClient(settings(mock.base_url, stream_reconnect_attempts=3))
+        conversation = client.post_json("token", "/copilot/conversations", {})
+        received = []
+
+        events = client.post_sse_json(
+            "token",
+            f"/copilot/conversations/{conversation['id']}/chatOverStream",
+            {"message": {"text": "hello"}},
+            on_event=received.append,
+        )
+
+        assert len(events) == 6
+        assert received == events
+        assert mock.stats()["stream_dropped"] == 1
+        assert mock.stats()["stream_resumed"] == 1
+        assert events[-1]["turnCount"] == 1
+
+
+def test_throttled_call_retries_then_reports_the_status():
+    with MockGraphServer(replace(FAST, throttle_rate=1.0, retry_after_seconds=0)) as mock:
+        client = HttpClient(settings(mock.base_url))
+
+        with pytest.raises(ApiHttpError) as excinfo:
+            client.post_json("token", "/copilot/search", {"query": "q"})
+
+        assert excinfo.value.status_code == 429
+        assert mock.stats()["requests"] == 3
+        assert client.rate_limit_stats()[0].throttled_count == 3
+
+
+def test_retried_failures_count_once_against_the_breaker():
+    with MockGraphServer(replace(FAST, error_rate=1.0, retry_after_seconds=0)) as mock:
+        client = HttpClient(settings(mock.base_url, circuit_minimum_calls=2))
+
+        for _ in range(2):
+            with pytest.raises(ApiHttpError):
+                client.post_json("token", "/copilot/search", {"query": "q"})
+        with pytest.raises(CircuitOpenError):
+            client.post_json("token", "/copilot/search", {"query": "q"})
+
+        assert mock.stats()["requests"] == 6
+
+
+def test_expired_deadline_fails_before_sending(server):
+    client = HttpClient(settings(server.base_url))
+
+    with pytest.raises(DeadlineExceededError):
+        client.post_json("token", "/copilot/search", {"query": "q"}, deadline=Deadline(0))
+
+    assert server.stats().get("requests", 0) == 0
+
+
+def test_streamed_hits_match_the_buffered_response(server):
+    client = HttpClient(settings(server.base_url, request_compression="gzip", request_compression_min_bytes=0))
+    buffered = client.post_json("token", "/copilot/search", {"query": "q"})
+
+    with client.post_json_streamed("token", "/copilot/search", {"query": "q"}, "searchHits") as hits:
+        streamed = list(hits)
+        envelope = hits.envelope
+
+    assert streamed == buffered["searchHits"]
+    assert {**envelope, "searchHits": streamed} == buffered
+    [stats] = client.transfer_stats()
+    assert stats.request_wire_bytes != stats.request_bytes
+
+
+def test_streamed_response_keeps_its_permit_until_closed(server):
+    client = HttpClient(settings(server.base_url))
+
+    hits = client.post_json_streamed("token", "/copilot/search", {"query": "q"}, "searchHits")
+    assert client.rate_limit_stats()[0].in_flight == 1
+
+    with hits:
+        list(hits)
+    assert client.rate_limit_stats()[0].in_flight == 0
+
+
+def test_resume_ignored_by_the_server_fails_instead_of_replaying():
+    with MockGraphServer(replace(FAST, stream_drop_rate=1.0, stream_resume=False)) as mock:
+        client = HttpClient(settings(mock.base_url, stream_reconnect_attempts=3))
+        conversation = client.post_json("token", "/copilot/conversations", {})
+        received = []
+
+        with pytest.raises(StreamInterruptedError) as excinfo:
+            client.post_sse_json(
+                "token",
+                f"/copilot/conversations/{conversation['id']}/chatOverStream",
+                {"message": {"text": "hello"}},
+                on_event=received.append,
+            )
+
+        assert len(received) == 4
+        assert excinfo.value.events == received
+        assert all(event["turnCount"] == 1 for event in received)
+
+
+def test_events_already_delivered_are_skipped_after_a_resume():
+    assert _already_delivered("3", "3", set())
+    assert _already_delivered("1", "3", set())
+    assert not _already_delivered("4", "3", set())
+    assert _already_delivered("a", "c", {"a", "b", "c"})
+    assert not _already_delivered("d", "c", {"a", "b", "c"})
+    assert not _already_delivered(None, "3", {"3"})
+
+
+def test_events_without_their_own_id_are_all_delivered(scripted_sse):
+    server = scripted_sse((b'id: 1\ndata: {"a": 1}\n\ndata: {"a": 2}\n\ndata: {"a": 3}\n\n', False))
+    client = HttpClient(settings(server.base_url, stream_reconnect_attempts=3))
+
+    events = client.post_sse_json("token", "/copilot/conversations/c/chatOverStream", {})
+
+    assert events == [{"a": 1}, {"a": 2}, {"a": 3}]
+
+
+def test_resume_skips_replayed_ids_and_keeps_events_without_their_own_id(scripted_sse):
+    server = scripted_sse(
+        (b'id: 1\ndata: {"a": 1}\n\ndata: {"a": 2}\n\n', True),
+        (b'id: 1\ndata: {"a": 1}\n\nid: 2\ndata: {"b": 1}\n\ndata: {"b": 2}\n\n', False),
+    )
+    client = HttpClient(settings(server.base_url, stream_reconnect_attempts=3, retry_base_delay_seconds=0))
+
+    events = client.post_sse_json("token", "/copilot/conversations/c/chatOverStream", {})
+
+    assert events == [{"a": 1}, {"a": 2}, {"b": 1}, {"b": 2}]
+    assert server.last_event_ids == [None, "1"]
+
+
+def test_dropped_stream_is_not_posted_again_by_default():
+    with MockGraphServer(replace(FAST, stream_drop_rate=1.0)) as mock:
+        client = HttpClient(settings(mock.base_url))
+        conversation = client.post_json("token", "/copilot/conversations", {})
+
+        with pytest.raises(StreamInterruptedError) as excinfo:
+            client.post_sse_json(
+                "token",
+                f"/copilot/conversations/{conversation['id']}/chatOverStream",
+                {"message": {"text": "hello"}},
+            )
+
+        assert len(excinfo.value.events) == 4
+        assert mock.stats()["requests"] == 2
@@ -0,0 +1,88 @@
+import pytest
+
+from copilot_client import codec
+from copilot_client.json_stream import StreamedJsonArray
+
+
+DOCUMENT = {
+    "@odata.context": "ctx [with] {brackets}",
+    "meta": {"searchHits": ["nested", "key"]},
+    "searchHits": [
+        {"title": 'quote " and \\ backslash', "tags": ["a", "[b]"]},
+        {"title": "café ☃", "nested": {"searchHits": [{"deep": True}]}},
+        {},
+    ],
+    "totalCount": 3,
+}
+
+
+def stream(chunks, array_key="searchHits", on_close=None) -> StreamedJsonArray:
+    return StreamedJsonArray(iter(chunks), array_key, on_close=on_close)
+
+
+def test_yields_items_and_envelope():
+    streamed = stream([codec.dumps(DOCUMENT)])
+
+    assert list(streamed) == DOCUMENT["searchHits"]
+    assert streamed.envelope == {**DOCUMENT, "searchHits": []}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64])
+def test_any_chunking_gives_the_same_result(chunk_size):
+    body = codec.dumps(DOCUMENT)
+    streamed = stream([body[index : index + chunk_size] for index in range(0, len(body), chunk_size)])
+
+    assert list(streamed) == DOCUMENT["searchHits"]
+    assert streamed.envelope["meta"] == DOCUMENT["meta"]
+    assert streamed.envelope["totalCount"] == 3
+
+
+def test_missing_array_keeps_whole_envelope():
+    streamed = stream([b'{"value": [{"a": 1}], "count": 1}'])
+
+    assert list(streamed) == []
+    assert streamed.envelope == {"value": [{"a": 1}], "count": 1}
+
+
+def test_empty_body_gives_empty_envelope():
+    streamed = stream([])
+
+    assert list(streamed) == []
+    assert streamed.envelope == {}
+
+
+def test_envelope_requires_consumption_and_iteration_is_single_use():
+    streamed = stream([b'{"searchHits": []}'])
+
+    with pytest.raises(RuntimeError):
+        streamed.envelope
+    list(streamed)
+    with pytest.raises(RuntimeError):
+        list(streamed)
+
+
+def test_close_without_iterating_releases_response():
+    closed = []
+
+    with stream([b"{}"], on_close=lambda: closed.append(True)):
+        pass
+
+    assert closed == [True]
+
+
+def test_close_stops_a_started_generator_once():
+    events = []
+
+    def chunks():
+        try:
+            yield b'{"searchHits": [{"a": 1},'
+            yield b'{"a": 2}]}'
+        finally:
+            events.append("chunks closed")
+
+    streamed = StreamedJsonArray(chunks(), "searchHits", on_close=lambda: events.append("response closed"))
+    with streamed:
+        assert next(iter(streamed)) == {"a": 1}
+    streamed.close()
+
+    assert events == ["chunks closed", "response closed"]
@@ -0,0 +1,190 @@
+import asyncio
+import threading
+
+import pytest
+
+from copilot_client.deadline import DeadlineExceededError
+from copilot_client.rate_limit import AdaptiveConcurrencyLimiter, EndpointRateLimiter, TokenBucket
+from tests.helpers import FakeClock
+
+
+def test_token_bucket_allows_burst_then_spaces_requests():
+    clock = FakeClock(100.0)
+    bucket = TokenBucket(rate_per_second=2.0, burst=2, clock=clock)
+
+    assert [bucket.reserve(), bucket.reserve()] == [0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+    clock.now += 10
+    assert bucket.reserve() == 0.0
+
+
+def test_throttle_burst_halves_the_limit_once():
+    clock = FakeClock(100.0)
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16, clock=clock)
+    started = [limiter.acquire() for _ in range(16)]
+
+    clock.now += 0.1
+    for started_at in started:
+        limiter.release(429, started_at)
+
+    assert limiter.limit == 8
+    assert limiter.throttled_count == 16
+    assert limiter.in_flight == 0
+
+
+def test_throttle_after_the_decrease_halves_again():
+    clock = FakeClock(100.0)
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16, clock=clock)
+    limiter.release(429, limiter.acquire())
+
+    clock.now += 1
+    limiter.release(503, limiter.acquire())
+
+    assert limiter.limit == 4
+
+
+def test_limit_respects_bounds():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, min_limit=1, max_limit=3)
+
+    for _ in range(3):
+        limiter.acquire()
+        limiter.release(429)
+    assert limiter.limit == 1
+
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release(200)
+    assert limiter.limit == 3
+    assert limiter.success_count == 20
+
+
+def test_server_errors_leave_the_limit_unchanged():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+    limiter.acquire()
+    limiter.release(500)
+
+    assert limiter.limit == 4
+    assert limiter.success_count == 0
+
+
+def test_acquire_blocks_at_the_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    limiter.acquire()
+    acquired = threading.Event()
+
+    def waiter():
+        limiter.acquire()
+        acquired.set()
+
+    threading.Thread(target=waiter, daemon=True).start()
+    assert not acquired.wait(0.1)
+    limiter.release(200)
+    assert acquired.wait(1)
+
+
+def test_endpoint_resolution_prefers_the_longest_path():
+    limiter = EndpointRateLimiter(
+        endpoint_paths={"chat": "/copilot/conversations", "search": "/copilot/search", "batch": "/$batch"},
+        rate_per_second=0.0,
+        burst=1,
+        initial_concurrency=4,
+        max_concurrency=8,
+    )
+
+    assert limiter.resolve_endpoint("https://graph/beta/copilot/conversations/1/chat") == "chat"
+    assert limiter.resolve_endpoint("https://graph/beta/copilot/search?$skiptoken=1") == "search"
+    assert limiter.resolve_endpoint("https://graph/beta/me") == "default"
+
+
+def test_slot_feeds_the_status_back_to_the_limiter():
+    limiter = EndpointRateLimiter(
+        endpoint_paths={"search": "/copilot/search"},
+        rate_per_second=0.0,
+        burst=1,
+        initial_concurrency=4,
+        max_concurrency=8,
+    )
+
+    with limiter.slot("https://graph/beta/copilot/search") as slot:
+        slot.status_code = 429
+
+    [stats] = limiter.stats()
+    assert (stats.endpoint, stats.concurrency_limit, stats.throttled_count, stats.in_flight) == ("search", 2, 1, 0)
+
+
+def test_acquire_gives_up_when_the_timeout_passes():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    limiter.acquire()
+
+    with pytest.raises(DeadlineExceededError):
+        limiter.acquire(timeout=0.05)
+    assert limiter.in_flight == 1
+
+
+def test_slot_does_not_sleep_past_the_timeout():
+    limiter = EndpointRateLimiter(
+        endpoint_paths={"search": "/copilot/search"},
+        rate_per_second=1.0,
+        burst=1,
+        initial_concurrency=4,
+        max_concurrency=8,
+    )
+    with limiter.slot("https://graph/beta/copilot/search"):
+        pass
+
+    with pytest.raises(DeadlineExceededError):
+        with limiter.slot("https://graph/beta/copilot/search", timeout=0.1):
+            pass
+    assert limiter.stats()[0].in_flight == 0
+
+
+def test_held_slot_is_released_by_its_owner():
+    limiter = EndpointRateLimiter(
+        endpoint_paths={"search": "/copilot/search"},
+        rate_per_second=0.0,
+        burst=1,
+        initial_concurrency=4,
+        max_concurrency=8,
+    )
+
+    with limiter.slot("https://graph/beta/copilot/search") as slot:
+        slot.status_code = 200
+        slot.hold()
+    assert limiter.stats()[0].in_flight == 1
+
+    slot.release()
+    slot.release()
+    [stats] = limiter.stats()
+    assert (stats.in_flight, stats.success_count) == (0, 1)
+
+
+def test_async_acquire_waits_for_a_threaded_release():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    limiter.acquire()
+
+    async def scenario() -> None:
+        threading.Timer(0.05, limiter.release, args=(200,)).start()
+        await limiter.acquire_async(timeout=5)
+
+    asyncio.run(scenario())
+    assert limiter.in_flight == 1
+
+
+def test_cancelled_async_acquire_hands_back_a_late_permit():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    limiter.acquire()
+
+    async def scenario() -> None:
+        waiter = asyncio.ensure_future(limiter.acquire_async(timeout=5))
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        # The worker thread is still waiting; the permit it gets once this one is released goes back.
+        limiter.release(200)
+        await asyncio.sleep(0.2)
+
+    asyncio.run(scenario())
+    assert limiter.in_flight == 0
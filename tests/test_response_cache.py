@@ -0,0 +1,155 @@
+import os
+
+import pytest
+
+from copilot_client.response_cache import ResponseCache
+from copilot_client.services import CopilotService
+from tests.helpers import FakeClock
+
+
+class Fetcher:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self) -> dict:
+        self.calls += 1
+        return {"searchHits": [{"webUrl": f"https://contoso/{self.calls}"}]}
+
+
+def test_hit_within_ttl_and_refetch_after_expiry():
+    clock = FakeClock(1000.0)
+    cache = ResponseCache({"search": 60}, clock=clock)
+    fetch = Fetcher()
+
+    first = cache.get_or_fetch("search", "user-a", {"query": "q"}, fetch)
+    assert cache.get_or_fetch("search", "user-a", {"query": " q "}, fetch) == first
+    assert (fetch.calls, cache.hits, cache.misses) == (1, 1, 1)
+
+    clock.now += 61
+    assert cache.get_or_fetch("search", "user-a", {"query": "q"}, fetch) != first
+    assert fetch.calls == 2
+
+
+def test_identities_do_not_share_entries():
+    cache = ResponseCache({"search": 60}, clock=FakeClock(1000.0))
+    fetch = Fetcher()
+
+    cache.get_or_fetch("search", "user-a", {"query": "q"}, fetch)
+    cache.get_or_fetch("search", "user-b", {"query": "q"}, fetch)
+
+    assert fetch.calls == 2
+
+
+def test_bypass_refresh_and_disabled_endpoints():
+    cache = ResponseCache({"search": 60, "retrieval": 0}, clock=FakeClock(1000.0))
+    fetch = Fetcher()
+
+    cache.get_or_fetch("search", "user-a", {"query": "q"}, fetch)
+    cache.get_or_fetch("search", "user-a", {"query": "q"}, fetch, cache_mode="bypass")
+    refreshed = cache.get_or_fetch("search", "user-a", {"query": "q"}, fetch, cache_mode="refresh")
+    assert cache.get_or_fetch("search", "user-a", {"query": "q"}, fetch) == refreshed
+    assert fetch.calls == 3
+
+    cache.get_or_fetch("retrieval", "user-a", {"queryString": "q"}, fetch)
+    cache.get_or_fetch("retrieval", "user-a", {"queryString": "q"}, fetch)
+    assert fetch.calls == 5
+
+    with pytest.raises(ValueError):
+        cache.get_or_fetch("search", "user-a", {"query": "q"}, fetch, cache_mode="sometimes")
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache({"search": 60}, max_entries=2, clock=FakeClock(1000.0))
+    fetch = Fetcher()
+    for query in ("a", "b"):
+        cache.get_or_fetch("search", "user", {"query": query}, fetch)
+    cache.get_or_fetch("search", "user", {"query": "a"}, fetch)
+    cache.get_or_fetch("search", "user", {"query": "c"}, fetch)
+
+    cache.get_or_fetch("search", "user", {"query": "a"}, fetch)
+    assert fetch.calls == 3
+    cache.get_or_fetch("search", "user", {"query": "b"}, fetch)
+    assert fetch.calls == 4
+
+
+def test_disk_tier_survives_a_new_process(tmp_path):
+    clock = FakeClock(1000.0)
+    fetch = Fetcher()
+    first = ResponseCache({"search": 60}, disk_directory=str(tmp_path), clock=clock)
+    value = first.get_or_fetch("search", "user", {"query": "q"}, fetch)
+
+    second = ResponseCache({"search": 60}, disk_directory=str(tmp_path), clock=clock)
+    assert second.get_or_fetch("search", "user", {"query": "q"}, fetch) == value
+    assert fetch.calls == 1
+
+    second.invalidate()
+    assert list(tmp_path.glob("*.json")) == []
+
+
+def test_file_evicted_between_read_and_touch_is_a_miss(tmp_path, monkeypatch):
+    fetch = Fetcher()
+    writer = ResponseCache({"search": 60}, disk_directory=str(tmp_path), clock=FakeClock(1000.0))
+    writer.get_or_fetch("search", "user", {"query": "q"}, fetch)
+
+    def evicted(path, *args, **kwargs):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, "utime", evicted)
+    reader = ResponseCache({"search": 60}, disk_directory=str(tmp_path), clock=FakeClock(1000.0))
+    reader.get_or_fetch("search", "user", {"query": "q"}, fetch)
+
+    assert (fetch.calls, reader.misses) == (2, 1)
+
+
+def test_tmp_file_name_is_unique_per_process(tmp_path, monkeypatch):
+    replaced = []
+    real_replace = os.replace
+
+    def record(source, destination):
+        replaced.append(str(source))
+        real_replace(source, destination)
+
+    monkeypatch.setattr(os, "replace", record)
+    ResponseCache({"search": 60}, disk_directory=str(tmp_path), clock=FakeClock(1000.0)).get_or_fetch(
+        "search", "user", {"query": "q"}, Fetcher()
+    )
+
+    assert len(replaced) == 1
+    assert f".{os.getpid()}." in replaced[0]
+
+
+class UnresolvedAuthManager:
+    def acquire_access_token(self) -> str:
+        return "token-from-elsewhere"
+
+    def get_user_id(self, access_token: str | None = None) -> str | None:
+        return None
+
+
+class CountingSearchApi:
+    def __init__(self):
+        self.calls = 0
+
+    def search(self, token: str, payload: dict, deadline=None) -> dict:
+        self.calls += 1
+        return {"searchHits": [], "call": self.calls}
+
+    def search_next_page(self, token: str, next_link: str, deadline=None) -> dict:
+        self.calls += 1
+        return {"searchHits": [], "call": self.calls}
+
+
+def test_unresolved_identity_is_never_cached():
+    search_api = CountingSearchApi()
+    service = CopilotService(
+        auth_manager=UnresolvedAuthManager(),
+        chat_api=None,
+        search_api=search_api,
+        retrieval_api=None,
+        request_timeout_seconds=30,
+        response_cache=ResponseCache({"search": 60}, clock=FakeClock(1000.0)),
+    )
+
+    assert service.run_search({"query": "q"})["call"] == 1
+    assert service.run_search({"query": "q"})["call"] == 2
+    assert service.run_search_next_page("https://graph/next")["call"] == 3
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from copilot_client.retry import RetryPolicy, server_requested_delay
+
+
+def policy(**overrides) -> RetryPolicy:
+    return RetryPolicy(random_source=lambda: 1.0, **overrides)
+
+
+def test_backoff_doubles_up_to_the_cap():
+    retry_policy = policy(base_delay_seconds=0.5, max_delay_seconds=3.0)
+
+    assert [retry_policy.backoff_delay(attempt) for attempt in range(1, 6)] == [0.5, 1.0, 2.0, 3.0, 3.0]
+
+
+def test_backoff_is_full_jitter():
+    retry_policy = RetryPolicy(base_delay_seconds=1.0, random_source=lambda: 0.25)
+
+    assert retry_policy.backoff_delay(3) == 1.0
+
+
+def test_non_retryable_status_and_exhausted_attempts_stop():
+    retry_policy = policy(max_retries=2)
+
+    assert retry_policy.next_delay(1, 400, {}, 0.0) is None
+    assert retry_policy.next_delay(3, 503, {}, 0.0) is None
+    assert retry_policy.next_delay(2, 503, {}, 0.0) == 1.0
+
+
+def test_server_delay_wins_over_backoff():
+    assert policy().next_delay(1, 429, {"Retry-After": "7"}, 0.0) == 7.0
+
+
+def test_total_retry_budget_is_enforced():
+    retry_policy = policy(max_total_seconds=10.0)
+
+    assert retry_policy.next_delay(1, 429, {"Retry-After": "4"}, 5.0) == 4.0
+    assert retry_policy.next_delay(1, 429, {"Retry-After": "6"}, 5.0) is None
+
+
+@pytest.mark.parametrize(
+    ("headers", "expected"),
+    [
+        (None, None),
+        ({}, None),
+        ({"Retry-After": "2.5"}, 2.5),
+        ({"Retry-After": "-1"}, None),
+        ({"Retry-After": "nan"}, None),
+        ({"Retry-After": "soon"}, None),
+        ({"RateLimit-Reset": "3"}, 3.0),
+        ({"Retry-After": "1", "RateLimit-Reset": "3"}, 1.0),
+    ],
+)
+def test_server_requested_delay(headers, expected):
+    assert server_requested_delay(headers) == expected
+
+
+def test_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+
+    delay = server_requested_delay({"Retry-After": format_datetime(retry_at, usegmt=True)})
+
+    assert 28 <= delay <= 30
+
+
+def test_retry_after_date_in_the_past_is_zero():
+    retry_at = datetime.now(timezone.utc) - timedelta(minutes=5)
+
+    assert server_requested_delay({"Retry-After": format_datetime(retry_at, usegmt=True)}) == 0.0
@@ -0,0 +1,75 @@
+from copilot_client.sse import SseDecoder, SseEvent
+
+
+def decode(*chunks: bytes) -> list[SseEvent]:
+    decoder = SseDecoder()
+    events = []
+    for chunk in chunks:
+        events.extend(decoder.feed(chunk))
+    events.extend(decoder.flush())
+    return events
+
+
+def test_dispatches_event_fields():
+    events = decode(b"event: update\nid: 7\nretry: 1500\ndata: {\"a\": 1}\n\n")
+
+    assert events == [SseEvent(data='{"a": 1}', event="update", id="7", retry=1500, has_own_id=True)]
+
+
+def test_joins_multiline_data_and_skips_comments():
+    events = decode(b": keep-alive\ndata: first\ndata:second\n\n")
+
+    assert [event.data for event in events] == ["first\nsecond"]
+    assert events[0].event == "message"
+
+
+def test_event_type_resets_but_last_event_id_persists():
+    events = decode(b"event: a\nid: 1\ndata: x\n\ndata: y\n\n")
+
+    assert [(event.event, event.id, event.has_own_id) for event in events] == [
+        ("a", "1", True),
+        ("message", "1", False),
+    ]
+
+
+def test_crlf_split_across_chunks_is_one_line_break():
+    events = decode(b"data: a\r", b"\n\r\n", b"data: b\r\n\r\n")
+
+    assert [event.data for event in events] == ["a", "b"]
+
+
+def test_byte_by_byte_feed_matches_whole_feed():
+    stream = "﻿id: 1\r\ndata: héllo\r\n\r\nevent: done\rdata: end\r\r".encode("utf-8")
+
+    single = decode(stream)
+    split = decode(*(stream[index : index + 1] for index in range(len(stream))))
+
+    assert split == single
+    assert [(event.data, event.event) for event in single] == [("héllo", "message"), ("end", "done")]
+
+
+def test_leading_bom_split_across_chunks_is_dropped():
+    events = decode(b"\xef", b"\xbb\xbfdata: x\n\n")
+
+    assert [event.data for event in events] == ["x"]
+
+
+def test_flush_dispatches_unterminated_event():
+    decoder = SseDecoder()
+
+    assert decoder.feed(b"data: partial") == []
+    assert [event.data for event in decoder.flush()] == ["partial"]
+
+
+def test_ignores_id_with_nul_and_non_numeric_retry():
+    decoder = SseDecoder()
+    decoder.feed(b"id: 1\nretry: 250\ndata: a\n\nid: 2\x003\nretry: soon\ndata: b\n\n")
+
+    assert decoder.last_event_id == "1"
+    assert decoder.retry == 250
+
+
+def test_field_without_value():
+    events = decode(b"data\n\n")
+
+    assert [event.data for event in events] == [""]
@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from copilot_client.token_cache import AccessTokenCache
+from tests.helpers import FakeClock
+
+
+SCOPES = ("https://graph.microsoft.com/.default",)
+
+
+def test_cached_token_is_served_until_the_refresh_margin():
+    clock = FakeClock(1000.0)
+    cache = AccessTokenCache(refresh_margin_seconds=60, clock=clock)
+    cache.put(SCOPES, "user-a.tenant", "token-a", expires_in=3600)
+
+    assert cache.get(SCOPES, "user-a.tenant") == "token-a"
+    clock.now += 3600 - 61
+    assert cache.get(SCOPES, "user-a.tenant") == "token-a"
+    clock.now += 1
+    assert cache.get(SCOPES, "user-a.tenant") is None
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.cached_tokens) == (2, 1, 1)
+
+
+def test_tokens_are_keyed_by_scopes_and_account():
+    cache = AccessTokenCache(clock=FakeClock(1000.0))
+    cache.put(SCOPES, "user-a.tenant", "token-a", expires_in=3600)
+
+    assert cache.get(SCOPES, "user-b.tenant") is None
+    assert cache.get(("Sites.Read.All",), "user-a.tenant") is None
+    assert cache.account_for_token("token-a") == "user-a.tenant"
+    assert cache.account_for_token("token-b") is None
+
+
+def test_invalidate_drops_every_token():
+    cache = AccessTokenCache(clock=FakeClock(1000.0))
+    cache.put(SCOPES, "user-a.tenant", "token-a", expires_in=3600)
+    cache.invalidate()
+
+    assert cache.get(SCOPES, "user-a.tenant") is None
+    assert cache.account_for_token("token-a") is None
+
+
+def test_concurrent_reads_count_every_lookup():
+    cache = AccessTokenCache(clock=FakeClock(1000.0))
+    cache.put(SCOPES, "user-a.tenant", "token-a", expires_in=3600)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        tokens = list(executor.map(lambda _: cache.get(SCOPES, "user-a.tenant"), range(400)))
+
+    assert set(tokens) == {"token-a"}
+    assert cache.stats().hits == 400
@@ -0,0 +1,106 @@
+import base64
+import json
+import os
+
+import msal
+from msal_extensions import FilePersistence
+
+from copilot_client.auth import AuthManager
+from copilot_client.token_persistence import BatchedPersistedTokenCache
+from tests.helpers import FakeMsalApp, settings
+
+
+ACCOUNT = msal.TokenCache.CredentialType.ACCOUNT
+
+
+def token_event(user_id: str) -> dict:
+    client_info = base64.urlsafe_b64encode(json.dumps({"uid": user_id, "utid": "tenant"}).encode()).decode()
+    return {
+        "client_id": "client",
+        "scope": ["https://graph.microsoft.com/.default"],
+        "token_endpoint": "https://login.microsoftonline.com/tenant/oauth2/v2.0/token",
+        "response": {
+            "access_token": f"access-token-{user_id}",
+            "expires_in": 3600,
+            "refresh_token": f"refresh-token-{user_id}",
+            "token_type": "Bearer",
+            "client_info": client_info.rstrip("="),
+        },
+        "params": {},
+        "data": {},
+    }
+
+
+def batched_cache(path) -> BatchedPersistedTokenCache:
+    # A long delay keeps the flush timer out of the way; tests flush explicitly.
+    return BatchedPersistedTokenCache(FilePersistence(str(path)), flush_delay_seconds=60)
+
+
+def account_ids(cache: msal.SerializableTokenCache) -> list[str]:
+    return sorted(account["home_account_id"] for account in cache.search(ACCOUNT))
+
+
+def rewrite(path, content: str, mtime: float) -> None:
+    path.write_text(content)
+    os.utime(path, (mtime, mtime))
+
+
+def test_flushed_changes_are_visible_to_another_instance(tmp_path):
+    path = tmp_path / "token_cache.bin"
+    first, second = batched_cache(path), batched_cache(path)
+
+    first.add(token_event("user-a"))
+    assert account_ids(second) == []
+    first.flush()
+    second.add(token_event("user-b"))
+    second.flush()
+
+    assert account_ids(second) == ["user-a.tenant", "user-b.tenant"]
+    assert account_ids(first) == ["user-a.tenant", "user-b.tenant"]
+
+
+def test_empty_or_partial_read_keeps_the_snapshot_until_the_file_is_complete(tmp_path):
+    path = tmp_path / "token_cache.bin"
+    writer, reader = batched_cache(path), batched_cache(path)
+    writer.add(token_event("user-a"))
+    writer.flush()
+    assert account_ids(reader) == ["user-a.tenant"]
+    complete = path.read_text()
+
+    rewrite(path, "", 1_000_000)
+    assert account_ids(reader) == ["user-a.tenant"]
+    rewrite(path, complete[: len(complete) // 2], 1_000_001)
+    assert account_ids(reader) == ["user-a.tenant"]
+
+    writer.add(token_event("user-b"))
+    writer.flush()
+    assert account_ids(reader) == ["user-a.tenant", "user-b.tenant"]
+
+
+def test_clear_empties_the_file_and_drops_pending_writes(tmp_path):
+    path = tmp_path / "token_cache.bin"
+    cache, other = batched_cache(path), batched_cache(path)
+    cache.add(token_event("user-a"))
+    cache.flush()
+    assert account_ids(other) == ["user-a.tenant"]
+    cache.add(token_event("user-b"))
+
+    cache.clear()
+    cache.flush()
+
+    assert account_ids(cache) == []
+    assert account_ids(other) == []
+    assert account_ids(batched_cache(path)) == []
+
+
+def test_sign_out_clears_a_batched_cache_under_the_lock(tmp_path):
+    path = tmp_path / "token_cache.bin"
+    cache = batched_cache(path)
+    cache.add(token_event("user-a"))
+    cache.flush()
+    manager = AuthManager(settings("https://graph.microsoft.com/beta"), app=FakeMsalApp(), token_cache=cache)
+
+    manager.sign_out()
+
+    assert account_ids(batched_cache(path)) == []
+    assert cache._last_saved == path.read_text()
@@ -0,0 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import threading
+
+import pytest
+
+from copilot_client.http import HttpClient
+from copilot_client.transport import Http2Session, build_session
+from tests.helpers import settings
+
+
+def test_http1_pool_is_sized_to_the_concurrency_limit():
+    session = build_session("http1", max_connections=32)
+
+    adapter = session.get_adapter("https://graph.microsoft.com/")
+    assert adapter._pool_maxsize == 32
+    session.close()
+
+
+def test_concurrent_threads_share_one_http2_connection():
+    pytest.importorskip("h2")
+    from benchmarks.http2_transport import Http2StandIn
+
+    server = Http2StandIn(latency=0.005, handshake=0.03)
+    server.start()
+    # Frequent thread switches make the old shared-h2-state races (out-of-order stream ids,
+    # duplicated frames) show up on nearly every round instead of occasionally.
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(5e-4)
+    try:
+        for _ in range(5):
+            client = HttpClient(
+                settings(f"http://127.0.0.1:{server.port}", initial_concurrency=32, max_concurrency=32),
+                session=Http2Session(max_connections=32, prior_knowledge=True),
+            )
+            try:
+                with ThreadPoolExecutor(max_workers=32) as executor:
+                    results = list(
+                        executor.map(
+                            lambda index: client.post_json("token", "/copilot/search", {"query": f"q{index}"}),
+                            range(100),
+                        )
+                    )
+            finally:
+                client.close()
+            assert all(len(result["searchHits"]) == 20 for result in results)
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert server.connections == 5
+
+
+def test_streamed_body_over_http2():
+    pytest.importorskip("h2")
+    from benchmarks.http2_transport import Http2StandIn
+
+    server = Http2StandIn(latency=0.0, handshake=0.0)
+    server.start()
+    client = HttpClient(
+        settings(f"http://127.0.0.1:{server.port}"),
+        session=Http2Session(prior_knowledge=True),
+    )
+    try:
+        with client.post_json_streamed("token", "/copilot/search", {"query": "q"}, "searchHits") as hits:
+            streamed = list(hits)
+        [limits] = client.rate_limit_stats()
+    finally:
+        client.close()
+
+    assert len(streamed) == 20
+    assert limits.in_flight == 0
+    assert not any(thread.name == "copilot-http2" for thread in threading.enumerate())
@@ -0,0 +1,63 @@
+import msal
+
+from copilot_client.apis import ChatApi, RetrievalApi, SearchApi
+from copilot_client.auth import AuthManager
+from copilot_client.http import HttpClient
+from copilot_client.mock_server import MockGraphServer
+from copilot_client.services import CopilotService
+from tests.helpers import FAST, FakeMsalApp, settings
+
+
+def build(base_url: str, app: FakeMsalApp) -> CopilotService:
+    app_settings = settings(base_url, initial_concurrency=3)
+    auth_manager = AuthManager(app_settings, app=app, token_cache=msal.SerializableTokenCache())
+    http_client = HttpClient(app_settings)
+    return CopilotService(
+        auth_manager=auth_manager,
+        chat_api=ChatApi(app_settings, http_client, account_for_token=auth_manager.get_home_account_id),
+        search_api=SearchApi(app_settings, http_client),
+        retrieval_api=RetrievalApi(app_settings, http_client),
+        request_timeout_seconds=app_settings.timeout_seconds,
+        http_client=http_client,
+        warm_up_on_sign_in=True,
+        warm_up_conversations=1,
+    )
+
+
+def test_warm_up_without_a_cached_account_sends_nothing():
+    app = FakeMsalApp(())
+    with MockGraphServer(FAST) as mock:
+        service = build(mock.base_url, app)
+        try:
+            service.warm_up()
+        finally:
+            service.close()
+
+        assert mock.stats().get("requests", 0) == 0
+    assert "acquire_token_interactive" not in app.calls
+    assert service.conversation_pool_stats().created == 0
+
+
+def test_sign_in_warms_connections_and_the_first_chat_uses_the_precreated_conversation():
+    app = FakeMsalApp()
+    with MockGraphServer(FAST) as mock:
+        service = build(mock.base_url, app)
+        try:
+            service.sign_in()
+            service.wait_for_warm_up(5)
+            warmed = mock.stats()["requests"]
+            pooled = service.conversation_pool_stats()
+
+            result = service.send_chat({"prompt": "hello"})
+        finally:
+            service.close()
+
+        # Three HEAD requests for the connection pool and one conversation created in the background.
+        assert warmed == 4
+        assert (pooled.idle, pooled.created) == (1, 1)
+        assert result["turnCount"] == 1
+        # The chat itself, plus the replacement for the pre-created conversation it used.
+        assert mock.stats()["requests"] == warmed + 2
+
+    stats = service.conversation_pool_stats()
+    assert (stats.created, stats.reused, stats.idle) == (2, 1, 1)